@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+ASR 多进程工作池扩展性基准
+
+默认使用假模型：父进程分配 --model-mb 大小的"权重"，每个请求按 --cpu-ms 消耗 CPU 时间并读取权重，
+不需要 FunASR 与模型文件；--audio 指定音频文件时使用真实模型（funasr_local）。
+
+对每个进程数输出吞吐量、加速比、延迟分位数，以及工作进程的 RSS 总和与 PSS 总和
+（PSS 按共享页面平摊，远小于 RSS 总和说明模型权重确实按写时复制共享）。
+
+用法：
+    python benchmarks/bench_asr_pool.py --workers 1 2 4 8 --requests 64
+    python benchmarks/bench_asr_pool.py --audio sample.wav --workers 1 2 4
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from concurrent.futures import wait
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+
+from asr_pool import ASRWorkerPool
+
+_weights = None
+_model_mb = 200
+_cpu_ms = 200
+
+
+def fake_load_model():
+    """父进程中分配假权重（bytearray 逐页写入，确保真正占用内存）"""
+    global _weights
+    if _weights is None:
+        _weights = bytearray(_model_mb * 1024 * 1024)
+        for i in range(0, len(_weights), 4096):
+            _weights[i] = 1
+
+
+def fake_transcribe(audio) -> str:
+    """按固定 CPU 时间计算，并读取全部权重页"""
+    deadline = time.process_time() + _cpu_ms / 1000
+    checksum = 0
+    while time.process_time() < deadline:
+        checksum += sum(_weights[::65536])
+    return f'{audio}:{checksum % 7}'
+
+
+def _memory_kb(pid: int):
+    """读取进程 RSS 与 PSS（KB），非 Linux 返回 (None, None)"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line and not line.startswith('0'))
+        return int(fields['Rss'].split()[0]), int(fields['Pss'].split()[0])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run(workers: int, args) -> dict:
+    if args.audio:
+        pool = ASRWorkerPool(workers=workers, threads_per_worker=args.threads, pin_cpus=args.pin)
+        inputs = [args.audio] * args.requests
+    else:
+        pool = ASRWorkerPool(workers=workers, threads_per_worker=args.threads, pin_cpus=args.pin,
+                             load_model=fake_load_model, transcribe=fake_transcribe, warmup=None)
+        inputs = list(range(args.requests))
+
+    pool.start()
+    latencies = []
+
+    def _done(started):
+        return lambda future: latencies.append(time.perf_counter() - started)
+
+    start = time.perf_counter()
+    futures = []
+    for audio in inputs:
+        future = pool.submit(audio)
+        future.add_done_callback(_done(time.perf_counter()))
+        futures.append(future)
+    wait(futures)
+    elapsed = time.perf_counter() - start
+
+    rss = pss = 0
+    for worker in pool.stats()['per_worker']:
+        worker_rss, worker_pss = _memory_kb(worker['pid'])
+        if worker_rss is None:
+            rss = pss = None
+            break
+        rss += worker_rss
+        pss += worker_pss
+    pool.close()
+
+    return {
+        'throughput': len(inputs) / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': percentile(latencies, 95),
+        'rss_mb': rss / 1024 if rss is not None else None,
+        'pss_mb': pss / 1024 if pss is not None else None,
+    }
+
+
+def main():
+    global _model_mb, _cpu_ms
+    parser = argparse.ArgumentParser(description='ASR 多进程工作池扩展性基准')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='进程数列表')
+    parser.add_argument('--requests', type=int, default=64, help='并发请求数')
+    parser.add_argument('--threads', type=int, default=1, help='每进程 torch 线程数')
+    parser.add_argument('--pin', action='store_true', help='绑定 CPU 核心')
+    parser.add_argument('--audio', help='真实音频文件（使用 funasr_local 模型）')
+    parser.add_argument('--model-mb', type=int, default=200, help='假模型权重大小（MB）')
+    parser.add_argument('--cpu-ms', type=int, default=200, help='假模型每个请求的 CPU 时间（毫秒）')
+    args = parser.parse_args()
+    _model_mb, _cpu_ms = args.model_mb, args.cpu_ms
+
+    model = args.audio or f'fake {args.model_mb}MB / {args.cpu_ms}ms'
+    print(f"模型: {model}，{args.requests} 个并发请求\n")
+    print(f"{'进程数':<8}{'请求/s':>10}{'加速比':>8}{'p50':>9}{'p95':>9}{'RSS总和':>11}{'PSS总和':>11}")
+
+    baseline = None
+    for workers in args.workers:
+        result = run(workers, args)
+        baseline = baseline or result['throughput']
+        memory = (f"{result['rss_mb']:>9.0f}MB{result['pss_mb']:>9.0f}MB"
+                  if result['rss_mb'] is not None else f"{'-':>11}{'-':>11}")
+        print(f"{workers:<8}{result['throughput']:>10.2f}{result['throughput'] / baseline:>7.2f}x"
+              f"{result['p50']:>8.2f}s{result['p95']:>8.2f}s{memory}")
+
+
+if __name__ == '__main__':
+    main()
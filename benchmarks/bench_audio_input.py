@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+ASR 音频输入基准：落盘后解码 vs 内存解码重采样
+
+生成与飞书语音相同格式的 Ogg Opus（48kHz 单声道 24kbps），比较把它转换为
+16kHz 单声道 float32 PCM 的耗时：
+1. tempfile+ffmpeg：写临时文件，再启动 ffmpeg 解码重采样（原有按路径识别的流程）
+2. tempfile+soundfile：写临时文件，再由 soundfile 读取并重采样
+3. pyav：audio_input.load_pcm(bytes)，进程内解码重采样，不落盘
+4. soundfile：不使用 PyAV 时的内存解码回退
+
+用法：
+    python benchmarks/bench_audio_input.py --seconds 10 --rounds 20
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+
+import numpy as np
+import audio_input
+
+
+def make_voice_note(seconds: float) -> bytes:
+    """用 PyAV 编码一段类语音信号为 Ogg Opus"""
+    import av
+
+    rate = 48000
+    t = np.arange(int(rate * seconds)) / rate
+    # 基频缓慢变化并带音节包络的合成信号
+    signal = 0.3 * np.sin(2 * np.pi * (180 + 40 * np.sin(2 * np.pi * 0.5 * t)) * t)
+    signal *= 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+    samples = (signal * 32767).astype(np.int16)
+
+    out_buf = io.BytesIO()
+    with av.open(out_buf, mode='w', format='ogg') as out:
+        stream = out.add_stream('libopus', rate=rate, layout='mono')
+        stream.bit_rate = 24000
+        frame_size = 960
+        for i in range(0, len(samples), frame_size):
+            frame = av.AudioFrame.from_ndarray(samples[None, i:i + frame_size], format='s16', layout='mono')
+            frame.rate = rate
+            for packet in stream.encode(frame):
+                out.mux(packet)
+        for packet in stream.encode(None):
+            out.mux(packet)
+    return out_buf.getvalue()
+
+
+def via_tempfile_ffmpeg(data: bytes) -> np.ndarray:
+    with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as f:
+        f.write(data)
+        path = f.name
+    try:
+        cmd = ['ffmpeg', '-v', 'error', '-i', path, '-f', 'f32le', '-ac', '1', '-ar', '16000', 'pipe:1']
+        out = subprocess.run(cmd, check=True, capture_output=True).stdout
+        return np.frombuffer(out, dtype=np.float32)
+    finally:
+        os.unlink(path)
+
+
+def via_tempfile_soundfile(data: bytes) -> np.ndarray:
+    import soundfile
+
+    with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as f:
+        f.write(data)
+        path = f.name
+    try:
+        samples, rate = soundfile.read(path, dtype='float32', always_2d=True)
+        return audio_input.resample(samples.mean(axis=1), rate)
+    finally:
+        os.unlink(path)
+
+
+def via_memory_soundfile(data: bytes) -> np.ndarray:
+    return audio_input._decode_soundfile(io.BytesIO(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ASR 音频输入基准')
+    parser.add_argument('--seconds', type=float, default=10.0, help='语音时长（秒）')
+    parser.add_argument('--rounds', type=int, default=20, help='重复次数')
+    args = parser.parse_args()
+
+    if not audio_input.PYAV_AVAILABLE:
+        print("需要安装 PyAV (pip install av)")
+        sys.exit(1)
+
+    data = make_voice_note(args.seconds)
+
+    methods = []
+    if shutil.which('ffmpeg'):
+        methods.append(('tempfile+ffmpeg', via_tempfile_ffmpeg))
+    try:
+        import soundfile  # noqa: F401
+        methods.append(('tempfile+soundfile', via_tempfile_soundfile))
+    except ImportError:
+        soundfile = None
+    methods.append(('pyav', audio_input.load_pcm))
+    if soundfile is not None:
+        methods.append(('soundfile', via_memory_soundfile))
+
+    print(f"Ogg Opus {args.seconds:.0f}s / {len(data)} 字节，重复 {args.rounds} 次\n")
+    print(f"{'方式':<20}{'平均':>10}{'最快':>10}{'实时倍数':>10}{'采样数':>10}")
+
+    for name, func in methods:
+        try:
+            pcm = func(data)
+        except Exception as e:
+            print(f"{name:<20}不可用: {e}")
+            continue
+        elapsed = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            func(data)
+            elapsed.append(time.perf_counter() - start)
+        mean = sum(elapsed) / len(elapsed)
+        print(f"{name:<20}{mean * 1000:>8.1f}ms{min(elapsed) * 1000:>8.1f}ms"
+              f"{args.seconds / mean:>9.0f}x{len(pcm):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+端到端延迟基准：FeishuVoice.send_voice 与 funasr_local.transcribe
+
+全部依赖替换为本地替身（见 fake_services.py）：
+- 本地飞书开放接口：token / im/v1/files / im/v1/messages，延迟可配置
+- 假 CosyVoice / Edge TTS：延迟 = 固定延迟 + 每字延迟，返回与文本长度相称的 MP3
+- 假 FunASR 模型：延迟 = 固定延迟 + 实时率 × 音频时长
+
+转码、时长解析、分段、HTTP 连接池、multipart 上传等本仓库代码按真实路径执行。
+对每个场景输出各阶段与端到端的 p50 / p95 / p99，并与基线比较，超出容差时以非零状态退出。
+
+用法：
+    python benchmarks/bench_e2e.py                     # 运行并与 benchmarks/baseline_e2e.json 比较
+    python benchmarks/bench_e2e.py --update-baseline   # 运行并写入新基线
+    python benchmarks/bench_e2e.py --rounds 20 --tolerance 0.3
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_services import (FakeASRModel, FakeFeishuServer, FakeTTSEngine,
+                           install_fake_asr, install_fake_tts)
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline_e2e.json'
+
+# 比较基线时使用的分位数（p99 在轮数较少时波动大，只输出不比较）
+COMPARED = ('p50', 'p95')
+
+SAMPLE_SENTENCE = '今天下午三点在会议室讨论新版本的发布计划，请提前准备好测试报告。'
+
+# (场景名, 音色, 文本长度, 每段最大秒数)
+TTS_SCENARIOS = [
+    ('cosyvoice-short', 'longwan', 30, 25.0),
+    ('cosyvoice-medium', 'longwan', 300, 25.0),
+    ('cosyvoice-long', 'longwan', 1500, 25.0),
+    ('cosyvoice-long-10s', 'longwan', 1500, 10.0),
+    ('edge-medium', 'zh-CN-XiaoyiNeural', 300, 25.0),
+]
+
+# (场景名, 音频秒数)
+ASR_SCENARIOS = [
+    ('asr-5s', 5),
+    ('asr-30s', 30),
+    ('asr-60s', 60),
+]
+
+
+def percentiles(values) -> dict:
+    values = sorted(values)
+
+    def _p(p):
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+    return {'p50': _p(50), 'p95': _p(95), 'p99': _p(99), 'n': len(values)}
+
+
+def make_text(chars: int) -> str:
+    return (SAMPLE_SENTENCE * (chars // len(SAMPLE_SENTENCE) + 1))[:chars]
+
+
+def bench_send_voice(args) -> dict:
+    """各 TTS 场景多轮 send_voice，统计各阶段与端到端耗时（毫秒）"""
+    from feishu_voice import FeishuVoice
+
+    results = {}
+    voice = FeishuVoice(app_id='cli_bench', app_secret='bench', target_user='ou_bench',
+                        api_key='bench', use_cache=False)
+    try:
+        for name, voice_name, chars, max_seconds in TTS_SCENARIOS:
+            text = make_text(chars)
+            stages = {}
+            segments = 0
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    voice.send_voice(text, voice=voice_name, max_segment_seconds=max_seconds)
+                stages.setdefault('e2e', []).append((time.perf_counter() - start) * 1000)
+                segments = len(voice.last_timings)
+                for timings in voice.last_timings:
+                    for stage, seconds in timings.items():
+                        stages.setdefault(stage, []).append(seconds * 1000)
+            results[name] = {stage: percentiles(values) for stage, values in stages.items()}
+            results[name]['segments'] = segments
+            print(f"  {name}: {segments} 段, e2e p50 {results[name]['e2e']['p50']:.0f}ms", file=sys.stderr)
+    finally:
+        voice.transcoder.close()
+    return results
+
+
+def bench_transcribe(args) -> dict:
+    """各 ASR 场景多轮 transcribe（内存中的 Ogg Opus 输入），统计解码与端到端耗时（毫秒）"""
+    import funasr_local
+    from audio_input import load_pcm
+    from fake_services import make_mp3
+    from transcoder import OpusTranscoder
+
+    transcoder = OpusTranscoder(workers=1)
+    second = make_mp3(1.0)
+    results = {}
+    try:
+        for name, seconds in ASR_SCENARIOS:
+            opus = transcoder.transcode(second * seconds)
+            stages = {'decode': [], 'e2e': []}
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                load_pcm(opus)
+                stages['decode'].append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                funasr_local.transcribe(opus, use_cache=False)
+                stages['e2e'].append((time.perf_counter() - start) * 1000)
+            results[name] = {stage: percentiles(values) for stage, values in stages.items()}
+            print(f"  {name}: e2e p50 {results[name]['e2e']['p50']:.0f}ms", file=sys.stderr)
+    finally:
+        transcoder.close()
+    return results
+
+
+def print_report(results: dict, baseline: dict):
+    print(f"\n{'场景':<22}{'阶段':<16}{'p50':>9}{'p95':>9}{'p99':>9}{'基线p50':>10}{'基线p95':>10}")
+    for scenario, stages in results.items():
+        for stage, stats in stages.items():
+            if not isinstance(stats, dict):
+                continue
+            base = baseline.get(scenario, {}).get(stage, {})
+            base_cols = ''.join(f"{base[p]:>9.1f}ms" if p in base else f"{'-':>10}" for p in COMPARED)
+            print(f"{scenario:<22}{stage:<16}{stats['p50']:>7.1f}ms{stats['p95']:>7.1f}ms"
+                  f"{stats['p99']:>7.1f}ms{base_cols}")
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float, slack_ms: float) -> list:
+    """当前值超过 基线 × (1 + tolerance) + slack_ms 视为回退"""
+    regressions = []
+    for scenario, stages in baseline.items():
+        for stage, base in stages.items():
+            current = results.get(scenario, {}).get(stage)
+            if not isinstance(base, dict) or not isinstance(current, dict):
+                continue
+            for p in COMPARED:
+                limit = base[p] * (1 + tolerance) + slack_ms
+                if current[p] > limit:
+                    regressions.append(f"{scenario}/{stage} {p}: {current[p]:.1f}ms > {limit:.1f}ms "
+                                       f"(baseline {base[p]:.1f}ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端延迟基准')
+    parser.add_argument('--rounds', type=int, default=10, help='每个场景的轮数')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--update-baseline', action='store_true', help='写入新基线而不比较')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='相对容差')
+    parser.add_argument('--slack-ms', type=float, default=5.0, help='绝对容差（毫秒），避免短阶段的抖动误报')
+    parser.add_argument('--output', type=Path, help='把结果写入 JSON 文件')
+    parser.add_argument('--skip-tts', action='store_true', help='跳过 send_voice 场景')
+    parser.add_argument('--skip-asr', action='store_true', help='跳过 transcribe 场景')
+    # 替身延迟
+    parser.add_argument('--feishu-token-ms', type=float, default=30)
+    parser.add_argument('--feishu-upload-ms', type=float, default=60)
+    parser.add_argument('--feishu-send-ms', type=float, default=40)
+    parser.add_argument('--cosyvoice-ms', type=float, default=200, help='CosyVoice 固定延迟')
+    parser.add_argument('--cosyvoice-char-ms', type=float, default=4, help='CosyVoice 每字延迟')
+    parser.add_argument('--edge-ms', type=float, default=300, help='Edge TTS 固定延迟')
+    parser.add_argument('--edge-char-ms', type=float, default=3, help='Edge TTS 每字延迟')
+    parser.add_argument('--asr-ms', type=float, default=50, help='ASR 固定延迟')
+    parser.add_argument('--asr-rtf', type=float, default=0.03, help='ASR 实时率')
+    args = parser.parse_args()
+
+    # 隔离 token / 语速 / 识别缓存，避免读写用户目录
+    workdir = tempfile.mkdtemp(prefix='bench_e2e_')
+    os.environ['FEISHU_TOKEN_CACHE'] = os.path.join(workdir, 'token.json')
+    os.environ['FEISHU_VOICE_RATES'] = os.path.join(workdir, 'rates.json')
+    os.environ['FUNASR_NO_CACHE'] = '1'
+
+    server = FakeFeishuServer({'token': args.feishu_token_ms, 'upload': args.feishu_upload_ms,
+                               'send': args.feishu_send_ms}).start()
+    os.environ['FEISHU_API_BASE'] = server.api_base
+
+    install_fake_tts(FakeTTSEngine(args.cosyvoice_ms, args.cosyvoice_char_ms),
+                     FakeTTSEngine(args.edge_ms, args.edge_char_ms))
+    install_fake_asr(FakeASRModel(args.asr_ms, args.asr_rtf))
+
+    results = {}
+    try:
+        if not args.skip_tts:
+            print("send_voice ...", file=sys.stderr)
+            results.update(bench_send_voice(args))
+        if not args.skip_asr:
+            print("transcribe ...", file=sys.stderr)
+            results.update(bench_transcribe(args))
+    finally:
+        server.stop()
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, ensure_ascii=False) + '\n',
+                                 encoding='utf-8')
+        print_report(results, results)
+        print(f"\n基线已写入 {args.baseline}")
+        return
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    print_report(results, baseline)
+
+    if not baseline:
+        print(f"\n未找到基线 {args.baseline}，使用 --update-baseline 生成")
+        return
+    regressions = find_regressions(results, baseline, args.tolerance, args.slack_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项超出基线（容差 {args.tolerance:.0%} + {args.slack_ms:.0f}ms）:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"\n✅ 未超出基线（容差 {args.tolerance:.0%} + {args.slack_ms:.0f}ms）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+分段基准：旧版正则分段（按字符数）vs DurationSegmenter（按预估朗读时长）
+
+生成超长中英混排文本，比较分段吞吐、段数，以及各段预估朗读时长的分布
+（分布越集中，各语音条长度越均匀，也越少出现超长段）。
+
+用法：
+    python benchmarks/bench_segmenter.py --chars 200000 --max-seconds 25
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+
+from segmenter import DurationSegmenter, SpeechRateModel, speech_units
+
+
+def legacy_split_text(text: str, max_chars: int = 80) -> List[str]:
+    """旧版 FeishuVoice._split_text（正则按句、逗号切分后按字符数装段）"""
+    text = text.strip()
+    if not text:
+        return []
+
+    segments = []
+    current_segment = ""
+    sentences = re.split(r'([。！？；])', text)
+
+    i = 0
+    while i < len(sentences):
+        sentence = sentences[i]
+        if i + 1 < len(sentences) and sentences[i + 1] in '。！？；':
+            sentence += sentences[i + 1]
+            i += 1
+        sentence = sentence.strip()
+        i += 1
+        if not sentence:
+            continue
+
+        if len(sentence) > max_chars:
+            if current_segment:
+                segments.append(current_segment.strip())
+                current_segment = ""
+            sub_sentences = re.split(r'([，、])', sentence)
+            j = 0
+            while j < len(sub_sentences):
+                part = sub_sentences[j]
+                if j + 1 < len(sub_sentences) and sub_sentences[j + 1] in '，、':
+                    part += sub_sentences[j + 1]
+                    j += 1
+                part = part.strip()
+                j += 1
+                if not part:
+                    continue
+                if len(part) > max_chars:
+                    for k in range(0, len(part), max_chars):
+                        segments.append(part[k:k + max_chars])
+                else:
+                    segments.append(part)
+        elif len(current_segment) + len(sentence) > max_chars:
+            if current_segment:
+                segments.append(current_segment.strip())
+            current_segment = sentence
+        else:
+            current_segment += sentence
+
+    if current_segment:
+        segments.append(current_segment.strip())
+    return segments
+
+
+def make_text(chars: int, seed: int = 0) -> str:
+    """生成中英混排、句长不一的测试文本"""
+    rng = random.Random(seed)
+    hanzi = '的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会'
+    words = ['OpenClaw', 'Feishu', 'API', 'token', 'voice', 'OPUS', '2024', '3.14']
+    parts = []
+    total = 0
+    while total < chars:
+        clauses = []
+        for _ in range(rng.randint(1, 6)):
+            clause = ''.join(rng.choice(hanzi) for _ in range(rng.randint(3, 30)))
+            if rng.random() < 0.3:
+                clause += ' ' + rng.choice(words) + ' '
+            clauses.append(clause)
+        sentence = rng.choice('，、').join(clauses) + rng.choice('。。。！？；')
+        parts.append(sentence)
+        total += len(sentence)
+    return ''.join(parts)
+
+
+def report(name: str, segments: List[str], elapsed: float, chars: int, rates: SpeechRateModel):
+    seconds = [rates.estimate_seconds(s, 'default') for s in segments]
+    print(f"{name:<12}{chars / elapsed / 1e6:>9.2f}{len(segments):>8}"
+          f"{statistics.mean(seconds):>9.1f}s{statistics.pstdev(seconds):>9.1f}s{max(seconds):>9.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分段基准')
+    parser.add_argument('--chars', type=int, default=200000, help='测试文本长度')
+    parser.add_argument('--max-seconds', type=float, default=25.0, help='每段预估时长上限（秒）')
+    parser.add_argument('--max-chars', type=int, default=120, help='旧版分段的字符上限')
+    parser.add_argument('--rounds', type=int, default=3, help='重复次数（取最快一次）')
+    args = parser.parse_args()
+
+    text = make_text(args.chars)
+    rates = SpeechRateModel(path=Path('/nonexistent/rates.json'))
+    budget = args.max_seconds * rates.rate('default')
+    segmenter = DurationSegmenter(speech_units)
+
+    def best_of(func):
+        best = None
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    print(f"文本 {len(text)} 字符，时长预算 {args.max_seconds:.0f}s\n")
+    print(f"{'方式':<12}{'M字符/s':>9}{'段数':>8}{'平均':>10}{'标准差':>10}{'最长':>10}")
+
+    segments, elapsed = best_of(lambda: legacy_split_text(text, args.max_chars))
+    report('legacy', segments, elapsed, len(text), rates)
+
+    segments, elapsed = best_of(lambda: segmenter.split(text, budget))
+    report('duration', segments, elapsed, len(text), rates)
+
+
+if __name__ == '__main__':
+    main()
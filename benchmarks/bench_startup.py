@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+冷启动基准：各技能模块的导入耗时与命令行启动耗时
+
+OpenClaw 每条消息启动一次脚本，导入耗时计入每次回复的延迟。本基准：
+1. 用 python -X importtime 在新进程中导入各模块，取多轮最小值与预算比较，
+   并列出耗时最多的直接依赖
+2. 检查启动时没有导入重量级可选依赖（引擎 SDK、PyAV、aiohttp、numpy 等），
+   这些依赖应在首次使用时才导入
+3. 测量 `<脚本> --help` 的进程总耗时（含解释器启动）
+
+运行前先编译字节码（与部署后的常驻 __pycache__ 一致），避免把编译时间计入导入耗时。
+超出预算或启动时导入了重量级依赖时以非零状态退出。
+
+用法：
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --rounds 10 --budget-scale 1.5   # 较慢的机器放宽预算
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import compileall
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+SKILLS = ROOT / 'skills'
+SKILL_DIRS = [SKILLS / 'feishu-voice', SKILLS / 'voice-handle']
+
+# 启动时不应导入的模块（只在实际使用对应功能时导入）
+HEAVY_MODULES = ('dashscope', 'edge_tts', 'av', 'aiohttp', 'numpy', 'scipy', 'soundfile',
+                 'torch', 'funasr', 'modelscope')
+
+# (模块, 所在技能目录, 导入预算毫秒)
+IMPORT_TARGETS = [
+    ('feishu_voice', 'feishu-voice', 160),
+    ('async_feishu_voice', 'feishu-voice', 180),
+    ('voice_queue', 'feishu-voice', 100),
+    ('tts_api', 'voice-handle', 120),
+    ('funasr_local', 'voice-handle', 80),
+    ('asr_client', 'voice-handle', 80),
+]
+
+# (脚本, 启动预算毫秒)：`python <脚本> --help` 的进程总耗时
+CLI_TARGETS = [
+    ('feishu-voice/feishu_voice.py', 250),
+    ('feishu-voice/voice_queue.py', 150),
+    ('voice-handle/tts_api.py', 200),
+    ('voice-handle/asr_client.py', 150),
+]
+
+
+def child_env() -> dict:
+    """子进程环境：两个技能目录加入 sys.path，不读写用户目录下的配置"""
+    env = dict(os.environ)
+    paths = [str(path) for path in SKILL_DIRS]
+    if env.get('PYTHONPATH'):
+        paths.append(env['PYTHONPATH'])
+    env['PYTHONPATH'] = os.pathsep.join(paths)
+    env.pop('OPENCLAW_METRICS', None)
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, str, float, float]]:
+    """解析 -X importtime 输出，返回 [(层级, 模块, 自身毫秒, 累计毫秒)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return entries
+
+
+def measure_import(module: str, cwd: Path, env: dict) -> Tuple[float, List[Tuple[int, str, float, float]]]:
+    """在新进程中导入模块，返回 (累计导入毫秒, importtime 明细)"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} 失败:\n{proc.stderr[-2000:]}")
+    entries = parse_importtime(proc.stderr)
+    total = next((cumulative for depth, name, _, cumulative in entries
+                  if depth == 0 and name == module), None)
+    if total is None:
+        raise RuntimeError(f"未在 importtime 输出中找到 {module}")
+    return total, entries
+
+
+def measure_cli(script: Path, env: dict) -> float:
+    """`python <脚本> --help` 的进程总耗时（毫秒）"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, str(script), '--help'], cwd=script.parent, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script.name} --help 失败:\n{proc.stderr[-2000:]}")
+    return elapsed
+
+
+def heaviest_children(entries, module: str, top: int) -> List[Tuple[str, float]]:
+    """目标模块导入过程中，累计耗时最多的直接依赖"""
+    children = []
+    # importtime 先输出子模块，再输出父模块：目标模块之前的第 1 层条目即其直接依赖
+    for depth, name, _, cumulative in entries:
+        if depth == 0 and name == module:
+            break
+        if depth == 1:
+            children.append((name, cumulative))
+        elif depth == 0:
+            children = []
+    return sorted(children, key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动基准')
+    parser.add_argument('--rounds', type=int, default=5, help='每项测量轮数（取最小值比较预算）')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='预算倍数，较慢的机器可调大')
+    parser.add_argument('--top', type=int, default=5, help='列出耗时最多的直接依赖个数')
+    parser.add_argument('--no-compile', action='store_true', help='不预先编译字节码')
+    parser.add_argument('--output', type=Path, help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    if not args.no_compile:
+        for path in SKILL_DIRS:
+            compileall.compile_dir(str(path), quiet=1)
+
+    env = child_env()
+    failures = []
+    results: Dict[str, dict] = {'imports': {}, 'cli': {}}
+
+    print(f"{'模块':<22} {'min':>9} {'median':>9} {'预算':>8}  耗时最多的直接依赖")
+    for module, skill, budget in IMPORT_TARGETS:
+        budget *= args.budget_scale
+        cwd = SKILLS / skill
+        totals = []
+        loaded = set()
+        entries = []
+        for _ in range(max(1, args.rounds)):
+            total, entries = measure_import(module, cwd, env)
+            totals.append(total)
+            loaded.update(name.split('.')[0] for _, name, _, _ in entries)
+        best = min(totals)
+        heavy = sorted(loaded.intersection(HEAVY_MODULES))
+        children = heaviest_children(entries, module, args.top)
+        results['imports'][module] = {'min_ms': best, 'median_ms': statistics.median(totals),
+                                      'budget_ms': budget, 'heavy': heavy,
+                                      'children': dict(children)}
+        status = '✅' if best <= budget and not heavy else '❌'
+        print(f"{module:<22} {best:>7.1f}ms {statistics.median(totals):>7.1f}ms {budget:>6.0f}ms  "
+              f"{status} " + ', '.join(f"{name} {ms:.1f}ms" for name, ms in children))
+        if best > budget:
+            failures.append(f"import {module}: {best:.1f}ms > {budget:.0f}ms")
+        if heavy:
+            failures.append(f"import {module} 启动时导入了 {', '.join(heavy)}")
+
+    print(f"\n{'命令':<38} {'min':>9} {'median':>9} {'预算':>8}")
+    for script, budget in CLI_TARGETS:
+        budget *= args.budget_scale
+        times = [measure_cli(SKILLS / script, env) for _ in range(max(1, args.rounds))]
+        best = min(times)
+        results['cli'][script] = {'min_ms': best, 'median_ms': statistics.median(times),
+                                  'budget_ms': budget}
+        status = '✅' if best <= budget else '❌'
+        print(f"{script + ' --help':<38} {best:>7.1f}ms {statistics.median(times):>7.1f}ms "
+              f"{budget:>6.0f}ms  {status}")
+        if best > budget:
+            failures.append(f"{script} --help: {best:.1f}ms > {budget:.0f}ms")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    if failures:
+        print(f"\n❌ {len(failures)} 项超出启动预算:")
+        for line in failures:
+            print(f"   {line}")
+        sys.exit(1)
+    print("\n✅ 未超出启动预算")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+流式 CosyVoice 合成基准：阻塞合成后转码 vs 流式合成同时转码
+
+使用本地假合成器替换 DashScope SpeechSynthesizer：按设定的速度分块回调音频，
+不需要网络与 API Key。输出首包时间 (TTFB) 与 OPUS 就绪时间 (ready)。
+
+用法：
+    python benchmarks/bench_stream_tts.py --seconds 20 --synth-speed 4
+"""
+
+import sys
+import time
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+
+import tts_api
+from tts_api import TTSAPI
+from transcoder import OpusTranscoder
+
+
+def make_sample(seconds: float) -> bytes:
+    """用 ffmpeg 生成单声道 MP3 作为假合成器的输出"""
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+        '-ac', '1', '-ar', '22050', '-b:a', '64k',
+        '-f', 'mp3', 'pipe:1'
+    ]
+    return subprocess.run(cmd, check=True, capture_output=True).stdout
+
+
+def make_fake_synthesizer(audio: bytes, audio_seconds: float, speed: float, chunk_count: int):
+    """构造假的 SpeechSynthesizer：以 speed 倍实时速度产出 audio"""
+    total_time = audio_seconds / speed
+    chunk_size = max(1, len(audio) // chunk_count)
+
+    class FakeSynthesizer:
+        def __init__(self, model=None, voice=None, callback=None, **kwargs):
+            self.callback = callback
+
+        def _emit(self):
+            for i in range(0, len(audio), chunk_size):
+                time.sleep(total_time / chunk_count)
+                self.callback.on_data(audio[i:i + chunk_size])
+            self.callback.on_complete()
+
+        def call(self, text):
+            if self.callback is None:
+                time.sleep(total_time)
+                return audio
+            threading.Thread(target=self._emit, daemon=True).start()
+            return None
+
+    return FakeSynthesizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式合成延迟基准')
+    parser.add_argument('--seconds', type=float, default=20.0, help='单段音频时长（秒）')
+    parser.add_argument('--synth-speed', type=float, default=4.0, help='假合成器速度（实时倍数）')
+    parser.add_argument('--chunks', type=int, default=40, help='假合成器回调块数')
+    parser.add_argument('--rounds', type=int, default=3, help='重复次数')
+    parser.add_argument('--backend', choices=['pyav', 'ffmpeg'], default=None, help='转码后端')
+    args = parser.parse_args()
+
+    audio = make_sample(args.seconds)
+
+    # 替换 DashScope 为本地假实现
+    tts_api.DASHSCOPE_AVAILABLE = True
+    tts_api.SpeechSynthesizer = make_fake_synthesizer(audio, args.seconds, args.synth_speed, args.chunks)
+    if getattr(tts_api, 'ResultCallback', None) is None:
+        tts_api.ResultCallback = object
+    tts_api.dashscope = type('dashscope', (), {})
+
+    tts = TTSAPI(api_key='fake')
+    transcoder = OpusTranscoder(workers=1, backend=args.backend)
+
+    print(f"样本 {args.seconds:.0f}s / {len(audio)} 字节，合成速度 {args.synth_speed}x 实时\n")
+    print(f"{'模式':<10}{'TTFB':>10}{'ready':>10}")
+
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        mp3_data = tts.tts_bytes('benchmark', 'longwan')
+        ttfb = time.perf_counter() - start
+        transcoder.transcode(mp3_data)
+        ready = time.perf_counter() - start
+        print(f"{'blocking':<10}{ttfb:>9.2f}s{ready:>9.2f}s")
+
+        start = time.perf_counter()
+        first = []
+
+        def _chunks():
+            for chunk in tts.tts_stream('benchmark', 'longwan'):
+                if not first:
+                    first.append(time.perf_counter() - start)
+                yield chunk
+
+        transcoder.transcode_stream(_chunks())
+        ready = time.perf_counter() - start
+        print(f"{'streaming':<10}{first[0]:>9.2f}s{ready:>9.2f}s")
+
+    transcoder.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+转码吞吐基准：原有逐段 ffmpeg（临时文件）路径 vs OpusTranscoder 转码池
+
+用法：
+    python benchmarks/bench_transcode.py --segments 48 --workers 1 2 4 8
+    python benchmarks/bench_transcode.py --input sample.mp3 --backend ffmpeg
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'skills' / 'feishu-voice'))
+from transcoder import OpusTranscoder
+
+
+def make_sample(seconds: float) -> bytes:
+    """用 ffmpeg 生成一段与 TTS 输出相近的单声道 MP3"""
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+        '-ac', '1', '-ar', '24000', '-b:a', '48k',
+        '-f', 'mp3', 'pipe:1'
+    ]
+    return subprocess.run(cmd, check=True, capture_output=True).stdout
+
+
+def legacy_transcode(data: bytes) -> bytes:
+    """原 _convert_mp3_to_opus 路径：写临时文件，启动 ffmpeg，再读回"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        mp3_path = os.path.join(temp_dir, 'voice.mp3')
+        opus_path = os.path.join(temp_dir, 'voice.opus')
+        with open(mp3_path, 'wb') as f:
+            f.write(data)
+        subprocess.run([
+            'ffmpeg', '-y', '-i', mp3_path,
+            '-c:a', 'libopus', '-b:a', '24k', '-application', 'voip',
+            opus_path
+        ], check=True, capture_output=True)
+        with open(opus_path, 'rb') as f:
+            return f.read()
+
+
+def run(label: str, func, data: bytes, segments: int, concurrency: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: func(data), range(segments)))
+    elapsed = time.perf_counter() - start
+    rate = segments / elapsed
+    print(f"{label:<28} {segments:>4} 段  {elapsed:7.2f}s  {rate:7.2f} 段/秒")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MP3 → OPUS 转码吞吐基准')
+    parser.add_argument('--input', help='输入 MP3 文件（默认用 ffmpeg 生成）')
+    parser.add_argument('--seconds', type=float, default=8.0, help='生成样本的时长（秒）')
+    parser.add_argument('--segments', type=int, default=32, help='每轮转码段数')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1],
+                        help='转码池大小列表')
+    parser.add_argument('--backend', choices=['pyav', 'ffmpeg'], default=None, help='转码池后端')
+    args = parser.parse_args()
+
+    if args.input:
+        data = Path(args.input).read_bytes()
+    else:
+        data = make_sample(args.seconds)
+    print(f"样本 {len(data)} 字节\n")
+
+    baseline = run('legacy (串行, 临时文件)', legacy_transcode, data, args.segments, 1)
+
+    for workers in sorted(set(args.workers)):
+        transcoder = OpusTranscoder(workers=workers, backend=args.backend)
+        try:
+            transcoder.transcode(data)  # 预热工作进程
+            rate = run(f'{transcoder.backend} pool x{workers}', transcoder.transcode,
+                       data, args.segments, workers)
+            print(f"{'':<28} 相对 legacy {rate / baseline:5.2f}x")
+        finally:
+            transcoder.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+基准测试用的本地替身服务
+
+1. FakeFeishuServer：本地飞书开放接口（tenant_access_token、im/v1/files、im/v1/messages），
+   各接口延迟可配置，记录收到的请求数
+2. install_fake_tts：替换 tts_api 中的 DashScope SpeechSynthesizer 与 edge_tts，
+   按 "固定延迟 + 每字延迟" 返回与文本长度相称的 MP3
+3. install_fake_asr：替换 funasr_local 的模型，按 "固定延迟 + 实时率 × 音频时长" 返回文本
+
+所有替身只在基准进程内生效，不需要网络、API Key 或模型文件。
+"""
+
+import io
+import sys
+import json
+import time
+import types
+import asyncio
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+# ---------------------------------------------------------------- 飞书
+
+class _FeishuHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 缓冲写入，响应头与响应体合并为一次发送（避免 Nagle 与延迟确认叠加的 40ms 停顿）
+    wbufsize = 64 * 1024
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        path = self.path.split('?', 1)[0]
+
+        if path.endswith('/auth/v3/tenant_access_token/internal'):
+            endpoint, payload = 'token', {'code': 0, 'tenant_access_token': 't-bench', 'expire': 7200}
+        elif path.endswith('/im/v1/files'):
+            endpoint = 'upload'
+            payload = {'code': 0, 'data': {'file_key': f'file_bench_{server.next_id()}'}}
+        elif path.endswith('/im/v1/messages'):
+            endpoint = 'send'
+            payload = {'code': 0, 'data': {'message_id': f'om_bench_{server.next_id()}',
+                                           'chat_id': 'oc_bench'}}
+        else:
+            self.send_error(404)
+            return
+
+        throttled = server.count(endpoint, length)
+        time.sleep(server.latency.get(endpoint, 0) / 1000)
+        if throttled:
+            self._reply({'code': 99991400, 'msg': 'request trigger frequency limit'}, status=429)
+            return
+        self._reply(payload)
+
+
+class FakeFeishuServer:
+    """本地飞书开放接口替身（后台线程运行）"""
+
+    def __init__(self, latency_ms: Optional[Dict[str, float]] = None,
+                 rate_limit_every: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            latency_ms: 各接口延迟（毫秒），键为 token / upload / send
+            rate_limit_every: 各接口每 N 个请求返回一次限频响应（HTTP 429 / 99991400）
+        """
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _FeishuHandler)
+        self._server.daemon_threads = True
+        self._server.latency = dict(latency_ms or {})
+        self._lock = threading.Lock()
+        self._ids = 0
+        self.requests = {'token': 0, 'upload': 0, 'send': 0}
+        self.rate_limit_every = dict(rate_limit_every or {})
+        self.rate_limited = 0
+        self.upload_bytes = 0
+        self._server.next_id = self._next_id
+        self._server.count = self._count
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def api_base(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/open-apis'
+
+    def _next_id(self) -> int:
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def _count(self, endpoint: str, length: int) -> bool:
+        """记录请求，返回本次是否应返回限频响应"""
+        with self._lock:
+            self.requests[endpoint] += 1
+            every = self.rate_limit_every.get(endpoint)
+            if every and self.requests[endpoint] % every == 0:
+                self.rate_limited += 1
+                return True
+            if endpoint == 'upload':
+                self.upload_bytes += length
+            return False
+
+    def start(self) -> 'FakeFeishuServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ---------------------------------------------------------------- TTS
+
+def make_mp3(seconds: float = 1.0) -> bytes:
+    """生成单声道 MP3（MP3 帧可直接拼接，用于构造任意时长的合成结果）"""
+    try:
+        import av
+        import numpy as np
+    except ImportError:
+        cmd = ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', f'sine=frequency=220:duration={seconds}',
+               '-ac', '1', '-ar', '24000', '-b:a', '48k', '-f', 'mp3', 'pipe:1']
+        return subprocess.run(cmd, check=True, capture_output=True).stdout
+
+    rate = 24000
+    t = np.arange(int(rate * seconds)) / rate
+    samples = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+    out_buf = io.BytesIO()
+    # 不写 ID3 / Xing 头，多段直接拼接仍是合法的 MP3 帧序列
+    with av.open(out_buf, mode='w', format='mp3',
+                 options={'id3v2_version': '0', 'write_xing': '0'}) as out:
+        stream = out.add_stream('libmp3lame', rate=rate, layout='mono')
+        stream.bit_rate = 48000
+        frame_size = 1152
+        for i in range(0, len(samples), frame_size):
+            frame = av.AudioFrame.from_ndarray(samples[None, i:i + frame_size], format='s16', layout='mono')
+            frame.rate = rate
+            for packet in stream.encode(frame):
+                out.mux(packet)
+        for packet in stream.encode(None):
+            out.mux(packet)
+    return out_buf.getvalue()
+
+
+class FakeTTSEngine:
+    """合成延迟与音频时长都随文本长度增长的假引擎"""
+
+    def __init__(self, base_ms: float, per_char_ms: float, chars_per_second: float = 4.5,
+                 chunks: int = 8):
+        self.base_ms = base_ms
+        self.per_char_ms = per_char_ms
+        self.chars_per_second = chars_per_second
+        self.chunks = chunks
+        self._second = make_mp3(1.0)
+
+    def audio_for(self, text: str) -> bytes:
+        seconds = max(1, round(len(text) / self.chars_per_second))
+        return self._second * seconds
+
+    def latency(self, text: str) -> float:
+        return (self.base_ms + self.per_char_ms * len(text)) / 1000
+
+    def split(self, audio: bytes):
+        size = max(1, len(audio) // self.chunks)
+        return [audio[i:i + size] for i in range(0, len(audio), size)]
+
+
+def install_fake_tts(cosyvoice: FakeTTSEngine, edge: FakeTTSEngine):
+    """把 tts_api 的 DashScope 与 edge_tts 替换为假引擎"""
+    import tts_api
+
+    class FakeSpeechSynthesizer:
+        def __init__(self, model=None, voice=None, callback=None, **kwargs):
+            self.callback = callback
+
+        def _emit(self, text):
+            audio = cosyvoice.audio_for(text)
+            parts = cosyvoice.split(audio)
+            for part in parts:
+                time.sleep(cosyvoice.latency(text) / len(parts))
+                self.callback.on_data(part)
+            self.callback.on_complete()
+
+        def call(self, text):
+            if self.callback is None:
+                time.sleep(cosyvoice.latency(text))
+                return cosyvoice.audio_for(text)
+            threading.Thread(target=self._emit, args=(text,), daemon=True).start()
+            return None
+
+    class FakeCommunicate:
+        def __init__(self, text, voice, **kwargs):
+            self.text = text
+
+        async def stream(self):
+            parts = edge.split(edge.audio_for(self.text))
+            for part in parts:
+                await asyncio.sleep(edge.latency(self.text) / len(parts))
+                yield {'type': 'audio', 'data': part}
+
+    tts_api.DASHSCOPE_AVAILABLE = True
+    tts_api.SpeechSynthesizer = FakeSpeechSynthesizer
+    tts_api.SpeechSynthesizerObjectPool = None
+    if getattr(tts_api, 'ResultCallback', None) is None:
+        tts_api.ResultCallback = object
+    tts_api.dashscope = types.SimpleNamespace(api_key=None)
+    tts_api.EDGE_TTS_AVAILABLE = True
+    tts_api.edge_tts = types.SimpleNamespace(Communicate=FakeCommunicate)
+
+
+# ---------------------------------------------------------------- ASR
+
+class FakeASRModel:
+    """按音频时长计算延迟的假 FunASR 模型"""
+
+    def __init__(self, base_ms: float, rtf: float):
+        self.base_ms = base_ms
+        self.rtf = rtf
+
+    def _seconds(self, item) -> float:
+        if hasattr(item, 'ndim'):
+            return len(item) / 16000
+        return 5.0
+
+    def generate(self, input, cache=None, **kwargs):
+        items = input if isinstance(input, list) else [input]
+        seconds = sum(self._seconds(item) for item in items)
+        time.sleep(self.base_ms / 1000 + self.rtf * seconds)
+        return [{'text': f'<|zh|><|NEUTRAL|>识别结果{self._seconds(item):.0f}秒'} for item in items]
+
+
+def install_fake_asr(model: FakeASRModel):
+    """把 funasr_local 的模型替换为假模型（未安装 FunASR 时同时提供后处理函数）"""
+    import funasr_local
+
+    funasr_local._model = model
+    try:
+        import funasr.utils.postprocess_utils  # noqa: F401
+    except ImportError:
+        postprocess = types.ModuleType('funasr.utils.postprocess_utils')
+        postprocess.rich_transcription_postprocess = lambda text: text
+        sys.modules.setdefault('funasr', types.ModuleType('funasr'))
+        sys.modules.setdefault('funasr.utils', types.ModuleType('funasr.utils'))
+        sys.modules['funasr.utils.postprocess_utils'] = postprocess
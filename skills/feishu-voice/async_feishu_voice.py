@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Async Feishu Voice - 飞书语音消息发送（asyncio 版）
+
+与 FeishuVoice 流程相同，但全部以协程实现，可在 OpenClaw 自身的事件循环中调用：
+- Edge TTS 直接使用 edge_tts 的异步接口；CosyVoice 在线程池中执行
+- stream_tts=True 时流式合成与转码在线程池中进行，合成与编码仍然重叠
+- 转码任务提交到 OpusTranscoder 工作池，通过 asyncio.wrap_future 等待
+- 飞书接口使用 AsyncFeishuHTTPClient（优先 aiohttp）
+
+一个进程即可并发服务多个会话，不需要为每个请求占用一个线程。
+
+用法：
+    voice = AsyncFeishuVoice()
+    await voice.send_voice("你好", target_user="ou_xxx")
+"""
+
+import asyncio
+import functools
+from typing import List, Optional
+
+from feishu_voice import FeishuVoice
+from feishu_http import FeishuAPIError, AsyncFeishuHTTPClient
+from token_cache import INVALID_TOKEN_CODES
+
+
+class AsyncFeishuVoice(FeishuVoice):
+    """飞书语音消息发送器（asyncio 版）"""
+
+    def __init__(self, *args, async_http_client: Optional[AsyncFeishuHTTPClient] = None, **kwargs):
+        """
+        参数同 FeishuVoice，另外：
+
+        Args:
+            async_http_client: 异步 HTTP 客户端，默认新建一个
+        """
+        super().__init__(*args, **kwargs)
+        self.ahttp = async_http_client or AsyncFeishuHTTPClient()
+
+    async def _run_sync(self, func, *args, **kwargs):
+        """在线程池中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def _aget_tenant_access_token(self) -> str:
+        """获取 token（缓存未命中时的网络请求与文件锁在线程池中完成）"""
+        return await self._run_sync(self.token_cache.get)
+
+    async def _acall_with_token(self, func, *args, **kwargs):
+        """同 _call_with_token，func 为第一个参数是 token 的协程函数"""
+        token = await self._aget_tenant_access_token()
+        try:
+            return await func(token, *args, **kwargs)
+        except FeishuAPIError as e:
+            if e.code not in INVALID_TOKEN_CODES:
+                raise
+            token = await self._run_sync(self.token_cache.invalidate, token)
+            return await func(token, *args, **kwargs)
+
+    async def _aupload_file(self, token: str, audio: bytes, duration: int) -> str:
+        """异步上传文件到飞书，返回 file_key"""
+        url, encoder = self._upload_request(audio, duration)
+        headers = encoder.headers()
+        headers['Authorization'] = f'Bearer {token}'
+        result = await self.ahttp.request_json('POST', url, body=encoder, headers=headers)
+        if result.get('code') == 0:
+            return result['data']['file_key']
+        else:
+            raise FeishuAPIError(f"Upload failed: {result.get('msg')}", result.get('code'))
+
+    async def _asend_voice_message(self, token: str, file_key: str, duration: int,
+                                   target_user: Optional[str] = None,
+                                   receive_id_type: str = 'open_id') -> dict:
+        """异步发送语音消息"""
+        url, data = self._message_request(file_key, duration, target_user, receive_id_type)
+        result = await self.ahttp.request_json('POST', url, body=data, headers={
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {token}'
+        })
+        if result.get('code') == 0:
+            return result['data']
+        else:
+            raise FeishuAPIError(f"Send failed: {result.get('msg')}", result.get('code'))
+
+    async def _aprepare_segment(self, segment: str, voice: str, index: int = 1) -> dict:
+        """
+        异步处理单段文本，步骤与返回值同 _prepare_segment
+
+        合成、转码、上传在事件循环中等待；缓存读写、时长解析等阻塞步骤在线程池中执行。
+        """
+        timings = {}
+
+        cache_key, uploaded, audio = await self._run_sync(self._lookup_cache, segment, voice,
+                                                          index, timings)
+        if uploaded:
+            file_key, duration = uploaded
+            return {'file_key': file_key, 'duration': duration, 'timings': timings}
+
+        if audio:
+            opus_data, duration = audio
+        else:
+            if self.stream_tts:
+                # 1+2. 流式合成并同时转码（阻塞的分块迭代在线程池中进行）
+                synthesized = {'voice': voice}
+                opus_data = await self._run_sync(self._synthesize_streaming, segment, voice,
+                                                 index, timings, synthesized)
+            else:
+                # 1. 生成 TTS
+                with self.metrics.span('feishu_voice.tts', timings, segment=index,
+                                       chars=len(segment)) as span:
+                    synthesized = await self.tts_api.atts_result(segment, voice)
+                    mp3_data = self._synthesized_mp3(synthesized, span, index)
+
+                # 2. 转换为 OPUS
+                with self.metrics.span('feishu_voice.convert', timings, segment=index,
+                                       input_bytes=len(mp3_data)) as span:
+                    opus_data = await asyncio.wrap_future(self.transcoder.submit(mp3_data))
+                    span.set(bytes=len(opus_data))
+
+            # 3. 获取音频时长
+            cache_key, duration = await self._run_sync(self._finish_synthesis, segment, synthesized,
+                                                       cache_key, opus_data, index, timings)
+
+        # 4. 上传文件
+        with self.metrics.span('feishu_voice.upload', timings, segment=index,
+                               bytes=len(opus_data), audio_ms=duration) as span:
+            file_key = await self.rate_limiter.acall('upload', self._acall_with_token,
+                                                     self._aupload_file, opus_data, duration,
+                                                     timings=timings)
+            span.set(wait_seconds=timings['upload_wait'])
+
+        if cache_key:
+            await self._run_sync(self._store_file_key, cache_key, file_key, duration)
+        return {'file_key': file_key, 'duration': duration, 'timings': timings}
+
+    @staticmethod
+    async def _cancel_all(tasks):
+        """取消尚未完成的任务并等待其结束，避免任务在后台继续运行或遗留未取回的异常"""
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def send_voice(self, text: str, voice: Optional[str] = None,
+                         target_user: Optional[str] = None,
+                         auto_split: bool = True,
+                         max_segment_chars: Optional[int] = None,
+                         pipeline: bool = True,
+                         max_workers: Optional[int] = None,
+                         max_segment_seconds: Optional[float] = None,
+                         receive_id_type: str = 'open_id') -> List[dict]:
+        """
+        发送语音消息到飞书（完整流程，协程版），参数与返回值同 FeishuVoice.send_voice
+        """
+        voice = voice or self.DEFAULT_VOICE
+        segments = self._segment_text(text, voice, auto_split, max_segment_chars,
+                                      max_segment_seconds)
+
+        results = []
+        timings_list = []
+
+        token_timings = {}
+        with self.metrics.span('feishu_voice.token', token_timings):
+            await self._aget_tenant_access_token()
+
+        workers = max(1, max_workers or self.DEFAULT_MAX_WORKERS) if pipeline else 1
+        semaphore = asyncio.Semaphore(workers)
+
+        async def _prepare(i: int, segment: str) -> dict:
+            async with semaphore:
+                return await self._aprepare_segment(segment, voice, i)
+
+        tasks = [asyncio.ensure_future(_prepare(i, segment))
+                 for i, segment in enumerate(segments, 1)]
+        try:
+            with self.metrics.span('feishu_voice.send_voice', segments=len(segments), chars=len(text),
+                                   pipeline=workers > 1 and len(segments) > 1):
+                # 按段落顺序等待并发送
+                for i, task in enumerate(tasks, 1):
+                    prepared = await task
+                    timings = dict(prepared['timings'])
+                    with self.metrics.span('feishu_voice.send', timings, segment=i,
+                                           audio_ms=prepared['duration']) as span:
+                        result = await self.rate_limiter.acall(
+                            'message', self._acall_with_token, self._asend_voice_message,
+                            prepared['file_key'], prepared['duration'], target_user, receive_id_type,
+                            receiver=target_user or self.target_user, timings=timings)
+                        span.set(wait_seconds=timings['message_wait'])
+                    if i == 1:
+                        timings.update(token_timings)
+                    timings_list.append(timings)
+                    results.append(result)
+
+                    if len(segments) > 1:
+                        self.metrics.event('feishu_voice.sent',
+                                           f"  ✅ 第 {i}/{len(segments)} 段发送成功 ({self._format_timings(timings)})",
+                                           segment=i, segments=len(segments))
+        except BaseException:
+            await self._cancel_all(tasks)
+            raise
+        finally:
+            self.last_timings = timings_list
+
+        await self._run_sync(self._save_speech_rates)
+        return results if len(results) > 1 else results[0]
+
+    async def broadcast_voice(self, text: str, receive_ids: List[str],
+                              receive_id_type: str = 'open_id',
+                              voice: Optional[str] = None,
+                              auto_split: bool = True,
+                              max_segment_chars: Optional[int] = None,
+                              max_segment_seconds: Optional[float] = None,
+                              max_workers: Optional[int] = None,
+                              send_workers: Optional[int] = None) -> List[dict]:
+        """
+        同一段语音群发给多个接收者（协程版），参数与返回值同 FeishuVoice.broadcast_voice
+        """
+        if receive_id_type not in self.RECEIVE_ID_TYPES:
+            raise ValueError(f"Unsupported receive_id_type: {receive_id_type}")
+        receive_ids = list(dict.fromkeys(receive_ids))
+        if not receive_ids:
+            return []
+
+        voice = voice or self.DEFAULT_VOICE
+        segments = self._segment_text(text, voice, auto_split, max_segment_chars,
+                                      max_segment_seconds)
+        results = [{'receive_id': receive_id, 'messages': [], 'error': None}
+                   for receive_id in receive_ids]
+
+        prepare_semaphore = asyncio.Semaphore(max(1, max_workers or self.DEFAULT_MAX_WORKERS))
+        send_semaphore = asyncio.Semaphore(max(1, send_workers or self.DEFAULT_BROADCAST_WORKERS))
+
+        async def _prepare(i: int, segment: str) -> dict:
+            async with prepare_semaphore:
+                return await self._aprepare_segment(segment, voice, i)
+
+        async def _send_all(result: dict):
+            async with send_semaphore:
+                try:
+                    for i, task in enumerate(tasks, 1):
+                        prepared = await asyncio.shield(task)
+                        timings = {}
+                        with self.metrics.span('feishu_voice.send', timings, segment=i,
+                                               audio_ms=prepared['duration'], broadcast=True) as span:
+                            result['messages'].append(await self.rate_limiter.acall(
+                                'message', self._acall_with_token, self._asend_voice_message,
+                                prepared['file_key'], prepared['duration'], result['receive_id'],
+                                receive_id_type, receiver=result['receive_id'], timings=timings))
+                            span.set(wait_seconds=timings['message_wait'])
+                except Exception as e:
+                    result['error'] = str(e)
+
+        tasks = [asyncio.ensure_future(_prepare(i, segment))
+                 for i, segment in enumerate(segments, 1)]
+        try:
+            with self.metrics.span('feishu_voice.broadcast', segments=len(segments), chars=len(text),
+                                   receivers=len(receive_ids)) as span:
+                await asyncio.gather(*(_send_all(result) for result in results))
+                span.set(failed=sum(1 for result in results if result['error']))
+        except BaseException:
+            await self._cancel_all(tasks)
+            raise
+        finally:
+            self.last_timings = [task.result()['timings'] for task in tasks
+                                 if task.done() and not task.cancelled() and not task.exception()]
+
+        await self._run_sync(self._save_speech_rates)
+        return results
+
+    async def aclose(self):
+        """关闭异步连接池与转码池"""
+        await self.ahttp.close()
+        await self._run_sync(self.transcoder.close)
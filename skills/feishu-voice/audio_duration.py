@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Audio Duration - 进程内计算音频时长
+
+不启动 ffprobe，直接解析容器/帧头：
+1. Ogg Opus：最后一个 Ogg 页的 granule position 减去 OpusHead 的 pre-skip
+2. MP3：逐帧解析帧头累计采样数（跳过 ID3v2 标签与 Xing/Info 帧）
+"""
+
+import struct
+from typing import Optional, Union
+
+
+# Opus 的 granule position 固定以 48kHz 计数
+OPUS_GRANULE_RATE = 48000
+
+# MP3 比特率表（kbps），键为 (是否 MPEG1, layer)
+_MP3_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# MP3 采样率表，键为版本位：0=MPEG2.5, 2=MPEG2, 3=MPEG1
+_MP3_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+
+def ogg_opus_duration_ms(data: bytes) -> Optional[int]:
+    """
+    计算 Ogg Opus 时长（毫秒）
+
+    Args:
+        data: 完整的 .opus/.ogg 文件内容
+
+    Returns:
+        时长毫秒数，无法解析时返回 None
+    """
+    if not data.startswith(b'OggS'):
+        return None
+
+    head = data.find(b'OpusHead')
+    if head < 0 or head + 12 > len(data):
+        return None
+    pre_skip = struct.unpack_from('<H', data, head + 10)[0]
+
+    # 从文件末尾向前找最后一个有效的 Ogg 页（granule 为 -1 表示该页没有结束的包）
+    pos = len(data)
+    while True:
+        pos = data.rfind(b'OggS', 0, pos)
+        if pos < 0 or pos + 14 > len(data):
+            return None
+        if data[pos + 4] == 0:
+            granule = struct.unpack_from('<q', data, pos + 6)[0]
+            if granule >= 0:
+                break
+
+    samples = max(0, granule - pre_skip)
+    return int(round(samples * 1000 / OPUS_GRANULE_RATE))
+
+
+def _skip_id3v2(data: bytes) -> int:
+    if len(data) >= 10 and data.startswith(b'ID3'):
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _parse_mp3_header(data: bytes, pos: int):
+    """解析帧头，返回 (帧长度, 每帧采样数, 采样率, 是否 MPEG1, 声道模式)，无效时返回 None"""
+    if pos + 4 > len(data):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = (b2 >> 4) & 0x0F
+    rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    channel_mode = (b3 >> 6) & 0x03
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or mpeg1) else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return length, samples, sample_rate, mpeg1, channel_mode
+
+
+def mp3_duration_ms(data: bytes) -> Optional[int]:
+    """
+    通过逐帧解析帧头计算 MP3 时长（毫秒），CBR/VBR 均准确
+
+    Args:
+        data: 完整的 MP3 文件内容
+
+    Returns:
+        时长毫秒数，无法解析时返回 None
+    """
+    pos = _skip_id3v2(data)
+    total = 0.0
+    frames = 0
+
+    while pos + 4 <= len(data):
+        header = _parse_mp3_header(data, pos)
+        if header is None:
+            # 帧间垃圾数据或尾部 ID3v1 标签，逐字节重新同步
+            pos += 1
+            continue
+        length, samples, sample_rate, mpeg1, channel_mode = header
+
+        if frames == 0:
+            # 第一帧若为 Xing/Info 头则不含音频
+            side_info = (17 if channel_mode == 3 else 32) if mpeg1 else (9 if channel_mode == 3 else 17)
+            tag = data[pos + 4 + side_info:pos + 8 + side_info]
+            if tag in (b'Xing', b'Info'):
+                frames += 1
+                pos += length
+                continue
+
+        total += samples / sample_rate
+        frames += 1
+        pos += length
+
+    if total <= 0:
+        return None
+    return int(round(total * 1000))
+
+
+def get_duration_ms(source: Union[str, bytes]) -> Optional[int]:
+    """
+    根据内容自动识别格式（Ogg Opus / MP3）并计算时长
+
+    Args:
+        source: 文件路径或音频字节
+
+    Returns:
+        时长毫秒数，无法识别时返回 None
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+
+    if data.startswith(b'OggS'):
+        return ogg_opus_duration_ms(data)
+    return mp3_duration_ms(data)
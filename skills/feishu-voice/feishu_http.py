@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Feishu HTTP - 飞书开放接口 HTTP 客户端
+
+所有飞书接口请求共用的 HTTP 层：
+1. 按 host 维护 keep-alive 长连接池，避免每次请求重新建立 TCP+TLS
+2. 复用同一个 SSL 上下文，并开启证书校验
+3. 连接池大小、连接/读取超时可配置
+4. AsyncFeishuHTTPClient 为 asyncio 调用方提供同样的能力（优先使用 aiohttp）
+"""
+
+import os
+import ssl
+import json
+import queue
+import asyncio
+import threading
+import functools
+import http.client
+import importlib.util
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# aiohttp 只在异步客户端首次建立会话时导入，同步发送路径不承担其导入开销
+AIOHTTP_AVAILABLE = importlib.util.find_spec('aiohttp') is not None
+
+
+class FeishuAPIError(Exception):
+    """飞书开放接口返回非 0 code（响应体无法解析时 code 为 None，status 为 HTTP 状态码）"""
+
+    def __init__(self, message: str, code: Optional[int] = None, status: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+# 复用的长连接可能已被服务端关闭，出现这些异常时换新连接重试一次
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class _HostPool:
+    """单个 host 的连接池"""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int], size: int,
+                 context: ssl.SSLContext, connect_timeout: float):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.context = context
+        self.connect_timeout = connect_timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.connect_timeout,
+                                               context=self.context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+
+    def acquire(self, timeout: Optional[float]) -> Tuple[http.client.HTTPConnection, bool]:
+        """取出一个连接，返回 (连接, 是否为复用的旧连接)"""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No free connection to {self.host} within {timeout}s")
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool):
+        if reusable:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class FeishuHTTPClient:
+    """带 keep-alive 连接池的 HTTP 客户端（线程安全）"""
+
+    DEFAULT_POOL_SIZE = 8
+    DEFAULT_CONNECT_TIMEOUT = 5.0
+    DEFAULT_READ_TIMEOUT = 30.0
+
+    def __init__(self, pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 ca_file: Optional[str] = None):
+        """
+        Args:
+            pool_size: 每个 host 的最大连接数，默认读取 FEISHU_HTTP_POOL_SIZE
+            connect_timeout: 建立连接超时（秒），默认读取 FEISHU_HTTP_CONNECT_TIMEOUT
+            read_timeout: 读取响应超时（秒），默认读取 FEISHU_HTTP_READ_TIMEOUT
+            ca_file: 自定义 CA 证书文件（企业代理等场景），默认使用系统证书
+        """
+        self.pool_size = pool_size or int(os.getenv('FEISHU_HTTP_POOL_SIZE', self.DEFAULT_POOL_SIZE))
+        self.connect_timeout = connect_timeout or float(
+            os.getenv('FEISHU_HTTP_CONNECT_TIMEOUT', self.DEFAULT_CONNECT_TIMEOUT))
+        self.read_timeout = read_timeout or float(
+            os.getenv('FEISHU_HTTP_READ_TIMEOUT', self.DEFAULT_READ_TIMEOUT))
+
+        # 所有连接共用一个 SSL 上下文（默认即开启主机名与证书校验）
+        self.ssl_context = ssl.create_default_context(cafile=ca_file or os.getenv('FEISHU_CA_FILE'))
+
+        self._pools: Dict[Tuple[str, str, Optional[int]], _HostPool] = {}
+        self._pools_lock = threading.Lock()
+
+    def _get_pool(self, scheme: str, host: str, port: Optional[int]) -> _HostPool:
+        key = (scheme, host, port)
+        with self._pools_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = _HostPool(scheme, host, port, self.pool_size,
+                                 self.ssl_context, self.connect_timeout)
+                self._pools[key] = pool
+            return pool
+
+    def request(self, method: str, url: str, body=None,
+                headers: Optional[dict] = None) -> Tuple[int, bytes]:
+        """
+        发送 HTTP 请求
+
+        Args:
+            method: 请求方法
+            url: 完整 URL
+            body: 请求体（bytes，或带 Content-Length 头的可迭代字节块，如 MultipartEncoder）
+            headers: 请求头
+
+        Returns:
+            (状态码, 响应体)
+        """
+        parts = urlsplit(url)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        pool = self._get_pool(parts.scheme, parts.hostname, parts.port)
+        replayable = body is None or isinstance(body, (bytes, bytearray, memoryview)) or \
+            getattr(body, 'replayable', False)
+
+        while True:
+            conn, reused = pool.acquire(timeout=self.connect_timeout + self.read_timeout)
+            reusable = False
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                if conn.sock is not None:
+                    conn.sock.settimeout(self.read_timeout)
+                response = conn.getresponse()
+                data = response.read()
+                reusable = not response.will_close
+                return response.status, data
+            except _STALE_CONNECTION_ERRORS:
+                # 复用的长连接已失效，换新连接重试（请求体无法重放时直接抛出）
+                if not reused or not replayable:
+                    raise
+            finally:
+                pool.release(conn, reusable)
+
+    def request_json(self, method: str, url: str, body=None,
+                     headers: Optional[dict] = None) -> dict:
+        """发送请求并解析 JSON 响应（HTTP 错误状态时同样解析飞书返回体）"""
+        status, data = self.request(method, url, body=body, headers=headers)
+        try:
+            return json.loads(data.decode('utf-8'))
+        except ValueError:
+            raise FeishuAPIError(f"HTTP {status}: {data[:200]!r}", status=status)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._pools_lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+
+class AsyncFeishuHTTPClient:
+    """asyncio 版 HTTP 客户端
+
+    安装 aiohttp 时使用其连接池在事件循环内完成请求；
+    否则把同步 FeishuHTTPClient 的请求放到线程池执行。
+    """
+
+    def __init__(self, pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 ca_file: Optional[str] = None):
+        """参数同 FeishuHTTPClient"""
+        self._sync = FeishuHTTPClient(pool_size, connect_timeout, read_timeout, ca_file)
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit_per_host=self._sync.pool_size,
+                                             ssl=self._sync.ssl_context)
+            timeout = aiohttp.ClientTimeout(sock_connect=self._sync.connect_timeout,
+                                            sock_read=self._sync.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def request(self, method: str, url: str, body=None,
+                      headers: Optional[dict] = None) -> Tuple[int, bytes]:
+        """发送 HTTP 请求，参数与返回值同 FeishuHTTPClient.request"""
+        if not AIOHTTP_AVAILABLE:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, functools.partial(self._sync.request, method, url, body=body, headers=headers))
+
+        if body is not None and not isinstance(body, (bytes, bytearray, memoryview)):
+            chunks = body
+
+            async def _stream():
+                for chunk in chunks:
+                    yield bytes(chunk)
+            body = _stream()
+
+        async with self._get_session().request(method, url, data=body, headers=headers) as response:
+            return response.status, await response.read()
+
+    async def request_json(self, method: str, url: str, body=None,
+                           headers: Optional[dict] = None) -> dict:
+        """发送请求并解析 JSON 响应"""
+        status, data = await self.request(method, url, body=body, headers=headers)
+        try:
+            return json.loads(data.decode('utf-8'))
+        except ValueError:
+            raise FeishuAPIError(f"HTTP {status}: {data[:200]!r}", status=status)
+
+    async def close(self):
+        """关闭连接池"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._sync.close()
+
+
+_default_client: Optional[FeishuHTTPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> FeishuHTTPClient:
+    """进程内共享的默认客户端"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = FeishuHTTPClient()
+        return _default_client
@@ -10,17 +10,17 @@ Feishu Voice Skill - 飞书语音消息发送
 
 依赖：
 - voice-handle (TTS)
-- ffmpeg-python
+- PyAV（可选，常驻进程内编码）或 FFmpeg 命令行
 """
 
 import os
 import sys
 import json
-import re
-import tempfile
+import time
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
 
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
@@ -29,26 +29,51 @@ if sys.platform == "win32":
 # 导入 voice-handle 的 TTS 功能
 sys.path.insert(0, str(Path(__file__).parent.parent / 'voice-handle'))
 from tts_api import TTSAPI
+from metrics import ConsoleSink, Metrics, get_metrics, sinks_from_spec
 
-
-try:
-    import ffmpeg
-    FFMPEG_AVAILABLE = True
-except ImportError:
-    FFMPEG_AVAILABLE = False
-
+from feishu_http import FeishuAPIError, FeishuHTTPClient, get_default_client
+from token_cache import TenantTokenCache, INVALID_TOKEN_CODES
+from voice_cache import VoiceCache
+from audio_duration import get_duration_ms
+from transcoder import OpusTranscoder
+from segmenter import DurationSegmenter, SpeechRateModel, char_units
+from multipart import MultipartEncoder, FileContent
+from rate_limit import FeishuRateLimiter, get_default_limiter
 
 class FeishuVoice:
     """飞书语音消息发送器"""
     
-    # 飞书 API 配置
-    FEISHU_API_BASE = "https://open.feishu.cn/open-apis"
+    # 飞书 API 配置（FEISHU_API_BASE 可指向私有化部署或本地测试服务）
+    FEISHU_API_BASE = os.getenv('FEISHU_API_BASE', "https://open.feishu.cn/open-apis")
     
     # 默认音色
     DEFAULT_VOICE = "zh-CN-XiaoyiNeural"
     
+    # OPUS 编码参数
+    OPUS_BITRATE = '24k'
+    OPUS_APPLICATION = 'voip'
+    
+    # 每段默认最大预估时长（秒）
+    DEFAULT_SEGMENT_SECONDS = 25.0
+    
+    # 流水线模式下同时处理（合成/转码/上传）的最大段数
+    DEFAULT_MAX_WORKERS = 3
+    
+    # 群发时同时发送的接收者数
+    DEFAULT_BROADCAST_WORKERS = 8
+    
+    # 飞书消息接口支持的接收者 ID 类型
+    RECEIVE_ID_TYPES = ('open_id', 'union_id', 'user_id', 'email', 'chat_id')
+    
     def __init__(self, app_id: Optional[str] = None, app_secret: Optional[str] = None, 
-                 target_user: Optional[str] = None, api_key: Optional[str] = None):
+                 target_user: Optional[str] = None, api_key: Optional[str] = None,
+                 http_client: Optional[FeishuHTTPClient] = None,
+                 use_cache: bool = True,
+                 transcode_workers: Optional[int] = None,
+                 debug_dir: Optional[str] = None,
+                 stream_tts: bool = False,
+                 metrics: Optional[Metrics] = None,
+                 rate_limiter: Optional[FeishuRateLimiter] = None):
         """
         初始化飞书语音发送器
         
@@ -57,6 +82,13 @@ class FeishuVoice:
             app_secret: 飞书应用密钥
             target_user: 默认目标用户 open_id
             api_key: DashScope API Key（可选）
+            http_client: 飞书 HTTP 客户端，默认使用进程内共享的连接池
+            use_cache: 是否启用合成音频与 file_key 缓存
+            transcode_workers: 并发转码数，默认为 CPU 核心数
+            debug_dir: 调试目录，设置后将每段的 MP3/OPUS 写入该目录（默认全程在内存中处理）
+            stream_tts: 是否流式合成，音频块到达即送入转码，编码与合成重叠
+            metrics: 埋点与进度输出，默认使用按 OPENCLAW_METRICS 配置的共享实例
+            rate_limiter: 飞书接口限频调度器，默认使用进程内共享的调度器
         """
         self.app_id = app_id or os.getenv('FEISHU_APP_ID')
         self.app_secret = app_secret or os.getenv('FEISHU_APP_SECRET')
@@ -67,8 +99,43 @@ class FeishuVoice:
         if not self.app_id or not self.app_secret or not self.api_key:
             self._load_config_from_openclaw()
         
+        # 飞书接口共用的 keep-alive 连接池
+        self.http = http_client or get_default_client()
+        
+        # 上传/发送前按接口与接收者限速，限频时退避重试
+        self.rate_limiter = rate_limiter or get_default_limiter()
+        
+        # 阶段耗时埋点（未配置输出端时只计时）
+        self.metrics = metrics or get_metrics()
+        
         # 初始化 TTS
-        self.tts_api = TTSAPI(api_key=self.api_key)
+        self.tts_api = TTSAPI(api_key=self.api_key, metrics=self.metrics)
+        
+        # Tenant Access Token 缓存（按 app_id 跨进程共享）
+        self.token_cache = TenantTokenCache(self.app_id, self._fetch_tenant_access_token)
+        
+        # MP3 → OPUS 转码池（常驻工作进程）
+        self.transcoder = OpusTranscoder(workers=transcode_workers, bitrate=self.OPUS_BITRATE,
+                                         application=self.OPUS_APPLICATION)
+        
+        # 各音色语速（按历史合成结果校准，用于按时长分段）
+        self.speech_rates = SpeechRateModel()
+        
+        self.debug_dir = debug_dir
+        self.stream_tts = stream_tts
+        if self.debug_dir:
+            os.makedirs(self.debug_dir, exist_ok=True)
+        
+        # 合成音频 / file_key 缓存
+        self.voice_cache = None
+        if use_cache:
+            try:
+                self.voice_cache = VoiceCache()
+            except Exception as e:
+                print(f"Warning: Voice cache disabled: {e}")
+        
+        # 最近一次 send_voice 各段各阶段耗时（秒）
+        self.last_timings: List[dict] = []
     
     def _load_config_from_openclaw(self):
         """从 openclaw.json 加载配置"""
@@ -97,35 +164,40 @@ class FeishuVoice:
                 except Exception as e:
                     print(f"Warning: Failed to load config from {config_path}: {e}")
     
-    def _get_tenant_access_token(self) -> str:
-        """获取飞书 Tenant Access Token"""
-        import urllib.request
-        import ssl
-        
+    def _fetch_tenant_access_token(self) -> Tuple[str, int]:
+        """请求飞书 Tenant Access Token，返回 (token, 有效期秒数)"""
         url = f"{self.FEISHU_API_BASE}/auth/v3/tenant_access_token/internal"
         data = json.dumps({
             "app_id": self.app_id,
             "app_secret": self.app_secret
         }).encode('utf-8')
         
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={'Content-Type': 'application/json'},
-            method='POST'
-        )
-        
-        # 禁用 SSL 验证（如果需要）
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
+        result = self.http.request_json('POST', url, body=data, 
+                                        headers={'Content-Type': 'application/json'})
+        if result.get('code') == 0:
+            return result['tenant_access_token'], int(result.get('expire', 7200))
+        else:
+            raise FeishuAPIError(f"Failed to get token: {result.get('msg')}", result.get('code'))
+    
+    def _get_tenant_access_token(self) -> str:
+        """获取飞书 Tenant Access Token（优先使用缓存）"""
+        return self.token_cache.get()
+    
+    def _call_with_token(self, func, *args, **kwargs):
+        """
+        以缓存的 token 调用飞书接口，token 失效时刷新并透明重试一次
         
-        with urllib.request.urlopen(req, context=context) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            if result.get('code') == 0:
-                return result['tenant_access_token']
-            else:
-                raise Exception(f"Failed to get token: {result.get('msg')}")
+        Args:
+            func: 第一个参数为 token 的接口方法
+        """
+        token = self._get_tenant_access_token()
+        try:
+            return func(token, *args, **kwargs)
+        except FeishuAPIError as e:
+            if e.code not in INVALID_TOKEN_CODES:
+                raise
+            token = self.token_cache.invalidate(token)
+            return func(token, *args, **kwargs)
     
     def _convert_mp3_to_opus(self, mp3_path: str, opus_path: str) -> str:
         """
@@ -138,130 +210,98 @@ class FeishuVoice:
         Returns:
             OPUS 文件路径
         """
-        if not FFMPEG_AVAILABLE:
-            # 使用命令行 ffmpeg
-            cmd = [
-                'ffmpeg', '-y',
-                '-i', mp3_path,
-                '-c:a', 'libopus',
-                '-b:a', '24k',
-                '-application', 'voip',
-                opus_path
-            ]
-            subprocess.run(cmd, check=True, capture_output=True)
-        else:
-            # 使用 ffmpeg-python
-            (
-                ffmpeg
-                .input(mp3_path)
-                .output(opus_path, **{
-                    'c:a': 'libopus',
-                    'b:a': '24k',
-                    'application': 'voip'
-                })
-                .overwrite_output()
-                .run(quiet=True)
-            )
+        self.transcoder.transcode_file(mp3_path, opus_path)
         
         return opus_path
     
-    def _get_audio_duration(self, file_path: str) -> int:
-        """获取音频时长（毫秒）"""
+    def _get_audio_duration(self, audio: Union[bytes, str]) -> int:
+        """
+        获取音频时长（毫秒）
+        
+        优先在进程内解析 Ogg Opus / MP3，无法解析时才调用 ffprobe。
+        
+        Args:
+            audio: 音频字节或文件路径
+        """
+        try:
+            duration = get_duration_ms(audio)
+            if duration:
+                return duration
+        except Exception as e:
+            print(f"Warning: Failed to parse audio duration: {e}")
+        
         try:
+            is_data = isinstance(audio, (bytes, bytearray))
             cmd = [
                 'ffprobe', '-v', 'error',
                 '-show_entries', 'format=duration',
                 '-of', 'default=noprint_wrappers=1:nokey=1',
-                file_path
+                'pipe:0' if is_data else audio
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            duration_sec = float(result.stdout.strip())
+            result = subprocess.run(cmd, input=audio if is_data else None, capture_output=True)
+            duration_sec = float(result.stdout.decode().strip())
             return int(duration_sec * 1000)
         except Exception:
+            print("Warning: Failed to get audio duration, using 5000 ms")
             return 5000  # 默认 5 秒
     
-    def _upload_file(self, token: str, file_path: str, duration: int) -> str:
+    def _upload_request(self, audio: FileContent, duration: int,
+                        length: Optional[int] = None) -> Tuple[str, MultipartEncoder]:
+        """构建上传文件请求，返回 (URL, multipart 请求体)"""
+        url = f"{self.FEISHU_API_BASE}/im/v1/files"
+        
+        encoder = MultipartEncoder(
+            fields=[('file_type', 'opus'), ('file_name', 'voice.opus'), ('duration', str(duration))],
+            file_field='file',
+            file_name='voice.opus',
+            content=audio,
+            content_type='audio/opus',
+            length=length
+        )
+        return url, encoder
+    
+    def _upload_file(self, token: str, audio: Union[FileContent, str], duration: int,
+                     length: Optional[int] = None) -> str:
         """
         上传文件到飞书
         
+        请求体由 MultipartEncoder 流式产出，音频数据不会被拼接复制。
+        
         Args:
             token: Tenant Access Token
-            file_path: 文件路径
+            audio: OPUS 音频（bytes / memoryview、文件对象、字节块迭代器）或文件路径
             duration: 音频时长（毫秒）
+            length: 音频字节数，audio 为迭代器时必须提供
             
         Returns:
             file_key
         """
-        import urllib.request
-        import ssl
-        
-        url = f"{self.FEISHU_API_BASE}/im/v1/files"
+        if isinstance(audio, (str, os.PathLike)):
+            with open(audio, 'rb') as f:
+                return self._upload_file(token, f, duration)
         
         # 构建 multipart/form-data
-        boundary = '----FormBoundary' + str(os.urandom(8).hex())
-        
-        file_data = open(file_path, 'rb').read()
-        
-        body = b''
-        body += f'--{boundary}\r\n'.encode()
-        body += b'Content-Disposition: form-data; name="file_type"\r\n\r\nopus\r\n'
-        
-        body += f'--{boundary}\r\n'.encode()
-        body += b'Content-Disposition: form-data; name="file_name"\r\n\r\nvoice.opus\r\n'
-        
-        body += f'--{boundary}\r\n'.encode()
-        body += f'Content-Disposition: form-data; name="duration"\r\n\r\n{duration}\r\n'.encode()
-        
-        body += f'--{boundary}\r\n'.encode()
-        body += b'Content-Disposition: form-data; name="file"; filename="voice.opus"\r\n'
-        body += b'Content-Type: audio/opus\r\n\r\n'
-        body += file_data
-        body += b'\r\n'
-        body += f'--{boundary}--\r\n'.encode()
-        
-        req = urllib.request.Request(
-            url,
-            data=body,
-            headers={
-                'Content-Type': f'multipart/form-data; boundary={boundary}',
-                'Authorization': f'Bearer {token}'
-            },
-            method='POST'
-        )
-        
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
+        url, encoder = self._upload_request(audio, duration, length)
         
-        with urllib.request.urlopen(req, context=context) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            if result.get('code') == 0:
-                return result['data']['file_key']
-            else:
-                raise Exception(f"Upload failed: {result.get('msg')}")
+        headers = encoder.headers()
+        headers['Authorization'] = f'Bearer {token}'
+        result = self.http.request_json('POST', url, body=encoder, headers=headers)
+        if result.get('code') == 0:
+            return result['data']['file_key']
+        else:
+            raise FeishuAPIError(f"Upload failed: {result.get('msg')}", result.get('code'))
     
-    def _send_voice_message(self, token: str, file_key: str, duration: int, 
-                           target_user: Optional[str] = None) -> dict:
-        """
-        发送语音消息
-        
-        Args:
-            token: Tenant Access Token
-            file_key: 文件 key
-            duration: 音频时长（毫秒）
-            target_user: 目标用户 open_id
-            
-        Returns:
-            发送结果
-        """
-        import urllib.request
-        import ssl
-        
+    def _message_request(self, file_key: str, duration: int,
+                         target_user: Optional[str] = None,
+                         receive_id_type: str = 'open_id') -> Tuple[str, bytes]:
+        """构建发送语音消息请求，返回 (URL, JSON 请求体)"""
         target = target_user or self.target_user
         if not target:
             raise ValueError("Target user not specified")
+        if receive_id_type not in self.RECEIVE_ID_TYPES:
+            raise ValueError(f"Unsupported receive_id_type: {receive_id_type}")
         
-        url = f"{self.FEISHU_API_BASE}/im/v1/messages?receive_id_type=open_id"
+        url = f"{self.FEISHU_API_BASE}/im/v1/messages?receive_id_type={receive_id_type}"
         
         data = json.dumps({
             "receive_id": target,
@@ -271,36 +311,38 @@ class FeishuVoice:
             }),
             "msg_type": "audio"
         }).encode('utf-8')
+        return url, data
+    
+    def _send_voice_message(self, token: str, file_key: str, duration: int, 
+                           target_user: Optional[str] = None,
+                           receive_id_type: str = 'open_id') -> dict:
+        """
+        发送语音消息
         
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {token}'
-            },
-            method='POST'
-        )
-        
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
-        
-        with urllib.request.urlopen(req, context=context) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            if result.get('code') == 0:
-                return result['data']
-            else:
-                raise Exception(f"Send failed: {result.get('msg')}")
+        Args:
+            token: Tenant Access Token
+            file_key: 文件 key
+            duration: 音频时长（毫秒）
+            target_user: 接收者 ID
+            receive_id_type: 接收者 ID 类型（open_id / union_id / user_id / email / chat_id）
+            
+        Returns:
+            发送结果
+        """
+        url, data = self._message_request(file_key, duration, target_user, receive_id_type)
+        
+        result = self.http.request_json('POST', url, body=data, headers={
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {token}'
+        })
+        if result.get('code') == 0:
+            return result['data']
+        else:
+            raise FeishuAPIError(f"Send failed: {result.get('msg')}", result.get('code'))
     
     def _split_text(self, text: str, max_chars: int = 80) -> List[str]:
         """
-        将长文本智能分段
-        
-        策略：
-        1. 优先按句子结束符（。！？；）分割
-        2. 如果单句过长，按逗号分割
-        3. 确保每段不超过 max_chars 字符
+        按字符数将长文本分段（单遍扫描，优先句末，其次逗号/顿号处切分）
         
         Args:
             text: 原始文本
@@ -309,137 +351,415 @@ class FeishuVoice:
         Returns:
             分段后的文本列表
         """
-        # 清理文本
-        text = text.strip()
-        if not text:
-            return []
+        return DurationSegmenter(char_units).split(text.strip(), max_chars)
+    
+    def _split_text_by_duration(self, text: str, voice: str, max_seconds: float) -> List[str]:
+        """
+        按预估朗读时长将长文本分段，语速取该音色的历史校准值
+        
+        Args:
+            text: 原始文本
+            voice: 音色
+            max_seconds: 每段最大预估时长（秒）
+            
+        Returns:
+            分段后的文本列表
+        """
+        budget = max_seconds * self.speech_rates.rate(voice)
+        return DurationSegmenter().split(text.strip(), budget)
+    
+    def _cache_key(self, segment: str, voice: str) -> Optional[str]:
+        """计算段落的缓存键，音色无可用引擎时返回 None"""
+        engine, voice = self.tts_api.resolve_voice(voice)
+        if engine is None:
+            return None
+        model = self.tts_api.TTS_MODEL if engine == 'cosyvoice' else ''
+        encoding = {'codec': 'libopus', 'bitrate': self.OPUS_BITRATE,
+                    'application': self.OPUS_APPLICATION}
+        return VoiceCache.make_key(segment, voice, engine, model, encoding)
+    
+    def _write_debug_file(self, name: str, data: bytes):
+        """调试模式下保存中间音频文件"""
+        if self.debug_dir:
+            with open(os.path.join(self.debug_dir, name), 'wb') as f:
+                f.write(data)
+    
+    def _record_synthesis(self, segment: str, voice: str, duration: int):
+        """用实际合成时长校准该音色的语速"""
+        _, resolved_voice = self.tts_api.resolve_voice(voice)
+        self.speech_rates.record(resolved_voice, segment, duration)
+    
+    def _store_synthesis(self, segment: str, synthesized: dict, cache_key: Optional[str],
+                         opus_data: bytes, duration: int) -> Optional[str]:
+        """
+        按实际合成的音色校准语速并写入音频缓存
         
-        segments = []
-        current_segment = ""
+        对冲改用备用引擎时音频来自备用音色，不能记在原音色的缓存键与语速下。
         
-        # 按句子分割（支持。！？；）
-        sentences = re.split(r'([。！？；])', text)
+        Args:
+            synthesized: tts_result / tts_stream 返回的 {'voice', 'fallback', ...}
+            cache_key: 原音色的缓存键，未启用缓存时为 None
+            
+        Returns:
+            上传后写入 file_key 使用的缓存键
+        """
+        if synthesized.get('fallback') and cache_key:
+            cache_key = self._cache_key(segment, synthesized['voice'])
+        self._record_synthesis(segment, synthesized['voice'], duration)
+        if cache_key:
+            self.voice_cache.put_audio(cache_key, opus_data, duration)
+        return cache_key
+    
+    def _synthesize_streaming(self, segment: str, voice: str, index: int, timings: dict,
+                              synthesized: dict) -> bytes:
+        """
+        流式合成 + 转码，返回 OPUS 字节，实际使用的引擎与音色写入 synthesized
         
-        i = 0
-        while i < len(sentences):
-            sentence = sentences[i]
-            # 添加标点符号到句子
-            if i + 1 < len(sentences) and sentences[i + 1] in '。！？；':
-                sentence += sentences[i + 1]
-                i += 1
+        记录 tts_first_byte（首个音频块到达耗时）与 ready（OPUS 就绪耗时）。
+        """
+        mp3_chunks = []
+        
+        with self.metrics.span('feishu_voice.stream', segment=index, chars=len(segment)) as span:
+            start = span.start
             
-            sentence = sentence.strip()
-            i += 1
+            def _chunks():
+                for chunk in self.tts_api.tts_stream(segment, voice, synthesized):
+                    if not mp3_chunks:
+                        timings['tts_first_byte'] = time.perf_counter() - start
+                    mp3_chunks.append(chunk)
+                    yield chunk
             
-            if not sentence:
-                continue
+            opus_data = self.transcoder.transcode_stream(_chunks())
+            timings['ready'] = time.perf_counter() - start
+            span.set(mp3_bytes=sum(len(chunk) for chunk in mp3_chunks), bytes=len(opus_data),
+                     first_byte_ms=timings.get('tts_first_byte', 0) * 1000)
+        if not mp3_chunks:
+            raise RuntimeError(f"TTS synthesis failed for segment {index}")
+        
+        self._write_debug_file(f'segment_{index}.mp3', b''.join(mp3_chunks))
+        return opus_data
+    
+    def _lookup_cache(self, segment: str, voice: str, index: int, timings: dict):
+        """
+        查询段落缓存
+        
+        Returns:
+            (缓存键, 已上传的 (file_key, 时长) 或 None, 已合成的 (OPUS, 时长) 或 None)，
+            未启用缓存时全为 None
+        """
+        if self.voice_cache is None:
+            return None, None, None
+        with self.metrics.span('feishu_voice.cache', timings, segment=index) as span:
+            cache_key = self._cache_key(segment, voice)
+            uploaded = cache_key and self.voice_cache.get_file_key(cache_key, self.app_id)
+            audio = None
+            if not uploaded and cache_key:
+                audio = self.voice_cache.get_audio(cache_key)
+            span.set(hit='file_key' if uploaded else 'audio' if audio else 'miss')
+        return cache_key, uploaded, audio
+    
+    def _synthesized_mp3(self, synthesized: dict, span, index: int) -> bytes:
+        """检查 tts_result 的合成结果，返回 MP3 字节"""
+        mp3_data = synthesized['data']
+        span.set(bytes=len(mp3_data or b''), fallback=synthesized['fallback'])
+        if not mp3_data:
+            raise RuntimeError(f"TTS synthesis failed for segment {index}")
+        self._write_debug_file(f'segment_{index}.mp3', mp3_data)
+        return mp3_data
+    
+    def _finish_synthesis(self, segment: str, synthesized: dict, cache_key: Optional[str],
+                          opus_data: bytes, index: int, timings: dict) -> Tuple[Optional[str], int]:
+        """
+        新合成的 OPUS：获取时长（以实际上传的 OPUS 为准），校准语速并写入音频缓存
+        
+        Returns:
+            (写入 file_key 使用的缓存键, 时长毫秒)
+        """
+        self._write_debug_file(f'segment_{index}.opus', opus_data)
+        with self.metrics.span('feishu_voice.duration', timings, segment=index):
+            duration = self._get_audio_duration(opus_data)
+        cache_key = self._store_synthesis(segment, synthesized, cache_key, opus_data, duration)
+        return cache_key, duration
+    
+    def _store_file_key(self, cache_key: Optional[str], file_key: str, duration: int):
+        """记录上传得到的 file_key，未启用缓存时跳过"""
+        if cache_key:
+            self.voice_cache.put_file_key(cache_key, self.app_id, file_key, duration)
+    
+    def _prepare_segment(self, segment: str, voice: str, index: int = 1) -> dict:
+        """
+        处理单段文本：合成 → 转码 → 时长 → 上传
+        
+        全程在内存中传递音频字节，不经过临时文件。
+        启用缓存时，已上传过的段落直接复用 file_key，已合成过的段落跳过合成和转码。
+        各步骤拆为独立方法，AsyncFeishuVoice 复用这些步骤，只替换其中的等待点。
+        
+        Args:
+            segment: 段落文本
+            voice: 音色
+            index: 段落序号（用于调试文件命名）
             
-            # 如果当前句子本身超过限制，需要进一步分割
-            if len(sentence) > max_chars:
-                # 先保存当前积累的段落
-                if current_segment:
-                    segments.append(current_segment.strip())
-                    current_segment = ""
+        Returns:
+            {'file_key', 'duration', 'timings'}，timings 为各阶段耗时（秒）
+        """
+        timings = {}
+        
+        cache_key, uploaded, audio = self._lookup_cache(segment, voice, index, timings)
+        if uploaded:
+            file_key, duration = uploaded
+            return {'file_key': file_key, 'duration': duration, 'timings': timings}
+        
+        if audio:
+            opus_data, duration = audio
+        else:
+            if self.stream_tts:
+                # 1+2. 流式合成并同时转码
+                synthesized = {'voice': voice}
+                opus_data = self._synthesize_streaming(segment, voice, index, timings, synthesized)
+            else:
+                # 1. 生成 TTS
+                with self.metrics.span('feishu_voice.tts', timings, segment=index,
+                                       chars=len(segment)) as span:
+                    synthesized = self.tts_api.tts_result(segment, voice)
+                    mp3_data = self._synthesized_mp3(synthesized, span, index)
                 
-                # 按逗号、顿号分割长句
-                sub_sentences = re.split(r'([，、])', sentence)
-                j = 0
-                while j < len(sub_sentences):
-                    part = sub_sentences[j]
-                    if j + 1 < len(sub_sentences) and sub_sentences[j + 1] in '，、':
-                        part += sub_sentences[j + 1]
-                        j += 1
-                    
-                    part = part.strip()
-                    j += 1
-                    
-                    if not part:
-                        continue
-                    
-                    # 如果分段后还是太长，强制截断
-                    if len(part) > max_chars:
-                        for k in range(0, len(part), max_chars):
-                            segments.append(part[k:k + max_chars])
-                    else:
-                        segments.append(part)
+                # 2. 转换为 OPUS
+                with self.metrics.span('feishu_voice.convert', timings, segment=index,
+                                       input_bytes=len(mp3_data)) as span:
+                    opus_data = self.transcoder.transcode(mp3_data)
+                    span.set(bytes=len(opus_data))
             
-            # 如果加入当前句子后超过限制，先保存当前段落
-            elif len(current_segment) + len(sentence) > max_chars:
-                if current_segment:
-                    segments.append(current_segment.strip())
-                current_segment = sentence
-            else:
-                current_segment += sentence
+            # 3. 获取音频时长
+            cache_key, duration = self._finish_synthesis(segment, synthesized, cache_key,
+                                                         opus_data, index, timings)
+        
+        # 4. 上传文件
+        with self.metrics.span('feishu_voice.upload', timings, segment=index,
+                               bytes=len(opus_data), audio_ms=duration) as span:
+            file_key = self.rate_limiter.call('upload', self._call_with_token, self._upload_file,
+                                              opus_data, duration, timings=timings)
+            span.set(wait_seconds=timings['upload_wait'])
+        
+        self._store_file_key(cache_key, file_key, duration)
+        return {'file_key': file_key, 'duration': duration, 'timings': timings}
+    
+    @staticmethod
+    def _format_timings(timings: dict) -> str:
+        """格式化阶段耗时，如 tts=1.20s convert=0.05s ..."""
+        return ' '.join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items())
+    
+    def _segment_text(self, text: str, voice: str, auto_split: bool,
+                      max_segment_chars: Optional[int] = None,
+                      max_segment_seconds: Optional[float] = None) -> List[str]:
+        """
+        按需分段并输出分段信息
         
-        # 保存最后一段
-        if current_segment:
-            segments.append(current_segment.strip())
+        指定 max_segment_chars 时按字符数分段，否则按预估时长分段。
+        """
+        if not auto_split:
+            return [text]
+        if max_segment_chars:
+            segments = self._split_text(text, max_segment_chars)
+        else:
+            _, resolved_voice = self.tts_api.resolve_voice(voice)
+            segments = self._split_text_by_duration(
+                text, resolved_voice, max_segment_seconds or self.DEFAULT_SEGMENT_SECONDS)
         
-        return [s for s in segments if s]
-
+        if len(segments) > 1:
+            self.metrics.event('feishu_voice.segmented', f"文本已分段: {len(segments)} 段",
+                               segments=len(segments), chars=len(text))
+            for i, seg in enumerate(segments, 1):
+                self.metrics.event('feishu_voice.segment',
+                                   f"  段{i}: {seg[:40]}{'...' if len(seg) > 40 else ''}",
+                                   segment=i, chars=len(seg))
+        return segments or [text]
+    
+    def _save_speech_rates(self):
+        """保存语速校准数据（失败不影响发送）"""
+        try:
+            self.speech_rates.save()
+        except OSError as e:
+            print(f"Warning: Failed to save speech rates: {e}")
+    
     def send_voice(self, text: str, voice: Optional[str] = None, 
                    target_user: Optional[str] = None, 
                    auto_split: bool = True,
-                   max_segment_chars: int = 120) -> List[dict]:
+                   max_segment_chars: Optional[int] = None,
+                   pipeline: bool = True,
+                   max_workers: Optional[int] = None,
+                   max_segment_seconds: Optional[float] = None,
+                   receive_id_type: str = 'open_id') -> List[dict]:
         """
         发送语音消息到飞书（完整流程）
         
+        流水线模式下，各段的合成、转码、上传并发进行（最多 max_workers 段同时处理），
+        发送消息仍严格按段落顺序进行，保证聊天中语音条顺序正确。
+        
         Args:
             text: 要发送的文字
             voice: 音色，默认使用 DEFAULT_VOICE
-            target_user: 目标用户 open_id
+            target_user: 接收者 ID（默认为 open_id）
             auto_split: 是否自动分段长文本
-            max_segment_chars: 每段最大字符数（建议60-100，对应约15-25秒语音）
+            max_segment_chars: 每段最大字符数，指定时按字符数分段
+            max_segment_seconds: 每段最大预估时长（秒），默认 DEFAULT_SEGMENT_SECONDS
+            pipeline: 是否启用流水线并发处理
+            max_workers: 流水线最大并发段数，默认 DEFAULT_MAX_WORKERS
+            receive_id_type: 接收者 ID 类型，如 chat_id 表示发送到群聊
             
         Returns:
             发送结果列表，每个元素包含 message_id
         """
         voice = voice or self.DEFAULT_VOICE
-        
-        # 判断是否需要分段
-        if auto_split and len(text) > max_segment_chars:
-            segments = self._split_text(text, max_segment_chars)
-            print(f"文本已分段: {len(segments)} 段")
-            for i, seg in enumerate(segments, 1):
-                print(f"  段{i}: {seg[:40]}{'...' if len(seg) > 40 else ''}")
-        else:
-            segments = [text]
+        segments = self._segment_text(text, voice, auto_split, max_segment_chars,
+                                      max_segment_seconds)
         
         results = []
-        token = None
-        
-        for i, segment in enumerate(segments, 1):
+        self.last_timings = []
+        
+        # 预取 Token（命中缓存时无网络请求）
+        token_timings = {}
+        with self.metrics.span('feishu_voice.token', token_timings):
+            self._get_tenant_access_token()
+        
+        def _send(i: int, prepared: dict):
+            timings = dict(prepared['timings'])
+            with self.metrics.span('feishu_voice.send', timings, segment=i,
+                                   audio_ms=prepared['duration']) as span:
+                # 限频时原地退避重试，后续段落等待本段发送成功，顺序不变
+                result = self.rate_limiter.call('message', self._call_with_token,
+                                                self._send_voice_message, prepared['file_key'], 
+                                                prepared['duration'], target_user, receive_id_type,
+                                                receiver=target_user or self.target_user,
+                                                timings=timings)
+                span.set(wait_seconds=timings['message_wait'])
+            if i == 1:
+                timings.update(token_timings)
+            self.last_timings.append(timings)
+            results.append(result)
+            
             if len(segments) > 1:
-                print(f"\n发送第 {i}/{len(segments)} 段...")
+                self.metrics.event('feishu_voice.sent',
+                                   f"  ✅ 第 {i}/{len(segments)} 段发送成功 ({self._format_timings(timings)})",
+                                   segment=i, segments=len(segments))
+        
+        with self.metrics.span('feishu_voice.send_voice', segments=len(segments), chars=len(text),
+                               pipeline=pipeline and len(segments) > 1):
+            if not pipeline or len(segments) == 1:
+                for i, segment in enumerate(segments, 1):
+                    if len(segments) > 1:
+                        self.metrics.event('feishu_voice.sending', f"\n发送第 {i}/{len(segments)} 段...",
+                                           segment=i, segments=len(segments))
+                    _send(i, self._prepare_segment(segment, voice, i))
+            else:
+                workers = max(1, max_workers or self.DEFAULT_MAX_WORKERS)
+                self.metrics.event('feishu_voice.pipeline', f"\n流水线处理 {len(segments)} 段（并发 {workers}）...",
+                                   segments=len(segments), workers=workers)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(self._prepare_segment, segment, voice, i)
+                               for i, segment in enumerate(segments, 1)]
+                    try:
+                        # 按段落顺序等待并发送，后续段落在此期间继续处理
+                        for i, future in enumerate(futures, 1):
+                            _send(i, future.result())
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+        
+        self._save_speech_rates()
+        return results if len(results) > 1 else results[0]
+    
+    def broadcast_voice(self, text: str, receive_ids: List[str],
+                        receive_id_type: str = 'open_id',
+                        voice: Optional[str] = None,
+                        auto_split: bool = True,
+                        max_segment_chars: Optional[int] = None,
+                        max_segment_seconds: Optional[float] = None,
+                        max_workers: Optional[int] = None,
+                        send_workers: Optional[int] = None) -> List[dict]:
+        """
+        同一段语音群发给多个接收者
+        
+        每段只合成、转码、上传一次，所有接收者复用同一个 file_key；
+        各接收者并发发送，同一接收者内按段落顺序发送。单个接收者失败不影响其他接收者。
+        
+        Args:
+            text: 要发送的文字
+            receive_ids: 接收者 ID 列表（重复的只发送一次）
+            receive_id_type: 接收者 ID 类型（open_id / union_id / user_id / email / chat_id）
+            voice: 音色，默认使用 DEFAULT_VOICE
+            auto_split: 是否自动分段长文本
+            max_segment_chars: 每段最大字符数，指定时按字符数分段
+            max_segment_seconds: 每段最大预估时长（秒），默认 DEFAULT_SEGMENT_SECONDS
+            max_workers: 同时处理（合成/转码/上传）的最大段数，默认 DEFAULT_MAX_WORKERS
+            send_workers: 同时发送的接收者数，默认 DEFAULT_BROADCAST_WORKERS
             
-            # 创建临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 1. 生成 TTS
-                mp3_path = os.path.join(temp_dir, 'voice.mp3')
-                self.tts_api.tts(segment, mp3_path, voice)
-                
-                # 2. 获取音频时长
-                duration = self._get_audio_duration(mp3_path)
-                
-                # 3. 转换为 OPUS
-                opus_path = os.path.join(temp_dir, 'voice.opus')
-                self._convert_mp3_to_opus(mp3_path, opus_path)
-                
-                # 4. 获取 Token（只获取一次）
-                if token is None:
-                    token = self._get_tenant_access_token()
-                
-                # 5. 上传文件
-                file_key = self._upload_file(token, opus_path, duration)
-                
-                # 6. 发送消息
-                result = self._send_voice_message(token, file_key, duration, target_user)
-                results.append(result)
-                
-                if len(segments) > 1:
-                    print(f"  ✅ 第 {i} 段发送成功")
+        Returns:
+            与 receive_ids（去重后）顺序一致的结果，每项为
+                {'receive_id', 'messages': 各段发送结果, 'error': 错误信息或 None}
+        """
+        if receive_id_type not in self.RECEIVE_ID_TYPES:
+            raise ValueError(f"Unsupported receive_id_type: {receive_id_type}")
+        receive_ids = list(dict.fromkeys(receive_ids))
+        if not receive_ids:
+            return []
         
-        return results if len(results) > 1 else results[0]
+        voice = voice or self.DEFAULT_VOICE
+        segments = self._segment_text(text, voice, auto_split, max_segment_chars,
+                                      max_segment_seconds)
+        results = [{'receive_id': receive_id, 'messages': [], 'error': None}
+                   for receive_id in receive_ids]
+        
+        def _send_all(result: dict, futures):
+            try:
+                for i, future in enumerate(futures, 1):
+                    prepared = future.result()
+                    timings = {}
+                    with self.metrics.span('feishu_voice.send', timings, segment=i,
+                                           audio_ms=prepared['duration'], broadcast=True) as span:
+                        result['messages'].append(self.rate_limiter.call(
+                            'message', self._call_with_token, self._send_voice_message,
+                            prepared['file_key'], prepared['duration'], result['receive_id'],
+                            receive_id_type, receiver=result['receive_id'], timings=timings))
+                        span.set(wait_seconds=timings['message_wait'])
+            except Exception as e:
+                result['error'] = str(e)
+        
+        workers = max(1, max_workers or self.DEFAULT_MAX_WORKERS)
+        send_workers = max(1, min(len(receive_ids), send_workers or self.DEFAULT_BROADCAST_WORKERS))
+        self.metrics.event('feishu_voice.broadcast',
+                           f"\n群发 {len(segments)} 段给 {len(receive_ids)} 个接收者（并发 {send_workers}）...",
+                           segments=len(segments), receivers=len(receive_ids))
+        
+        with self.metrics.span('feishu_voice.broadcast', segments=len(segments), chars=len(text),
+                               receivers=len(receive_ids)) as span:
+            with ThreadPoolExecutor(max_workers=workers) as prepare_executor, \
+                    ThreadPoolExecutor(max_workers=send_workers) as send_executor:
+                # 各段处理完成即开始向所有接收者发送，后续段落在此期间继续处理
+                futures = [prepare_executor.submit(self._prepare_segment, segment, voice, i)
+                           for i, segment in enumerate(segments, 1)]
+                try:
+                    for result in results:
+                        send_executor.submit(_send_all, result, futures)
+                except BaseException:
+                    # 中断时不再处理尚未开始的段落
+                    for future in futures:
+                        future.cancel()
+                    raise
+                finally:
+                    send_executor.shutdown(wait=True)
+                    # 已取消的 future 调用 exception() 会抛出 CancelledError，先排除
+                    self.last_timings = [future.result()['timings'] for future in futures
+                                         if future.done() and not future.cancelled()
+                                         and not future.exception()]
+            failed = sum(1 for result in results if result['error'])
+            span.set(failed=failed)
+        
+        self.metrics.event('feishu_voice.broadcast_done',
+                           f"  ✅ 群发完成: 成功 {len(results) - failed}，失败 {failed}",
+                           receivers=len(results), failed=failed)
+        self._save_speech_rates()
+        return results
 
 
 def main():
@@ -449,19 +769,83 @@ def main():
     parser = argparse.ArgumentParser(description='发送语音消息到飞书')
     parser.add_argument('text', help='要发送的文字')
     parser.add_argument('--voice', '-v', default='zh-CN-XiaoyiNeural', help='音色')
-    parser.add_argument('--user', '-u', help='目标用户 open_id')
+    parser.add_argument('--user', '-u', help='接收者 ID（默认为 open_id）')
+    parser.add_argument('--broadcast', help='群发：逗号分隔的多个接收者 ID，语音只合成上传一次')
+    parser.add_argument('--id-type', choices=FeishuVoice.RECEIVE_ID_TYPES, default='open_id',
+                        help='接收者 ID 类型（默认 open_id，发送到群聊用 chat_id）')
     parser.add_argument('--no-split', action='store_true', help='禁用自动分段')
-    parser.add_argument('--max-chars', type=int, default=80, help='每段最大字符数（默认80）')
+    parser.add_argument('--max-seconds', type=float, default=FeishuVoice.DEFAULT_SEGMENT_SECONDS,
+                        help=f'每段最大预估时长（默认{FeishuVoice.DEFAULT_SEGMENT_SECONDS:g}秒）')
+    parser.add_argument('--max-chars', type=int, default=None, help='按字符数分段，每段最大字符数')
+    parser.add_argument('--transcode-workers', type=int, default=None, help='并发转码数（默认 CPU 核心数）')
+    parser.add_argument('--stream', action='store_true', help='流式合成，边合成边转码')
+    parser.add_argument('--debug-dir', help='调试目录，保存每段的 MP3/OPUS 中间文件')
+    parser.add_argument('--no-cache', action='store_true', help='禁用合成音频与 file_key 缓存')
+    parser.add_argument('--cache-stats', action='store_true', help='发送后输出缓存命中统计')
+    parser.add_argument('--rate-stats', action='store_true', help='发送后输出限频排队统计')
+    parser.add_argument('--sequential', action='store_true', help='禁用流水线，逐段串行处理')
+    parser.add_argument('--workers', type=int, default=FeishuVoice.DEFAULT_MAX_WORKERS,
+                        help=f'流水线最大并发段数（默认{FeishuVoice.DEFAULT_MAX_WORKERS}）')
+    parser.add_argument('--enqueue', action='store_true',
+                        help='只写入持久化发送队列并立即返回任务 ID，由 voice_queue.py worker 发送')
+    parser.add_argument('--lane', choices=['interactive', 'bulk'], default='interactive',
+                        help='入队时的优先级通道（默认 interactive）')
+    parser.add_argument('--metrics', help='指标输出，如 jsonl:metrics.jsonl,prom:openclaw.prom（默认读取 OPENCLAW_METRICS）')
     
     args = parser.parse_args()
     
-    sender = FeishuVoice()
+    if args.enqueue:
+        from voice_queue import VoiceJobQueue
+        
+        job_id = VoiceJobQueue().enqueue(
+            args.text, args.user, args.id_type, args.voice, args.lane,
+            auto_split=not args.no_split,
+            max_segment_chars=args.max_chars,
+            max_segment_seconds=args.max_seconds
+        )
+        print(f"✅ 已入队，任务 ID: {job_id}")
+        return
+    
+    # 命令行下进度信息输出到终端
+    metrics = get_metrics()
+    metrics.add_sink(ConsoleSink())
+    if args.metrics:
+        for sink in sinks_from_spec(args.metrics):
+            metrics.add_sink(sink)
+    
+    sender = FeishuVoice(use_cache=not args.no_cache, transcode_workers=args.transcode_workers,
+                         debug_dir=args.debug_dir, stream_tts=args.stream, metrics=metrics)
+    
+    if args.broadcast:
+        results = sender.broadcast_voice(
+            args.text,
+            [receive_id.strip() for receive_id in args.broadcast.split(',') if receive_id.strip()],
+            receive_id_type=args.id_type,
+            voice=args.voice,
+            auto_split=not args.no_split,
+            max_segment_chars=args.max_chars,
+            max_segment_seconds=args.max_seconds,
+            max_workers=args.workers
+        )
+        for result in results:
+            if result['error']:
+                print(f"   ❌ {result['receive_id']}: {result['error']}")
+            else:
+                print(f"   ✅ {result['receive_id']}: {len(result['messages'])} 条")
+        if any(result['error'] for result in results):
+            sys.exit(1)
+        return
+    
     results = sender.send_voice(
         args.text, 
         args.voice, 
         args.user,
         auto_split=not args.no_split,
-        max_segment_chars=args.max_chars
+        max_segment_chars=args.max_chars,
+        max_segment_seconds=args.max_seconds,
+        pipeline=not args.sequential,
+        max_workers=args.workers,
+        receive_id_type=args.id_type
     )
     
     if isinstance(results, list):
@@ -472,6 +856,12 @@ def main():
         print(f"\n✅ Voice message sent!")
         print(f"   Message ID: {results['message_id']}")
         print(f"   Chat ID: {results['chat_id']}")
+    
+    if args.cache_stats and sender.voice_cache is not None:
+        print(f"\n缓存统计: {json.dumps(sender.voice_cache.stats(), ensure_ascii=False)}")
+    
+    if args.rate_stats:
+        print(f"\n限频统计: {json.dumps(sender.rate_limiter.stats(), ensure_ascii=False)}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Multipart - 流式 multipart/form-data 编码器
+
+表单字段与文件内容按块依次产出，预先计算 Content-Length，
+上传时不需要拼接出整个请求体，音频数据不会被整体复制。
+文件内容可以是 bytes / memoryview、文件路径、文件对象或字节块迭代器。
+实际产出的文件字节数与声明的长度不一致时（如文件在上传过程中被截断）抛出
+ContentLengthError，避免请求体短于 Content-Length 导致连接挂起或上传内容损坏。
+"""
+
+import os
+import io
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+
+FileContent = Union[bytes, bytearray, memoryview, str, os.PathLike, io.IOBase, Iterable[bytes]]
+
+# 读取文件对象 / 切分 memoryview 的块大小
+CHUNK_SIZE = 64 * 1024
+
+
+class ContentLengthError(Exception):
+    """文件内容的实际长度与声明的长度不一致"""
+
+
+def _content_length(content: FileContent) -> Optional[int]:
+    """推算文件内容长度，迭代器等未知长度时返回 None"""
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        return memoryview(content).nbytes
+    if isinstance(content, (str, os.PathLike)):
+        return os.path.getsize(content)
+    if hasattr(content, 'read'):
+        try:
+            return os.fstat(content.fileno()).st_size - content.tell()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+        if hasattr(content, 'seek') and hasattr(content, 'tell'):
+            pos = content.tell()
+            end = content.seek(0, io.SEEK_END)
+            content.seek(pos)
+            return end - pos
+    return None
+
+
+class MultipartEncoder:
+    """可迭代的 multipart/form-data 请求体"""
+
+    def __init__(self, fields: List[Tuple[str, str]], file_field: str, file_name: str,
+                 content: FileContent, content_type: str = 'application/octet-stream',
+                 length: Optional[int] = None, boundary: Optional[str] = None):
+        """
+        Args:
+            fields: 普通表单字段 [(name, value), ...]
+            file_field: 文件字段名
+            file_name: 文件名
+            content: 文件内容（bytes / memoryview、文件路径、文件对象或字节块迭代器）
+            content_type: 文件的 Content-Type
+            length: 文件内容长度，迭代器必须提供
+            boundary: 分隔符，默认随机生成
+        """
+        self.boundary = boundary or '----FormBoundary' + os.urandom(8).hex()
+        self.content = content
+
+        self.file_length = length if length is not None else _content_length(content)
+        if self.file_length is None:
+            raise ValueError("Content length is required for iterator file content")
+
+        head = []
+        for name, value in fields:
+            head.append(f'--{self.boundary}\r\n'
+                        f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                        f'{value}\r\n')
+        head.append(f'--{self.boundary}\r\n'
+                    f'Content-Disposition: form-data; name="{file_field}"; filename="{file_name}"\r\n'
+                    f'Content-Type: {content_type}\r\n\r\n')
+        self._head = ''.join(head).encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+
+        # 文件对象记录起始位置，便于连接失效时重放
+        self._start = content.tell() if hasattr(content, 'read') and hasattr(content, 'tell') else None
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    @property
+    def content_length(self) -> int:
+        return len(self._head) + self.file_length + len(self._tail)
+
+    @property
+    def replayable(self) -> bool:
+        """请求体能否再次完整产出（连接失效重试时使用）"""
+        return isinstance(self.content, (bytes, bytearray, memoryview, str, os.PathLike)) or (
+            self._start is not None and hasattr(self.content, 'seek'))
+
+    def headers(self) -> dict:
+        return {'Content-Type': self.content_type, 'Content-Length': str(self.content_length)}
+
+    def _read_file(self, f) -> Iterator[bytes]:
+        remaining = self.file_length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    def _iter_source(self) -> Iterator[bytes]:
+        content = self.content
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            view = memoryview(content).cast('B')
+            for i in range(0, len(view), CHUNK_SIZE):
+                yield view[i:i + CHUNK_SIZE]
+        elif isinstance(content, (str, os.PathLike)):
+            with open(content, 'rb') as f:
+                yield from self._read_file(f)
+        elif hasattr(content, 'read'):
+            if self._start is not None and hasattr(content, 'seek'):
+                content.seek(self._start)
+            yield from self._read_file(content)
+        else:
+            yield from content
+
+    def _iter_content(self) -> Iterator[bytes]:
+        """产出文件内容，并校验总长度与声明的一致"""
+        produced = 0
+        for chunk in self._iter_source():
+            produced += memoryview(chunk).nbytes
+            if produced > self.file_length:
+                raise ContentLengthError(
+                    f"File content exceeds declared length {self.file_length}")
+            yield chunk
+        if produced != self.file_length:
+            raise ContentLengthError(
+                f"File content ended after {produced} of {self.file_length} bytes")
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        yield from self._iter_content()
+        yield self._tail
+
+    def to_bytes(self) -> bytes:
+        """一次性生成完整请求体（仅用于调试）"""
+        return b''.join(bytes(chunk) for chunk in self)
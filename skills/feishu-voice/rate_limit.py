@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Rate Limit - 飞书接口限频调度
+
+在上传文件、发送消息等飞书请求之前排队取令牌，避免突发回复触发应用频率限制：
+1. 每个接口一个令牌桶（飞书按应用限频，默认 1000 次/分钟、突发 50 次）
+2. 每个接收者一个令牌桶（向同一用户/群发送消息默认 5 QPS）
+3. 识别限频响应（HTTP 429 / 限频错误码），按带抖动的指数退避重试，
+   同时暂停对应令牌桶，其他请求不再继续撞限
+4. 重试在调用处原地进行，调用方按段落顺序发送时顺序不变
+5. 记录排队等待时间与限频次数
+
+令牌桶为进程内状态；多个进程同时发送时按各自份额调低速率（FEISHU_RATE_* 环境变量）。
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from feishu_http import FeishuAPIError
+
+
+# 飞书限频错误码：99991400 接口频率超限，230020 / 11232 发送消息频率超限
+RATE_LIMIT_CODES = {99991400, 230020, 11232}
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """是否为限频响应"""
+    return isinstance(error, FeishuAPIError) and (
+        error.code in RATE_LIMIT_CODES or error.status == 429)
+
+
+class TokenBucket:
+    """令牌桶（线程安全），按预约方式取令牌，先预约的先放行"""
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数（令牌可透支，等待期间后来者继续排在后面）"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._paused_until)
+            if start > self._updated:
+                self._tokens = min(self.burst, self._tokens + (start - self._updated) * self.rate)
+                self._updated = start
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return start - now
+            return start - now + (-self._tokens) / self.rate
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（收到限频响应后让桶内令牌清空并冷却）"""
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._paused_until:
+                self._paused_until = until
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = max(self._updated, until)
+
+
+class FeishuRateLimiter:
+    """飞书接口调度器：按接口与接收者限速，限频时退避重试"""
+
+    # 各接口默认速率（次/秒）与突发容量
+    DEFAULT_ENDPOINT_RATE = 1000 / 60
+    DEFAULT_ENDPOINT_BURST = 50
+
+    # 同一接收者的默认速率（次/秒）
+    DEFAULT_RECEIVER_RATE = 5.0
+
+    DEFAULT_MAX_RETRIES = 5
+    BASE_DELAY = 0.5
+    MAX_DELAY = 30.0
+
+    # 最多保留的接收者令牌桶数量（最久未用的先淘汰）
+    MAX_RECEIVERS = 4096
+
+    def __init__(self, endpoint_rate: Optional[float] = None,
+                 endpoint_burst: Optional[float] = None,
+                 receiver_rate: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 endpoint_rates: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            endpoint_rate: 每个接口的速率（次/秒），默认读取 FEISHU_RATE_ENDPOINT
+            endpoint_burst: 每个接口的突发容量，默认读取 FEISHU_RATE_BURST
+            receiver_rate: 同一接收者的速率（次/秒），默认读取 FEISHU_RATE_RECEIVER
+            max_retries: 限频时的最大重试次数，默认读取 FEISHU_RATE_RETRIES
+            endpoint_rates: 按接口覆盖速率，如 {'upload': 5}
+        """
+        self.endpoint_rate = endpoint_rate or float(
+            os.getenv('FEISHU_RATE_ENDPOINT', self.DEFAULT_ENDPOINT_RATE))
+        self.endpoint_burst = endpoint_burst or float(
+            os.getenv('FEISHU_RATE_BURST', self.DEFAULT_ENDPOINT_BURST))
+        self.receiver_rate = receiver_rate or float(
+            os.getenv('FEISHU_RATE_RECEIVER', self.DEFAULT_RECEIVER_RATE))
+        self.max_retries = max_retries if max_retries is not None else int(
+            os.getenv('FEISHU_RATE_RETRIES', self.DEFAULT_MAX_RETRIES))
+        self.endpoint_rates = dict(endpoint_rates or {})
+
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, TokenBucket] = {}
+        self._receivers: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._stats = {'requests': 0, 'delayed': 0, 'rate_limited': 0, 'retries': 0,
+                       'failed': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+    def _endpoint_bucket(self, endpoint: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._endpoints.get(endpoint)
+            if bucket is None:
+                rate = self.endpoint_rates.get(endpoint, self.endpoint_rate)
+                bucket = self._endpoints[endpoint] = TokenBucket(rate, self.endpoint_burst)
+            return bucket
+
+    def _receiver_bucket(self, receiver: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._receivers.get(receiver)
+            if bucket is None:
+                bucket = self._receivers[receiver] = TokenBucket(self.receiver_rate,
+                                                                 self.receiver_rate)
+                while len(self._receivers) > self.MAX_RECEIVERS:
+                    self._receivers.popitem(last=False)
+            else:
+                self._receivers.move_to_end(receiver)
+            return bucket
+
+    def _buckets(self, endpoint: str, receiver: Optional[str]) -> Tuple[TokenBucket, ...]:
+        if receiver:
+            return self._endpoint_bucket(endpoint), self._receiver_bucket(receiver)
+        return (self._endpoint_bucket(endpoint),)
+
+    def _reserve(self, buckets) -> float:
+        """在所有相关令牌桶上预约，返回需要等待的秒数"""
+        wait = max(bucket.reserve() for bucket in buckets)
+        with self._lock:
+            self._stats['requests'] += 1
+            if wait > 0:
+                self._stats['delayed'] += 1
+                self._stats['wait_seconds'] += wait
+                self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], wait)
+        return wait
+
+    def _backoff(self, attempt: int, buckets) -> float:
+        """限频后的退避时间（带全抖动的指数退避），并暂停相关令牌桶"""
+        delay = min(self.MAX_DELAY, self.BASE_DELAY * (2 ** attempt))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        for bucket in buckets:
+            bucket.pause(delay)
+        with self._lock:
+            self._stats['rate_limited'] += 1
+            self._stats['retries'] += 1
+        return delay
+
+    def _give_up(self):
+        with self._lock:
+            self._stats['rate_limited'] += 1
+            self._stats['failed'] += 1
+
+    def call(self, endpoint: str, func, *args, receiver: Optional[str] = None,
+             timings: Optional[dict] = None, **kwargs):
+        """
+        限速调用飞书接口，限频时退避重试
+
+        Args:
+            endpoint: 接口名（如 upload / message），每个接口一个令牌桶
+            func: 实际调用
+            receiver: 接收者 ID，指定时同时受接收者令牌桶限制
+            timings: 若提供，把排队与退避等待时间累加到 timings[f'{endpoint}_wait']
+
+        Returns:
+            func 的返回值
+        """
+        buckets = self._buckets(endpoint, receiver)
+        waited = 0.0
+        try:
+            for attempt in range(self.max_retries + 1):
+                wait = self._reserve(buckets)
+                if wait > 0:
+                    time.sleep(wait)
+                    waited += wait
+                try:
+                    return func(*args, **kwargs)
+                except FeishuAPIError as e:
+                    if not is_rate_limited(e) or attempt >= self.max_retries:
+                        if is_rate_limited(e):
+                            self._give_up()
+                        raise
+                    delay = self._backoff(attempt, buckets)
+                    time.sleep(delay)
+                    waited += delay
+        finally:
+            if timings is not None:
+                key = f'{endpoint}_wait'
+                timings[key] = timings.get(key, 0.0) + waited
+
+    async def acall(self, endpoint: str, func, *args, receiver: Optional[str] = None,
+                    timings: Optional[dict] = None, **kwargs):
+        """协程版 call，func 为协程函数，等待期间不阻塞事件循环"""
+        buckets = self._buckets(endpoint, receiver)
+        waited = 0.0
+        try:
+            for attempt in range(self.max_retries + 1):
+                wait = self._reserve(buckets)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    waited += wait
+                try:
+                    return await func(*args, **kwargs)
+                except FeishuAPIError as e:
+                    if not is_rate_limited(e) or attempt >= self.max_retries:
+                        if is_rate_limited(e):
+                            self._give_up()
+                        raise
+                    delay = self._backoff(attempt, buckets)
+                    await asyncio.sleep(delay)
+                    waited += delay
+        finally:
+            if timings is not None:
+                key = f'{endpoint}_wait'
+                timings[key] = timings.get(key, 0.0) + waited
+
+    def stats(self) -> dict:
+        """请求数、被延迟次数、限频次数、排队等待总时长与最长等待"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_wait_seconds'] = stats['wait_seconds'] / stats['requests'] if stats['requests'] else 0.0
+        return stats
+
+
+_default_limiter: Optional[FeishuRateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_limiter() -> FeishuRateLimiter:
+    """进程内共享的调度器（飞书按应用限频，同一进程内的发送器共用令牌桶）"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = FeishuRateLimiter()
+        return _default_limiter
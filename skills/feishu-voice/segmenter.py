@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Segmenter - 按预估朗读时长分段
+
+1. SpeechRateModel：按音色记录语速（朗读单位/秒），由历史合成结果校准并持久化
+2. DurationSegmenter：单遍扫描文本，以预估秒数为预算，尽量把段落装满到预算附近，
+   优先在句末切分，其次逗号等分句处，再次空白处，最后才硬切
+
+朗读单位：汉字记 1，英文字母、数字、标点按大致发音时长折算。
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional
+
+
+SENTENCE_ENDS = frozenset('。！？；!?;')
+CLAUSE_BREAKS = frozenset('，、：,:')
+
+DEFAULT_RATES_PATH = Path.home() / '.openclaw' / 'feishu_voice_rates.json'
+
+
+def speech_units(ch: str) -> float:
+    """单个字符的朗读单位"""
+    if '一' <= ch <= '鿿' or '㐀' <= ch <= '䶿':
+        return 1.0
+    if ch in SENTENCE_ENDS:
+        return 0.8
+    if ch in CLAUSE_BREAKS:
+        return 0.4
+    if ch.isdigit():
+        return 0.5
+    if ch.isascii() and ch.isalpha():
+        return 0.3
+    if ch.isspace():
+        return 0.1
+    return 0.2
+
+
+def char_units(ch: str) -> float:
+    """按字符数计预算（兼容 max_chars）"""
+    return 1.0
+
+
+class SpeechRateModel:
+    """按音色的语速模型（朗读单位/秒）"""
+
+    # 未校准音色的默认语速
+    DEFAULT_RATE = 4.5
+
+    # 新观测值的权重（指数滑动平均）
+    ALPHA = 0.2
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: 语速数据文件，默认读取 FEISHU_VOICE_RATES，否则 ~/.openclaw/feishu_voice_rates.json
+        """
+        self.path = Path(path or os.getenv('FEISHU_VOICE_RATES') or DEFAULT_RATES_PATH)
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._rates = {k: float(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            self._rates = {}
+
+    def rate(self, voice: str) -> float:
+        """音色语速（朗读单位/秒）"""
+        return self._rates.get(voice, self.DEFAULT_RATE)
+
+    def estimate_seconds(self, text: str, voice: str) -> float:
+        """预估朗读时长（秒）"""
+        return sum(speech_units(ch) for ch in text) / self.rate(voice)
+
+    def record(self, voice: str, text: str, duration_ms: int):
+        """用一次实际合成结果校准语速"""
+        units = sum(speech_units(ch) for ch in text)
+        if units < 5 or duration_ms <= 0:
+            return
+        observed = units / (duration_ms / 1000)
+        with self._lock:
+            current = self._rates.get(voice)
+            self._rates[voice] = observed if current is None else \
+                current + self.ALPHA * (observed - current)
+            self._dirty = True
+
+    def save(self):
+        """写回语速数据（无更新时跳过）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            rates = dict(self._rates)
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(rates, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class DurationSegmenter:
+    """按预算单遍分段"""
+
+    # 高优先级切点至少要把段落装到预算的该比例，否则改用更靠后的低优先级切点
+    MIN_FILL = 0.5
+
+    def __init__(self, unit_func: Callable[[str], float] = speech_units):
+        """
+        Args:
+            unit_func: 单字符代价函数，默认按朗读单位；传 char_units 则按字符数
+        """
+        self.unit_func = unit_func
+
+    def split(self, text: str, budget: float) -> List[str]:
+        """
+        分段，每段代价不超过 budget（单个不可分割字符除外）
+
+        Args:
+            text: 原始文本
+            budget: 每段预算（与 unit_func 同单位）
+
+        Returns:
+            分段后的文本列表
+        """
+        unit = self.unit_func
+        segments = []
+        start = 0
+        used = 0.0
+        # 各级候选切点：(切分位置, 切点前已用预算)
+        sentence = clause = space = None
+
+        for i, ch in enumerate(text):
+            cost = unit(ch)
+            # 切分后带入新段落的剩余部分加上当前字符仍可能超出预算，继续切分直到装得下
+            while used + cost > budget and i > start:
+                cut = self._choose_cut((sentence, clause, space), budget) or (i, used)
+                piece = text[start:cut[0]].strip()
+                if piece:
+                    segments.append(piece)
+                start, used = cut[0], used - cut[1]
+                # 切点之后的候选仍然有效，换算到新段落
+                sentence, clause, space = (
+                    (c[0], c[1] - cut[1]) if c and c[0] > start else None
+                    for c in (sentence, clause, space)
+                )
+
+            used += cost
+            if ch in SENTENCE_ENDS:
+                sentence = (i + 1, used)
+            elif ch in CLAUSE_BREAKS:
+                clause = (i + 1, used)
+            elif ch.isspace():
+                space = (i + 1, used)
+
+        piece = text[start:].strip()
+        if piece:
+            segments.append(piece)
+        return segments
+
+    def _choose_cut(self, candidates, budget: float):
+        """按优先级选择切点；都装不满 MIN_FILL 时取最靠后的候选"""
+        for candidate in candidates:
+            if candidate and candidate[1] >= budget * self.MIN_FILL:
+                return candidate
+        available = [c for c in candidates if c]
+        return max(available) if available else None
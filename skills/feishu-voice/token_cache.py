@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tenant Access Token 缓存
+
+按 app_id 缓存飞书 tenant_access_token，遵循接口返回的 expire 字段：
+1. 进程内缓存 + ~/.openclaw 下的加锁文件，多个 feishu_voice.py 进程共享
+2. 过期前后台提前刷新，热路径上不再出现鉴权请求
+3. 令牌失效时由调用方 invalidate 后强制刷新
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# 表示 tenant_access_token 无效/过期的飞书错误码
+INVALID_TOKEN_CODES = {99991661, 99991663, 99991664}
+
+DEFAULT_CACHE_PATH = Path.home() / '.openclaw' / 'feishu_token_cache.json'
+
+
+@contextmanager
+def _file_lock(lock_path: Path):
+    """跨进程文件锁（POSIX 使用 flock，Windows 使用 msvcrt）"""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class TenantTokenCache:
+    """按 app_id 共享的 Tenant Access Token 缓存"""
+
+    # 距离过期不足该秒数时提前刷新（飞书在剩余 30 分钟内会返回新 token）
+    REFRESH_MARGIN = 300
+
+    def __init__(self, app_id: str, fetcher: Callable[[], Tuple[str, int]],
+                 cache_path: Optional[Path] = None, auto_refresh: bool = True):
+        """
+        Args:
+            app_id: 飞书应用 ID，作为缓存键
+            fetcher: 实际请求 token 的函数，返回 (token, expire 秒数)
+            cache_path: 共享缓存文件路径，默认 ~/.openclaw/feishu_token_cache.json
+            auto_refresh: 是否在过期前后台自动刷新
+        """
+        self.app_id = app_id
+        self.fetcher = fetcher
+        self.cache_path = Path(cache_path or os.getenv('FEISHU_TOKEN_CACHE') or DEFAULT_CACHE_PATH)
+        self.lock_path = self.cache_path.with_name(self.cache_path.name + '.lock')
+        self.auto_refresh = auto_refresh
+
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expire_at = 0.0
+        self._timer: Optional[threading.Timer] = None
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_file(self, data: dict):
+        tmp_path = self.cache_path.with_name(self.cache_path.name + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        try:
+            os.chmod(tmp_path, 0o600)
+        except OSError:
+            pass
+        os.replace(tmp_path, self.cache_path)
+
+    def _is_fresh(self, expire_at: float, margin: float = 0) -> bool:
+        return expire_at - margin > time.time()
+
+    def _refresh_locked(self, force: bool = False, stale_token: Optional[str] = None):
+        """在文件锁内刷新：若其他进程已刷新则直接采用其结果"""
+        with _file_lock(self.lock_path):
+            data = self._read_file()
+            entry = data.get(self.app_id) or {}
+            token, expire_at = entry.get('token'), entry.get('expire_at', 0)
+
+            reusable = (token and token != stale_token and
+                        self._is_fresh(expire_at, 0 if not force else self.REFRESH_MARGIN))
+            if not reusable:
+                token, expire = self.fetcher()
+                expire_at = time.time() + expire
+                data[self.app_id] = {'token': token, 'expire_at': expire_at}
+                self._write_file(data)
+
+        self._token, self._expire_at = token, expire_at
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if not self.auto_refresh:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = max(0.0, self._expire_at - self.REFRESH_MARGIN - time.time())
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                self._refresh_locked(force=True, stale_token=self._token)
+        except Exception as e:
+            print(f"Warning: Background token refresh failed: {e}")
+
+    def get(self) -> str:
+        """获取有效的 token（优先内存，其次共享文件，最后请求飞书）"""
+        with self._lock:
+            if self._token and self._is_fresh(self._expire_at, 1):
+                return self._token
+
+            entry = self._read_file().get(self.app_id) or {}
+            if entry.get('token') and self._is_fresh(entry.get('expire_at', 0), 1):
+                self._token, self._expire_at = entry['token'], entry['expire_at']
+                self._schedule_refresh()
+                return self._token
+
+            self._refresh_locked()
+            return self._token
+
+    def invalidate(self, token: str) -> str:
+        """标记 token 失效并返回新 token（其他线程/进程已刷新时直接复用）"""
+        with self._lock:
+            if self._token != token and self._token and self._is_fresh(self._expire_at, 1):
+                return self._token
+            self._refresh_locked(force=True, stale_token=token)
+            return self._token
+
+    def close(self):
+        """停止后台刷新"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
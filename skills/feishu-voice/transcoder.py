@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Transcoder - MP3 → OPUS 转码池
+
+两种后端：
+1. pyav（默认，需要安装 PyAV）：常驻工作进程内用 PyAV (libavcodec/libopus) 编码，
+   进程启动时加载一次编解码器，之后每段只做编码，不再 fork/exec
+2. ffmpeg：仅在显式指定 backend='ffmpeg' 时使用（对比基准等），每段启动一个 ffmpeg
+   子进程，通过管道读写，不落盘
+
+transcode_stream 接收流式合成的音频块，边接收边编码，使编码与合成重叠。
+
+工作进程/线程数量可配置，默认使用全部 CPU 核心。
+"""
+
+import io
+import importlib.util
+import os
+import threading
+import subprocess
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Optional
+
+# 启动时只检查 PyAV 是否安装，工作进程初始化或流式转码时才导入
+PYAV_AVAILABLE = importlib.util.find_spec('av') is not None
+
+
+def _parse_bitrate(bitrate: str) -> int:
+    """'24k' → 24000"""
+    bitrate = str(bitrate).lower()
+    if bitrate.endswith('k'):
+        return int(float(bitrate[:-1]) * 1000)
+    return int(bitrate)
+
+
+def _init_pyav_worker():
+    """工作进程初始化：预先加载编解码器"""
+    import av
+    try:
+        av.codec.Codec('libopus', 'w')
+        av.codec.Codec('mp3', 'r')
+    except Exception:
+        pass
+
+
+class _ChunkReader(io.RawIOBase):
+    """把字节块迭代器包装成只读文件对象（供 PyAV 边读边解码）"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buf = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf:
+            try:
+                self._buf = bytes(next(self._chunks))
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+def _encode_pyav(data: bytes, bitrate: str, application: str) -> bytes:
+    """在当前进程内用 PyAV 将音频字节编码为 Ogg Opus"""
+    return _encode_pyav_file(io.BytesIO(data), bitrate, application)
+
+
+def _encode_pyav_file(source, bitrate: str, application: str, input_format: Optional[str] = None) -> bytes:
+    """用 PyAV 将文件对象中的音频编码为 Ogg Opus"""
+    import av
+
+    out_buf = io.BytesIO()
+    with av.open(source, format=input_format) as inp, av.open(out_buf, mode='w', format='ogg') as out:
+        stream = out.add_stream('libopus', rate=48000, layout='mono')
+        stream.bit_rate = _parse_bitrate(bitrate)
+        stream.options = {'application': application}
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=48000)
+
+        for frame in inp.decode(audio=0):
+            frame.pts = None
+            for resampled in resampler.resample(frame):
+                for packet in stream.encode(resampled):
+                    out.mux(packet)
+        for resampled in resampler.resample(None):
+            for packet in stream.encode(resampled):
+                out.mux(packet)
+        for packet in stream.encode(None):
+            out.mux(packet)
+
+    return out_buf.getvalue()
+
+
+def _encode_ffmpeg(data: bytes, bitrate: str, application: str) -> bytes:
+    """通过管道调用 ffmpeg 编码为 Ogg Opus"""
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-i', 'pipe:0',
+        '-c:a', 'libopus',
+        '-b:a', bitrate,
+        '-application', application,
+        '-f', 'ogg', 'pipe:1'
+    ]
+    result = subprocess.run(cmd, input=data, check=True, capture_output=True)
+    return result.stdout
+
+
+def _encode_ffmpeg_stream(chunks: Iterable[bytes], bitrate: str, application: str) -> bytes:
+    """边写入音频块边由 ffmpeg 编码为 Ogg Opus"""
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-i', 'pipe:0',
+        '-c:a', 'libopus',
+        '-b:a', bitrate,
+        '-application', application,
+        '-f', 'ogg', 'pipe:1'
+    ]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    errors = []
+
+    def _feed():
+        try:
+            for chunk in chunks:
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    writer = threading.Thread(target=_feed, daemon=True)
+    writer.start()
+    output = proc.stdout.read()
+    stderr = proc.stderr.read()
+    proc.wait()
+    writer.join()
+
+    if errors:
+        raise errors[0]
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, output, stderr)
+    return output
+
+
+class OpusTranscoder:
+    """MP3 → OPUS 转码池（线程安全，可被多个段并发调用）"""
+
+    def __init__(self, workers: Optional[int] = None, bitrate: str = '24k',
+                 application: str = 'voip', backend: Optional[str] = None):
+        """
+        Args:
+            workers: 并发转码数，默认读取 FEISHU_VOICE_TRANSCODE_WORKERS，否则为 CPU 核心数
+            bitrate: OPUS 码率
+            application: libopus application 参数
+            backend: 'pyav'（默认）或 'ffmpeg'（每段启动一个 ffmpeg 进程，只用于对比）
+        """
+        self.workers = workers or int(os.getenv('FEISHU_VOICE_TRANSCODE_WORKERS', 0)) or os.cpu_count() or 1
+        self.bitrate = bitrate
+        self.application = application
+        self.backend = backend or 'pyav'
+        if self.backend not in ('pyav', 'ffmpeg'):
+            raise ValueError(f"Unknown transcoder backend: {self.backend}")
+        if self.backend == 'pyav' and not PYAV_AVAILABLE:
+            raise ImportError("PyAV 未安装，请执行 pip install av")
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        executor = self._executor
+        if executor is not None:
+            return executor
+        # 多个段并发首次转码时只创建一个工作池
+        with self._executor_lock:
+            if self._executor is None:
+                if self.backend == 'pyav':
+                    # 编码是 CPU 密集型，使用常驻进程绕开 GIL
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                         initializer=_init_pyav_worker)
+                else:
+                    # ffmpeg 子进程本身在独立核心上运行，线程只负责等待
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def submit(self, data: bytes) -> Future:
+        """提交转码任务，返回 Future（异步调用方可用 asyncio.wrap_future 等待）"""
+        encode = _encode_pyav if self.backend == 'pyav' else _encode_ffmpeg
+        return self._get_executor().submit(encode, data, self.bitrate, self.application)
+
+    def transcode(self, data: bytes) -> bytes:
+        """
+        将 MP3（或其他 ffmpeg 可识别格式）字节转码为 Ogg Opus 字节
+
+        Args:
+            data: 输入音频字节
+
+        Returns:
+            Ogg Opus 字节
+        """
+        return self.submit(data).result()
+
+    def transcode_stream(self, chunks: Iterable[bytes]) -> bytes:
+        """
+        流式转码：边接收 MP3 音频块边编码，合成结束时编码也基本完成
+
+        在调用线程中执行（块迭代器无法跨进程传递）。
+
+        Args:
+            chunks: MP3 音频块迭代器（如 TTSAPI.tts_stream 的返回值）
+
+        Returns:
+            Ogg Opus 字节
+        """
+        if self.backend == 'pyav':
+            return _encode_pyav_file(io.BufferedReader(_ChunkReader(chunks)), self.bitrate,
+                                     self.application, input_format='mp3')
+        return _encode_ffmpeg_stream(chunks, self.bitrate, self.application)
+
+    def transcode_file(self, input_path: str, output_path: str) -> str:
+        """文件到文件转码，返回输出路径"""
+        with open(input_path, 'rb') as f:
+            data = f.read()
+        with open(output_path, 'wb') as f:
+            f.write(self.transcode(data))
+        return output_path
+
+    def close(self):
+        """关闭工作进程/线程"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
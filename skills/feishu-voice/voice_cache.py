@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Voice Cache - 语音内容寻址缓存
+
+两层缓存，均以 (文本, 音色, 引擎, 模型, 编码参数) 的哈希为键：
+1. 音频层：OPUS 字节与时长，按字节预算 LRU 淘汰
+2. file_key 层：按 app_id 记录已上传到飞书的 file_key，命中时直接发送消息；
+   超过有效期的记录在读写时定期清理，与音频层的淘汰无关
+
+存储使用 SQLite，可被多个进程同时访问。
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+DEFAULT_CACHE_PATH = Path.home() / '.openclaw' / 'feishu_voice_cache.db'
+
+
+class VoiceCache:
+    """合成音频与飞书 file_key 缓存"""
+
+    # 默认字节预算 64MB
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    # file_key 有效期（秒），超期后重新上传
+    DEFAULT_FILE_KEY_TTL = 30 * 24 * 3600
+
+    # 两次清理过期 file_key 的最小间隔（秒）
+    FILE_KEY_SWEEP_INTERVAL = 60.0
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: Optional[int] = None,
+                 file_key_ttl: Optional[float] = None):
+        """
+        Args:
+            path: 缓存数据库路径，默认读取 FEISHU_VOICE_CACHE，否则 ~/.openclaw/feishu_voice_cache.db
+            max_bytes: 音频层字节预算，默认读取 FEISHU_VOICE_CACHE_MAX_BYTES
+            file_key_ttl: file_key 有效期（秒）
+        """
+        self.path = Path(path or os.getenv('FEISHU_VOICE_CACHE') or DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes or int(os.getenv('FEISHU_VOICE_CACHE_MAX_BYTES', self.DEFAULT_MAX_BYTES))
+        self.file_key_ttl = file_key_ttl or self.DEFAULT_FILE_KEY_TTL
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS audio (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                duration INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS audio_last_used ON audio (last_used);
+            CREATE TABLE IF NOT EXISTS file_keys (
+                key TEXT NOT NULL,
+                app_id TEXT NOT NULL,
+                file_key TEXT NOT NULL,
+                duration INTEGER NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (key, app_id)
+            );
+            CREATE INDEX IF NOT EXISTS file_keys_created ON file_keys (created);
+        ''')
+
+        self._stats = {'audio_hits': 0, 'audio_misses': 0,
+                       'file_key_hits': 0, 'file_key_misses': 0, 'evictions': 0,
+                       'file_key_expirations': 0}
+        self._next_sweep = 0.0
+
+    @staticmethod
+    def make_key(text: str, voice: str, engine: str, model: str, encoding: dict) -> str:
+        """生成缓存键"""
+        payload = json.dumps([text, voice, engine, model, encoding],
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_audio(self, key: str) -> Optional[Tuple[bytes, int]]:
+        """查询音频层，命中返回 (OPUS 字节, 时长毫秒)"""
+        with self._lock:
+            row = self._conn.execute('SELECT data, duration FROM audio WHERE key = ?',
+                                     (key,)).fetchone()
+            if row is None:
+                self._stats['audio_misses'] += 1
+                return None
+            self._conn.execute('UPDATE audio SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._stats['audio_hits'] += 1
+            return bytes(row[0]), row[1]
+
+    def put_audio(self, key: str, data: bytes, duration: int):
+        """写入音频层，超出字节预算时按最久未使用淘汰"""
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO audio (key, data, duration, size, last_used) '
+                    'VALUES (?, ?, ?, ?, ?)', (key, sqlite3.Binary(data), duration, size, time.time()))
+                self._evict_locked()
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def _evict_locked(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM audio').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+                'SELECT key, size FROM audio ORDER BY last_used ASC').fetchall():
+            self._conn.execute('DELETE FROM audio WHERE key = ?', (key,))
+            self._conn.execute('DELETE FROM file_keys WHERE key = ?', (key,))
+            self._stats['evictions'] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _expire_file_keys_locked(self, now: float):
+        """删除超过有效期的 file_key（音频层未淘汰的条目也不会保留过期的 file_key）"""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.FILE_KEY_SWEEP_INTERVAL
+        cursor = self._conn.execute('DELETE FROM file_keys WHERE created < ?',
+                                    (now - self.file_key_ttl,))
+        self._stats['file_key_expirations'] += max(0, cursor.rowcount)
+
+    def get_file_key(self, key: str, app_id: str) -> Optional[Tuple[str, int]]:
+        """查询 file_key 层，命中返回 (file_key, 时长毫秒)"""
+        with self._lock:
+            self._expire_file_keys_locked(time.time())
+            row = self._conn.execute(
+                'SELECT file_key, duration, created FROM file_keys WHERE key = ? AND app_id = ?',
+                (key, app_id)).fetchone()
+            if row is None or time.time() - row[2] > self.file_key_ttl:
+                self._stats['file_key_misses'] += 1
+                return None
+            self._conn.execute('UPDATE audio SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._stats['file_key_hits'] += 1
+            return row[0], row[1]
+
+    def put_file_key(self, key: str, app_id: str, file_key: str, duration: int):
+        """记录已上传的 file_key"""
+        now = time.time()
+        with self._lock:
+            self._expire_file_keys_locked(now)
+            self._conn.execute(
+                'INSERT OR REPLACE INTO file_keys (key, app_id, file_key, duration, created) '
+                'VALUES (?, ?, ?, ?, ?)', (key, app_id, file_key, duration, now))
+
+    def stats(self) -> dict:
+        """命中/未命中计数，以及当前条目数、占用字节和 file_key 记录数"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM audio').fetchone()
+            file_keys = self._conn.execute('SELECT COUNT(*) FROM file_keys').fetchone()[0]
+            return dict(self._stats, entries=entries, bytes=size, max_bytes=self.max_bytes,
+                        file_keys=file_keys)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute('DELETE FROM audio')
+            self._conn.execute('DELETE FROM file_keys')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Voice Queue - 持久化语音发送队列
+
+调用方入队后立即返回，由常驻工作进程在后台完成合成、上传与发送：
+1. 任务保存在本地 SQLite（WAL 模式），多个进程可同时入队和消费
+2. 优先级通道：interactive（对话回复）总是先于 bulk（批量通知）被领取
+3. 段落级检查点：分段结果、每段的 file_key 与 message_id 都会落库，
+   进程崩溃后任务在租约到期时被重新领取，已上传的段落不再合成，已发送的段落不再发送
+4. 失败任务按指数退避重试，超过最大次数后标记为 failed
+
+用法：
+    python voice_queue.py enqueue "要发送的文字" --user ou_xxx
+    python voice_queue.py worker --parallelism 4
+    python voice_queue.py status [job_id]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+
+DEFAULT_QUEUE_PATH = Path.home() / '.openclaw' / 'feishu_voice_queue.db'
+
+# 通道 → 优先级（数值越小越先领取）
+LANES = {'interactive': 0, 'bulk': 10}
+
+# 接收者 ID 类型，与 FeishuVoice.RECEIVE_ID_TYPES 一致（入队时不导入 feishu_voice，保持启动轻量）
+RECEIVE_ID_TYPES = ('open_id', 'union_id', 'user_id', 'email', 'chat_id')
+
+
+class VoiceJobQueue:
+    """SQLite 持久化任务队列（线程安全，可多进程共享）"""
+
+    DEFAULT_MAX_ATTEMPTS = 3
+
+    # 工作进程持有任务的租约（秒），到期未续约视为崩溃，任务可被重新领取
+    DEFAULT_LEASE_SECONDS = 300
+
+    # 重试退避（秒）：RETRY_DELAY * 2^(attempts-1)
+    RETRY_DELAY = 5.0
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: 队列数据库路径，默认读取 FEISHU_VOICE_QUEUE，否则 ~/.openclaw/feishu_voice_queue.db
+        """
+        self.path = Path(path or os.getenv('FEISHU_VOICE_QUEUE') or DEFAULT_QUEUE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                lane TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                text TEXT NOT NULL,
+                receive_id TEXT,
+                receive_id_type TEXT NOT NULL,
+                options TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                not_before REAL NOT NULL,
+                worker TEXT,
+                lease_until REAL,
+                error TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, id);
+            CREATE TABLE IF NOT EXISTS segments (
+                job_id INTEGER NOT NULL,
+                idx INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                file_key TEXT,
+                duration INTEGER,
+                message_id TEXT,
+                PRIMARY KEY (job_id, idx)
+            );
+        ''')
+
+    def _transaction(self, func, *args):
+        """在 BEGIN IMMEDIATE 事务中执行（多进程间互斥领取）"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(*args)
+                self._conn.execute('COMMIT')
+                return result
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def enqueue(self, text: str, receive_id: Optional[str] = None,
+                receive_id_type: str = 'open_id', voice: Optional[str] = None,
+                lane: str = 'interactive', max_attempts: Optional[int] = None,
+                **options) -> int:
+        """
+        入队一条语音消息，立即返回任务 ID
+
+        Args:
+            text: 要发送的文字
+            receive_id: 接收者 ID，None 时使用工作进程配置的默认用户
+            receive_id_type: 接收者 ID 类型
+            voice: 音色
+            lane: 通道，interactive 或 bulk
+            max_attempts: 最大尝试次数
+            options: 其他 send_voice 参数（auto_split / max_segment_chars / max_segment_seconds）
+
+        Returns:
+            任务 ID
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane}")
+        if receive_id_type not in RECEIVE_ID_TYPES:
+            raise ValueError(f"Unsupported receive_id_type: {receive_id_type}")
+        now = time.time()
+        options = dict(options, voice=voice)
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO jobs (lane, priority, status, text, receive_id, receive_id_type, options, '
+                'max_attempts, not_before, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (lane, LANES[lane], 'queued', text, receive_id, receive_id_type,
+                 json.dumps(options, ensure_ascii=False),
+                 max_attempts or self.DEFAULT_MAX_ATTEMPTS, now, now, now))
+            return cursor.lastrowid
+
+    def claim(self, worker: str, lanes: Optional[List[str]] = None,
+              lease_seconds: Optional[float] = None) -> Optional[dict]:
+        """
+        领取优先级最高的一个任务（含租约过期的运行中任务）
+
+        Args:
+            worker: 工作者标识
+            lanes: 只领取这些通道的任务，None 表示全部
+            lease_seconds: 租约时长
+
+        Returns:
+            任务信息，没有可领取的任务时返回 None
+        """
+        lease = lease_seconds or self.DEFAULT_LEASE_SECONDS
+
+        def _claim():
+            now = time.time()
+            # 反复崩溃、次数用尽的任务直接标记失败
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Lease expired', updated = ? "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                (now, now))
+            lane_filter, params = '', [now, now]
+            if lanes:
+                lane_filter = f" AND lane IN ({','.join('?' * len(lanes))})"
+                params += list(lanes)
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE ((status = 'queued' AND not_before <= ?) "
+                "OR (status = 'running' AND lease_until < ?))" + lane_filter +
+                " ORDER BY priority, id LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker, now + lease, now, row[0]))
+            return row[0]
+
+        job_id = self._transaction(_claim)
+        return self.get(job_id) if job_id is not None else None
+
+    def heartbeat(self, job_id: int, worker: str, lease_seconds: Optional[float] = None) -> bool:
+        """续约，返回任务是否仍由该工作者持有（租约过期被他人领取时返回 False）"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + (lease_seconds or self.DEFAULT_LEASE_SECONDS), now, job_id, worker))
+            return cursor.rowcount == 1
+
+    def init_segments(self, job_id: int, texts: List[str]) -> List[dict]:
+        """首次处理时保存分段结果（已保存过则保持不变），返回各段检查点"""
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO segments (job_id, idx, text) VALUES (?, ?, ?)',
+                [(job_id, i, text) for i, text in enumerate(texts, 1)])
+        return self.segments(job_id)
+
+    def segments(self, job_id: int) -> List[dict]:
+        """任务各段的检查点"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT idx, text, file_key, duration, message_id FROM segments '
+                'WHERE job_id = ? ORDER BY idx', (job_id,)).fetchall()
+        return [{'index': r[0], 'text': r[1], 'file_key': r[2], 'duration': r[3],
+                 'message_id': r[4]} for r in rows]
+
+    def checkpoint_upload(self, job_id: int, index: int, file_key: str, duration: int):
+        """记录某段已上传"""
+        with self._lock:
+            self._conn.execute('UPDATE segments SET file_key = ?, duration = ? '
+                               'WHERE job_id = ? AND idx = ?', (file_key, duration, job_id, index))
+
+    def checkpoint_sent(self, job_id: int, index: int, message_id: str):
+        """记录某段已发送"""
+        with self._lock:
+            self._conn.execute('UPDATE segments SET message_id = ? WHERE job_id = ? AND idx = ?',
+                               (message_id, job_id, index))
+
+    def complete(self, job_id: int, worker: str):
+        """标记任务完成"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', error = NULL, lease_until = NULL, updated = ? "
+                "WHERE id = ? AND worker = ?", (time.time(), job_id, worker))
+
+    def fail(self, job_id: int, worker: str, error: str):
+        """任务失败：未超过最大次数时退避后重新排队，否则标记为 failed"""
+        def _fail():
+            row = self._conn.execute('SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ?',
+                                     (job_id, worker)).fetchone()
+            if row is None:
+                return
+            attempts, max_attempts = row
+            now = time.time()
+            if attempts < max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, lease_until = NULL, "
+                    "not_before = ?, updated = ? WHERE id = ?",
+                    (error, now + self.RETRY_DELAY * 2 ** (attempts - 1), now, job_id))
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, updated = ? "
+                    "WHERE id = ?", (error, now, job_id))
+
+        self._transaction(_fail)
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """任务详情（含各段检查点）"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, lane, status, text, receive_id, receive_id_type, options, attempts, '
+                'max_attempts, error, created, updated FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(('id', 'lane', 'status', 'text', 'receive_id', 'receive_id_type', 'options',
+                        'attempts', 'max_attempts', 'error', 'created', 'updated'), row))
+        job['options'] = json.loads(job['options'])
+        job['segments'] = self.segments(job_id)
+        return job
+
+    def stats(self) -> dict:
+        """各通道各状态的任务数，以及排队最久任务的等待时间（秒）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT lane, status, COUNT(*) FROM jobs GROUP BY lane, status').fetchall()
+            oldest = self._conn.execute(
+                "SELECT MIN(created) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        stats = {}
+        for lane, status, count in rows:
+            stats.setdefault(lane, {})[status] = count
+        return {'lanes': stats, 'oldest_queued_seconds': time.time() - oldest if oldest else 0.0}
+
+    def purge(self, older_than: float) -> int:
+        """删除早于 older_than 秒前结束的 done / failed 任务，返回删除数量"""
+        def _purge():
+            cutoff = time.time() - older_than
+            ids = [r[0] for r in self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated < ?",
+                (cutoff,)).fetchall()]
+            for job_id in ids:
+                self._conn.execute('DELETE FROM segments WHERE job_id = ?', (job_id,))
+                self._conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+            return len(ids)
+
+        return self._transaction(_purge)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LeaseLostError(Exception):
+    """任务租约已被其他工作者接管"""
+
+
+class VoiceJobWorker:
+    """队列消费者：并发处理多个任务，每个任务按段落顺序发送"""
+
+    DEFAULT_PARALLELISM = 2
+    POLL_INTERVAL = 0.5
+
+    # 领取任务出错（如数据库被锁）时的最长退避（秒）
+    MAX_CLAIM_BACKOFF = 30.0
+
+    # 持有任务期间每隔租约的该比例续约一次
+    HEARTBEAT_FRACTION = 1 / 3
+
+    def __init__(self, queue: VoiceJobQueue, sender=None, parallelism: Optional[int] = None,
+                 lanes: Optional[List[str]] = None, lease_seconds: Optional[float] = None):
+        """
+        Args:
+            queue: 任务队列
+            sender: FeishuVoice 实例，默认新建
+            parallelism: 同时处理的任务数，默认读取 FEISHU_VOICE_QUEUE_WORKERS
+            lanes: 只处理这些通道，None 表示全部（按优先级领取）
+            lease_seconds: 任务租约时长
+        """
+        if sender is None:
+            from feishu_voice import FeishuVoice
+            sender = FeishuVoice()
+        self.queue = queue
+        self.sender = sender
+        self.parallelism = max(1, parallelism or int(
+            os.getenv('FEISHU_VOICE_QUEUE_WORKERS', self.DEFAULT_PARALLELISM)))
+        self.lanes = lanes
+        self.lease_seconds = lease_seconds or queue.DEFAULT_LEASE_SECONDS
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+
+    def process(self, job: dict, worker: str):
+        """
+        处理一个任务：跳过已发送的段落，复用已上传的 file_key，其余段落并发处理后按顺序发送
+        """
+        sender = self.sender
+        options = job['options']
+        voice = options.get('voice') or sender.DEFAULT_VOICE
+        receive_id = job['receive_id'] or sender.target_user
+
+        segments = self.queue.segments(job['id'])
+        if not segments:
+            texts = sender._segment_text(job['text'], voice, options.get('auto_split', True),
+                                         options.get('max_segment_chars'),
+                                         options.get('max_segment_seconds'))
+            segments = self.queue.init_segments(job['id'], texts)
+
+        def _prepare(segment: dict) -> dict:
+            prepared = sender._prepare_segment(segment['text'], voice, segment['index'])
+            self.queue.checkpoint_upload(job['id'], segment['index'], prepared['file_key'],
+                                         prepared['duration'])
+            return prepared
+
+        pending = [s for s in segments if not s['message_id']]
+        with ThreadPoolExecutor(max_workers=sender.DEFAULT_MAX_WORKERS) as executor:
+            futures = {s['index']: executor.submit(_prepare, s) for s in pending if not s['file_key']}
+            try:
+                for segment in pending:
+                    if segment['index'] in futures:
+                        prepared = futures[segment['index']].result()
+                    else:
+                        prepared = {'file_key': segment['file_key'], 'duration': segment['duration']}
+                    if not self.queue.heartbeat(job['id'], worker, self.lease_seconds):
+                        raise LeaseLostError(f"Job {job['id']} was taken over by another worker")
+                    result = sender.rate_limiter.call(
+                        'message', sender._call_with_token, sender._send_voice_message,
+                        prepared['file_key'], prepared['duration'], receive_id,
+                        job['receive_id_type'], receiver=receive_id)
+                    self.queue.checkpoint_sent(job['id'], segment['index'], result['message_id'])
+            except BaseException:
+                for future in futures.values():
+                    future.cancel()
+                raise
+        sender._save_speech_rates()
+
+    @contextmanager
+    def _keep_lease(self, job_id: int, worker: str):
+        """持有任务期间由后台线程定期续约（单段合成或限频等待可能超过租约时长）"""
+        done = threading.Event()
+
+        def _renew():
+            while not done.wait(self.lease_seconds * self.HEARTBEAT_FRACTION):
+                try:
+                    if not self.queue.heartbeat(job_id, worker, self.lease_seconds):
+                        # 已被其他工作者接管，发送前的续约检查会中止处理
+                        return
+                except Exception as e:
+                    print(f"Warning: 任务 {job_id} 续约失败，稍后重试: {e}")
+
+        thread = threading.Thread(target=_renew, name=f'lease-{job_id}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def _settle(self, func, job: dict, *args) -> bool:
+        """更新任务状态；失败时租约到期后任务会被重新领取，已发送的段落不会重复发送"""
+        try:
+            func(job['id'], *args)
+            return True
+        except Exception as e:
+            print(f"Warning: 任务 {job['id']} 状态更新失败: {e}")
+            return False
+
+    def _run_slot(self, slot: int):
+        worker = f'{self.worker_id}:{slot}'
+        backoff = self.POLL_INTERVAL
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(worker, self.lanes, self.lease_seconds)
+            except Exception as e:
+                print(f"Warning: 领取任务失败，{backoff:.1f}s 后重试: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.MAX_CLAIM_BACKOFF)
+                continue
+            backoff = self.POLL_INTERVAL
+            if job is None:
+                self._stop.wait(self.POLL_INTERVAL)
+                continue
+            start = time.perf_counter()
+            try:
+                with self._keep_lease(job['id'], worker):
+                    self.process(job, worker)
+            except LeaseLostError as e:
+                print(f"Warning: {e}")
+                continue
+            except Exception as e:
+                print(f"❌ 任务 {job['id']} 失败（第 {job['attempts']} 次）: {e}")
+                self._settle(self.queue.fail, job, worker, str(e))
+                continue
+            if self._settle(self.queue.complete, job, worker):
+                print(f"✅ 任务 {job['id']} [{job['lane']}] 完成 ({time.perf_counter() - start:.2f}s)")
+
+    def run(self):
+        """启动 parallelism 个处理线程，直到 stop() 被调用"""
+        threads = [threading.Thread(target=self._run_slot, args=(slot,), daemon=True)
+                   for slot in range(self.parallelism)]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1.0)
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def stop(self):
+        """处理完当前任务后退出"""
+        self._stop.set()
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='持久化语音发送队列')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_enqueue = sub.add_parser('enqueue', help='入队一条语音消息并立即返回任务 ID')
+    p_enqueue.add_argument('text', help='要发送的文字')
+    p_enqueue.add_argument('--user', '-u', help='接收者 ID（默认为配置的目标用户）')
+    p_enqueue.add_argument('--id-type', choices=RECEIVE_ID_TYPES, default='open_id',
+                           help='接收者 ID 类型')
+    p_enqueue.add_argument('--voice', '-v', default=None, help='音色')
+    p_enqueue.add_argument('--lane', choices=list(LANES), default='interactive', help='优先级通道')
+    p_enqueue.add_argument('--max-seconds', type=float, default=None, help='每段最大预估时长（秒）')
+
+    p_worker = sub.add_parser('worker', help='启动工作进程处理队列')
+    p_worker.add_argument('--parallelism', '-p', type=int, default=None, help='同时处理的任务数')
+    p_worker.add_argument('--lanes', default=None, help='只处理这些通道（逗号分隔）')
+
+    p_status = sub.add_parser('status', help='查看队列统计或任务详情')
+    p_status.add_argument('job_id', nargs='?', type=int, help='任务 ID')
+
+    p_purge = sub.add_parser('purge', help='清理已结束的旧任务')
+    p_purge.add_argument('--days', type=float, default=7, help='清理多少天前结束的任务')
+
+    args = parser.parse_args()
+    queue = VoiceJobQueue()
+
+    if args.command == 'enqueue':
+        job_id = queue.enqueue(args.text, args.user, args.id_type, args.voice, args.lane,
+                               max_segment_seconds=args.max_seconds)
+        print(job_id)
+    elif args.command == 'worker':
+        lanes = [lane.strip() for lane in args.lanes.split(',')] if args.lanes else None
+        worker = VoiceJobWorker(queue, parallelism=args.parallelism, lanes=lanes)
+        print(f"工作进程已启动（并发 {worker.parallelism}，通道 {', '.join(lanes or LANES)}）")
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            worker.stop()
+        finally:
+            worker.sender.transcoder.close()
+    elif args.command == 'status':
+        result = queue.get(args.job_id) if args.job_id else queue.stats()
+        if result is None:
+            print(f"任务不存在: {args.job_id}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.command == 'purge':
+        print(f"已清理 {queue.purge(args.days * 86400)} 个任务")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASR 动态微批处理
+把并发到达的识别请求合并为一次批量推理：
+1. 第一个请求到达后最多等待 max_wait_ms 收集后续请求
+2. 批内音频总时长达到 max_batch_seconds 或请求数达到 max_batch_size 时立即执行
+3. 批量推理失败时逐条重试，单个坏文件不影响同批其他请求
+批大小、等待时间与吞吐量通过 stats() 输出（asr_server 的 /health 中可见）。
+"""
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+
+# 关闭信号
+_STOP = object()
+
+
+class _Request:
+    __slots__ = ('audio', 'seconds', 'arrived', 'future')
+
+    def __init__(self, audio, seconds: Optional[float]):
+        self.audio = audio
+        self.seconds = seconds or 0.0
+        self.arrived = time.perf_counter()
+        self.future = Future()
+
+
+class ASRBatcher:
+    """识别请求微批处理器（单个后台线程执行推理）"""
+
+    DEFAULT_MAX_WAIT_MS = 50
+    DEFAULT_MAX_BATCH_SECONDS = 120.0
+    DEFAULT_MAX_BATCH_SIZE = 16
+
+    def __init__(self, transcribe_batch: Callable[[List[str]], List[str]],
+                 transcribe_one: Optional[Callable[[str], str]] = None,
+                 audio_seconds: Optional[Callable[[str], Optional[float]]] = None,
+                 max_wait_ms: Optional[float] = None,
+                 max_batch_seconds: Optional[float] = None,
+                 max_batch_size: Optional[int] = None):
+        """
+        Args:
+            transcribe_batch: 批量识别函数，输入音频列表（路径或 PCM），返回同序文本列表
+            transcribe_one: 单条识别函数（批量失败时逐条重试），默认用 transcribe_batch 包装
+            audio_seconds: 读取音频时长的函数，用于音频时长预算
+            max_wait_ms: 收集请求的最长等待（毫秒），默认读取 FUNASR_BATCH_WAIT_MS
+            max_batch_seconds: 每批音频总时长上限（秒），默认读取 FUNASR_BATCH_SECONDS
+            max_batch_size: 每批最大请求数，默认读取 FUNASR_BATCH_SIZE
+        """
+        self.transcribe_batch = transcribe_batch
+        self.transcribe_one = transcribe_one or (lambda audio: transcribe_batch([audio])[0])
+        self.audio_seconds = audio_seconds
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(
+            os.getenv('FUNASR_BATCH_WAIT_MS', self.DEFAULT_MAX_WAIT_MS))) / 1000
+        self.max_batch_seconds = max_batch_seconds or float(
+            os.getenv('FUNASR_BATCH_SECONDS', self.DEFAULT_MAX_BATCH_SECONDS))
+        self.max_batch_size = max_batch_size or int(
+            os.getenv('FUNASR_BATCH_SIZE', self.DEFAULT_MAX_BATCH_SIZE))
+
+        self._queue = queue.Queue()
+        self._pending = None  # 超出上一批预算、留给下一批的请求
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'batches': 0, 'requests': 0, 'errors': 0, 'max_batch_size': 0,
+            'audio_seconds': 0.0, 'inference_seconds': 0.0, 'wait_seconds': 0.0,
+        }
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='asr-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, audio) -> Future:
+        """提交识别请求（文件路径或 PCM），返回 Future（结果为识别文本）"""
+        if self._closed:
+            raise RuntimeError("ASRBatcher is closed")
+        seconds = self.audio_seconds(audio) if self.audio_seconds else None
+        request = _Request(audio, seconds)
+        self._queue.put(request)
+        return request.future
+
+    def transcribe(self, audio) -> str:
+        """同步识别（等待所在批次完成）"""
+        return self.submit(audio).result()
+
+    def _next(self, timeout: Optional[float]):
+        """取下一个请求；超时返回 None，关闭时返回 _STOP"""
+        if self._pending is not None:
+            request, self._pending = self._pending, None
+            return request
+        try:
+            return self._queue.get(timeout=timeout) if timeout is None or timeout > 0 \
+                else self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _collect(self) -> List[_Request]:
+        """收集一批请求"""
+        first = self._next(None)
+        if first is _STOP:
+            return []
+        batch = [first]
+        total_seconds = first.seconds
+        deadline = first.arrived + self.max_wait
+
+        while len(batch) < self.max_batch_size and total_seconds < self.max_batch_seconds:
+            request = self._next(deadline - time.perf_counter())
+            if request is None:
+                break
+            if request is _STOP:
+                self._pending = request
+                break
+            if total_seconds + request.seconds > self.max_batch_seconds:
+                self._pending = request
+                break
+            batch.append(request)
+            total_seconds += request.seconds
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if batch:
+                self._execute(batch)
+
+    def _execute(self, batch: List[_Request]):
+        start = time.perf_counter()
+        errors = 0
+        try:
+            texts = self.transcribe_batch([r.audio for r in batch])
+            for request, text in zip(batch, texts):
+                request.future.set_result(text)
+        except Exception as e:
+            if len(batch) == 1:
+                errors = 1
+                batch[0].future.set_exception(e)
+            else:
+                # 逐条重试，隔离出错的音频
+                for request in batch:
+                    try:
+                        request.future.set_result(self.transcribe_one(request.audio))
+                    except Exception as item_error:
+                        errors += 1
+                        request.future.set_exception(item_error)
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            stats = self._stats
+            stats['batches'] += 1
+            stats['requests'] += len(batch)
+            stats['errors'] += errors
+            stats['max_batch_size'] = max(stats['max_batch_size'], len(batch))
+            stats['audio_seconds'] += sum(r.seconds for r in batch)
+            stats['inference_seconds'] += elapsed
+            stats['wait_seconds'] += sum(start - r.arrived for r in batch)
+
+    def stats(self) -> dict:
+        """批处理统计：批次数、平均批大小、平均排队等待、吞吐量"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches, requests = stats['batches'], stats['requests']
+        inference = stats['inference_seconds']
+        stats.update({
+            'avg_batch_size': requests / batches if batches else None,
+            'avg_wait_ms': stats['wait_seconds'] / requests * 1000 if requests else None,
+            'requests_per_second': requests / inference if inference else None,
+            'realtime_factor': inference / stats['audio_seconds'] if stats['audio_seconds'] else None,
+            'queued': self._queue.qsize(),
+            'config': {
+                'max_wait_ms': self.max_wait * 1000,
+                'max_batch_seconds': self.max_batch_seconds,
+                'max_batch_size': self.max_batch_size,
+            },
+        })
+        return stats
+
+    def close(self):
+        """处理完已提交的请求后停止后台线程"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
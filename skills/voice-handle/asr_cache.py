@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASR 识别结果缓存
+以 (音频内容哈希, 模型, 识别参数) 为键缓存识别文本：飞书重试重复投递的事件、
+被转发到多个会话的同一条语音只需一次哈希计算即可得到结果。
+
+存储使用 SQLite（WAL），可被多个进程同时访问并在重启后保留；按条目数 LRU 淘汰。
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+DEFAULT_CACHE_PATH = Path.home() / '.openclaw' / 'asr_cache.db'
+
+# 读取文件计算哈希的块大小
+_HASH_CHUNK = 1024 * 1024
+
+
+def audio_digest(audio) -> str:
+    """
+    计算音频内容哈希
+
+    Args:
+        audio: 文件路径、编码音频 bytes 或 PCM numpy 数组
+    """
+    digest = hashlib.sha256()
+    if isinstance(audio, (str, os.PathLike)):
+        with open(audio, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                digest.update(chunk)
+    elif isinstance(audio, (bytes, bytearray, memoryview)):
+        digest.update(audio)
+    elif hasattr(audio, 'dtype'):
+        import numpy as np
+        digest.update(f'pcm:{audio.dtype.str}:{audio.shape}'.encode('ascii'))
+        digest.update(memoryview(np.ascontiguousarray(audio)).cast('B'))
+    else:
+        raise TypeError(f"Cannot hash audio input: {type(audio).__name__}")
+    return digest.hexdigest()
+
+
+class ASRCache:
+    """识别结果缓存"""
+
+    # 默认最多保存的条目数
+    DEFAULT_MAX_ENTRIES = 10000
+
+    def __init__(self, path: Optional[Path] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            path: 缓存数据库路径，默认读取 FUNASR_CACHE，否则 ~/.openclaw/asr_cache.db
+            max_entries: 最多保存的条目数，默认读取 FUNASR_CACHE_MAX_ENTRIES
+        """
+        self.path = Path(path or os.getenv('FUNASR_CACHE') or DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries or int(
+            os.getenv('FUNASR_CACHE_MAX_ENTRIES', self.DEFAULT_MAX_ENTRIES))
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+        ''')
+
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(digest: str, model: str, params: dict) -> str:
+        """由音频哈希、模型与识别参数生成缓存键"""
+        payload = json.dumps([digest, model, params], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """查询识别结果"""
+        with self._lock:
+            row = self._conn.execute('SELECT text FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            self._conn.execute('UPDATE results SET hits = hits + 1, last_used = ? WHERE key = ?',
+                               (time.time(), key))
+            self._stats['hits'] += 1
+            return row[0]
+
+    def put(self, key: str, text: str):
+        """写入识别结果，超出条目上限时按最久未使用淘汰"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO results (key, text, hits, created, last_used) '
+                    'VALUES (?, ?, 0, ?, ?)', (key, text, now, now))
+                count = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+                excess = count - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        'DELETE FROM results WHERE key IN '
+                        '(SELECT key FROM results ORDER BY last_used ASC LIMIT ?)', (excess,))
+                    self._stats['evictions'] += excess
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def stats(self) -> dict:
+        """本进程命中/未命中计数与命中率，以及持久化的条目数和累计命中"""
+        with self._lock:
+            entries, total_hits = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM results').fetchone()
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        return dict(stats, hit_rate=stats['hits'] / lookups if lookups else None,
+                    entries=entries, total_hits=total_hits, max_entries=self.max_entries)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute('DELETE FROM results')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FunASR 常驻服务客户端
+向 asr_server.py 发送识别请求，输出与 funasr_local.py 相同（识别文本打印到 stdout）
+
+服务地址读取 FUNASR_SERVER 环境变量：
+    http://127.0.0.1:8765      本地 HTTP（默认）
+    unix:/path/to/asr.sock     Unix socket
+
+服务不可用时默认回退为进程内识别（funasr_local.transcribe）。
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import http.client
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+DEFAULT_SERVER = "http://127.0.0.1:8765"
+DEFAULT_TIMEOUT = 300.0
+
+
+class ASRServerError(Exception):
+    """识别服务返回错误"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_address(address: str) -> Tuple[str, str, Optional[int]]:
+    """
+    解析服务地址
+
+    Returns:
+        ('unix', socket 路径, None) 或 ('tcp', host, port)
+    """
+    if address.startswith('unix:'):
+        path = address[len('unix:'):]
+        if path.startswith('//'):
+            path = path[2:]
+        return 'unix', os.path.expanduser(path), None
+    parts = urlsplit(address if '://' in address else f'http://{address}')
+    return 'tcp', parts.hostname or '127.0.0.1', parts.port or 80
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """通过 Unix socket 发送 HTTP 请求"""
+
+    def __init__(self, path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class ASRClient:
+    """识别服务客户端"""
+
+    def __init__(self, address: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            address: 服务地址，默认读取 FUNASR_SERVER
+            timeout: 请求超时（秒），默认读取 FUNASR_SERVER_TIMEOUT
+        """
+        self.address = address or os.getenv('FUNASR_SERVER', DEFAULT_SERVER)
+        self.timeout = timeout or float(os.getenv('FUNASR_SERVER_TIMEOUT', DEFAULT_TIMEOUT))
+        self.kind, self.host, self.port = parse_address(self.address)
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.kind == 'unix':
+            return _UnixHTTPConnection(self.host, self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, payload: Optional[dict] = None,
+                 audio: Optional[bytes] = None) -> dict:
+        """发送请求（JSON 或音频字节）并解析 JSON 响应，连接失败时抛出 ConnectionError"""
+        conn = self._connection()
+        try:
+            if audio is not None:
+                body, headers = audio, {'Content-Type': 'application/octet-stream'}
+            elif payload is not None:
+                body, headers = json.dumps(payload).encode('utf-8'), {'Content-Type': 'application/json'}
+            else:
+                body, headers = None, {}
+            try:
+                conn.request(method, path, body=body, headers=headers)
+            except (FileNotFoundError, socket.gaierror) as e:
+                raise ConnectionError(f"ASR server unavailable at {self.address}: {e}") from e
+            response = conn.getresponse()
+            data = response.read()
+        finally:
+            conn.close()
+
+        try:
+            result = json.loads(data.decode('utf-8'))
+        except ValueError:
+            raise ASRServerError(f"HTTP {response.status}: {data[:200]!r}", response.status)
+        if response.status != 200:
+            raise ASRServerError(result.get('error', f"HTTP {response.status}"), response.status)
+        return result
+
+    def health(self) -> dict:
+        """查询服务状态"""
+        return self._request('GET', '/health')
+
+    def transcribe(self, audio) -> str:
+        """
+        识别音频，返回识别文本
+
+        Args:
+            audio: 文件路径（需在服务所在主机上可访问），或编码音频 bytes / 文件对象
+                   （如飞书下载的 Ogg Opus，直接作为请求体发送）
+        """
+        if isinstance(audio, (str, os.PathLike)):
+            result = self._request('POST', '/transcribe',
+                                   {'audio_path': str(Path(audio).resolve())})
+        else:
+            data = audio.read() if hasattr(audio, 'read') else bytes(audio)
+            result = self._request('POST', '/transcribe', audio=data)
+        return result['text']
+
+
+def transcribe(audio, fallback: bool = True) -> str:
+    """
+    识别音频，优先使用常驻服务
+
+    Args:
+        audio: 音频文件路径，或编码音频 bytes / 文件对象
+        fallback: 服务不可用时是否回退为进程内识别
+
+    Returns:
+        识别文本
+    """
+    if hasattr(audio, 'read'):
+        # 先读出内容，回退本地识别时仍可使用
+        audio = audio.read()
+    try:
+        return ASRClient().transcribe(audio)
+    except ConnectionError:
+        if not fallback:
+            raise
+        import funasr_local
+        return funasr_local.transcribe(audio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FunASR 常驻服务客户端')
+    parser.add_argument('audio_file', nargs='?', help='音频文件路径')
+    parser.add_argument('--server', help=f'服务地址（默认 FUNASR_SERVER 或 {DEFAULT_SERVER}）')
+    parser.add_argument('--health', action='store_true', help='输出服务健康状态')
+    parser.add_argument('--no-fallback', action='store_true', help='服务不可用时直接报错，不回退本地识别')
+    args = parser.parse_args()
+
+    if args.server:
+        os.environ['FUNASR_SERVER'] = args.server
+
+    if args.health:
+        try:
+            print(json.dumps(ASRClient().health(), ensure_ascii=False, indent=2))
+        except (ConnectionError, ASRServerError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if not args.audio_file:
+        print("Usage: python asr_client.py <audio_file>", file=sys.stderr)
+        sys.exit(1)
+
+    if not Path(args.audio_file).exists():
+        print(f"Error: File not found: {args.audio_file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        text = transcribe(args.audio_file, fallback=not args.no_fallback)
+        print(text)
+    except Exception as e:
+        print(f"Error during transcription: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASR 多进程工作池（CPU 推理）
+1. 父进程加载一次模型，再 fork 出工作进程：模型权重按写时复制共享，内存不随进程数倍增
+2. 每个工作进程可设置 torch 线程数（intra-op），并可绑定到指定 CPU 核心
+3. 请求分发给未完成请求最少的工作进程
+
+注意：
+- 写时复制依赖 fork，仅在 Linux/macOS 生效；Windows 下每个工作进程各自加载模型
+- 父进程加载模型后不做推理（GNU OpenMP 在 fork 前初始化线程池会导致子进程卡死），
+  预热在各工作进程内完成
+"""
+
+import gc
+import os
+import time
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Sequence
+
+import funasr_local
+
+
+def _worker_main(conn, cpus: Optional[Sequence[int]], threads: Optional[int],
+                 transcribe: Callable, warmup: Optional[Callable]):
+    """工作进程主循环：接收 (请求 ID, 音频)，返回 (请求 ID, 是否成功, 文本或错误信息)"""
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    if threads:
+        os.environ['OMP_NUM_THREADS'] = str(threads)
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+    try:
+        if warmup:
+            warmup()
+        conn.send(('ready', True, os.getpid()))
+    except Exception as e:
+        conn.send(('ready', False, f'{type(e).__name__}: {e}'))
+        return
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        request_id, audio = message
+        try:
+            conn.send((request_id, True, transcribe(audio)))
+        except Exception as e:
+            conn.send((request_id, False, f'{type(e).__name__}: {e}'))
+
+
+class _Worker:
+    """父进程中的工作进程记录"""
+
+    def __init__(self, index: int, process, conn, cpus: Optional[List[int]]):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.cpus = cpus
+        self.send_lock = threading.Lock()
+        self.alive = True
+        self.outstanding = 0
+        self.completed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+
+class ASRWorkerPool:
+    """多进程识别池"""
+
+    def __init__(self, workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None,
+                 pin_cpus: Optional[bool] = None,
+                 load_model: Callable = funasr_local.get_model,
+                 transcribe: Callable = funasr_local.transcribe,
+                 warmup: Optional[Callable] = funasr_local.warmup):
+        """
+        Args:
+            workers: 工作进程数，默认读取 FUNASR_POOL_WORKERS，否则 CPU 核心数 / 每进程线程数
+            threads_per_worker: 每个进程的 torch 线程数，默认读取 FUNASR_POOL_THREADS，否则 1
+            pin_cpus: 是否把各进程绑定到互不重叠的 CPU 核心，默认读取 FUNASR_POOL_PIN
+            load_model: 父进程中加载模型的函数
+            transcribe: 工作进程中的识别函数
+            warmup: 工作进程启动后的预热函数，None 表示不预热
+        """
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or int(os.getenv('FUNASR_POOL_THREADS', 1))
+        self.workers = workers or int(os.getenv('FUNASR_POOL_WORKERS', 0)) or \
+            max(1, cpu_count // self.threads_per_worker)
+        if pin_cpus is None:
+            pin_cpus = os.getenv('FUNASR_POOL_PIN', '').lower() in ('1', 'true', 'yes')
+        self.pin_cpus = pin_cpus and hasattr(os, 'sched_setaffinity')
+
+        self.load_model = load_model
+        self.transcribe_func = transcribe
+        self.warmup = warmup
+        self.load_seconds = None
+        self.start_seconds = None
+
+        self._workers: List[_Worker] = []
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._started = False
+
+    def _cpu_sets(self) -> List[Optional[List[int]]]:
+        """按可用核心为每个进程分配连续的核心块"""
+        if not self.pin_cpus:
+            return [None] * self.workers
+        available = sorted(os.sched_getaffinity(0))
+        size = self.threads_per_worker
+        return [[available[(i * size + k) % len(available)] for k in range(size)]
+                for i in range(self.workers)]
+
+    def start(self):
+        """父进程加载模型后启动工作进程，等待全部预热完成"""
+        if self._started:
+            return
+        self._started = True
+
+        start = time.perf_counter()
+        self.load_model()
+        self.load_seconds = time.perf_counter() - start
+
+        # 冻结已有对象，避免子进程中的垃圾回收触碰并复制这些内存页
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        start = time.perf_counter()
+        for index, cpus in enumerate(self._cpu_sets()):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker_main,
+                args=(child_conn, cpus, self.threads_per_worker, self.transcribe_func, self.warmup),
+                name=f'asr-worker-{index}', daemon=True)
+            process.start()
+            child_conn.close()
+            self._workers.append(_Worker(index, process, parent_conn, cpus))
+
+        for worker in self._workers:
+            try:
+                _, ok, info = worker.conn.recv()
+            except EOFError:
+                ok, info = False, f"exit code {worker.process.exitcode}"
+            if not ok:
+                self.close()
+                raise RuntimeError(f"ASR worker {worker.index} failed to start: {info}")
+            threading.Thread(target=self._read_results, args=(worker,),
+                             name=f'asr-worker-{worker.index}-reader', daemon=True).start()
+        self.start_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _settle(future: Future, result=None, error: Optional[BaseException] = None):
+        """设置 Future 的结果；调用方已取消的 Future 直接忽略"""
+        if not future.set_running_or_notify_cancel():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _read_results(self, worker: _Worker):
+        """接收单个工作进程的结果"""
+        while True:
+            try:
+                request_id, ok, result = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                entry = self._futures.pop(request_id, None)
+                if entry is None:
+                    # 该请求已由 submit 的失败处理撤销
+                    continue
+                future, started = entry
+                worker.outstanding -= 1
+                worker.busy_seconds += time.perf_counter() - started
+                if ok:
+                    worker.completed += 1
+                else:
+                    worker.errors += 1
+            if ok:
+                self._settle(future, result)
+            else:
+                self._settle(future, error=RuntimeError(result))
+
+        # 工作进程退出：未完成的请求全部失败
+        with self._lock:
+            worker.alive = False
+            orphaned = [request_id for request_id, (future, _) in self._futures.items()
+                        if getattr(future, 'worker', None) is worker]
+            futures = [self._futures.pop(request_id)[0] for request_id in orphaned]
+            worker.outstanding = 0
+        for future in futures:
+            self._settle(future, error=RuntimeError(f"ASR worker {worker.index} exited"))
+
+    def submit(self, audio) -> Future:
+        """提交识别请求（文件路径、编码音频 bytes 或 PCM），返回 Future"""
+        if not self._started:
+            self.start()
+        future = Future()
+        with self._lock:
+            alive = [w for w in self._workers if w.alive]
+            if not alive:
+                raise RuntimeError("No ASR workers available")
+            worker = min(alive, key=lambda w: (w.outstanding, w.completed))
+            request_id = next(self._ids)
+            future.worker = worker
+            self._futures[request_id] = (future, time.perf_counter())
+            worker.outstanding += 1
+        try:
+            with worker.send_lock:
+                worker.conn.send((request_id, audio))
+        except Exception as e:
+            # 发送失败（工作进程已退出、音频无法序列化）：撤销登记，错误经 Future 返回
+            with self._lock:
+                entry = self._futures.pop(request_id, None)
+                if entry is not None:
+                    worker.outstanding -= 1
+                if isinstance(e, OSError):
+                    worker.alive = False
+            # 结果线程已把该请求作为进程退出的遗留请求处理时不再重复设置
+            if entry is not None:
+                self._settle(future, error=e)
+        return future
+
+    def transcribe(self, audio) -> str:
+        """同步识别"""
+        return self.submit(audio).result()
+
+    def stats(self) -> dict:
+        """各工作进程的负载与完成情况"""
+        with self._lock:
+            workers = [{
+                'pid': w.process.pid,
+                'cpus': w.cpus,
+                'alive': w.alive,
+                'outstanding': w.outstanding,
+                'completed': w.completed,
+                'errors': w.errors,
+                'busy_seconds': w.busy_seconds,
+            } for w in self._workers]
+        return {
+            'workers': len(workers),
+            'threads_per_worker': self.threads_per_worker,
+            'load_seconds': self.load_seconds,
+            'start_seconds': self.start_seconds,
+            'completed': sum(w['completed'] for w in workers),
+            'errors': sum(w['errors'] for w in workers),
+            'per_worker': workers,
+        }
+
+    def close(self):
+        """通知工作进程退出并等待结束"""
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+        self._workers = []
+        self._started = False
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FunASR 常驻识别服务
+进程启动时加载一次模型并预热，之后通过本地 HTTP 或 Unix socket 接收识别请求，
+避免每次识别都重新启动 Python、导入 torch 并加载模型。
+
+接口：
+    GET  /health        服务状态、模型加载/预热耗时、请求统计
+    POST /transcribe    {"audio_path": "..."} → {"text": "...", "elapsed": 0.83}
+                        或直接以音频字节为请求体（Content-Type: audio/* 或 application/octet-stream），
+                        在内存中解码为 16kHz PCM 后识别，不写临时文件
+
+用法：
+    python asr_server.py                                 # 监听 FUNASR_SERVER 或 http://127.0.0.1:8765
+    python asr_server.py --listen unix:~/.openclaw/asr.sock
+客户端见 asr_client.py。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import socketserver
+from pathlib import Path
+from typing import Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import funasr_local
+from asr_batcher import ASRBatcher
+from asr_pool import ASRWorkerPool
+from audio_input import load_pcm
+from asr_client import DEFAULT_SERVER, parse_address
+
+
+class ASRService:
+    """持有模型的识别服务
+
+    单进程模式下并发请求经 ASRBatcher 合并为批量推理；
+    指定 pool 时请求分发到多进程工作池（模型在父进程加载，工作进程共享权重）。
+    """
+
+    def __init__(self, warmup: bool = True, batcher: Optional[ASRBatcher] = None,
+                 pool: Optional[ASRWorkerPool] = None):
+        """
+        Args:
+            warmup: 模型加载后是否先用静音跑一次推理（工作池模式下由各工作进程预热）
+            batcher: 请求批处理器，默认按环境变量配置新建
+            pool: 多进程工作池，指定后不再使用 batcher
+        """
+        self.warmup = warmup
+        self.started_at = time.time()
+        self.ready = threading.Event()
+        self.load_error = None
+        self.pool = pool
+        self.batcher = None if pool else batcher or ASRBatcher(
+            funasr_local.transcribe_batch,
+            transcribe_one=funasr_local.transcribe,
+            audio_seconds=funasr_local.audio_seconds)
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'inference_seconds': 0.0}
+
+    def load(self):
+        """加载并预热模型（在后台线程中执行，期间 /health 返回 loading）"""
+        try:
+            if self.pool:
+                self.pool.start()
+            else:
+                funasr_local.get_model()
+                if self.warmup:
+                    funasr_local.warmup()
+            stats = funasr_local.model_stats
+            timings = [f"{name} {stats[key]:.2f}s" for name, key in
+                       (('load', 'load_seconds'), ('warmup', 'warmup_seconds')) if stats[key] is not None]
+            print(f"Model ready on {stats['device']}: {', '.join(timings)}", file=sys.stderr)
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"Model loading error: {e}", file=sys.stderr)
+        finally:
+            self.ready.set()
+
+    def health(self) -> dict:
+        if not self.ready.is_set():
+            status = 'loading'
+        else:
+            status = 'error' if self.load_error else 'ok'
+        with self._stats_lock:
+            stats = dict(self.stats)
+        cache = funasr_local.get_cache()
+        stats['avg_inference_seconds'] = (
+            stats['inference_seconds'] / stats['requests'] if stats['requests'] else None)
+        return {
+            'status': status,
+            'error': self.load_error,
+            'uptime_seconds': time.time() - self.started_at,
+            'model': dict(funasr_local.model_stats),
+            'requests': stats,
+            **({'pool': self.pool.stats()} if self.pool else {'batching': self.batcher.stats()}),
+            'cache': cache.stats() if cache else None,
+        }
+
+    def transcribe(self, audio) -> str:
+        """识别音频（文件路径或 16kHz PCM），模型未就绪时等待加载完成"""
+        self.ready.wait()
+        if self.load_error:
+            raise RuntimeError(f"Model not available: {self.load_error}")
+
+        start = time.perf_counter()
+        try:
+            text = (self.pool or self.batcher).transcribe(audio)
+        except Exception:
+            with self._stats_lock:
+                self.stats['errors'] += 1
+            raise
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['inference_seconds'] += time.perf_counter() - start
+        return text
+
+
+class ASRRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理（server.service 为 ASRService）"""
+
+    protocol_version = 'HTTP/1.1'
+    # 缓冲写入，响应头与响应体合并为一次发送（避免 Nagle 与延迟确认叠加的 40ms 停顿）
+    wbufsize = 64 * 1024
+
+    def address_string(self) -> str:
+        # Unix socket 连接没有客户端地址
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            health = self.server.service.health()
+            self._send_json(200 if health['status'] != 'error' else 503, health)
+        else:
+            self._send_json(404, {'error': f'Not found: {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/transcribe':
+            self._send_json(404, {'error': f'Not found: {self.path}'})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        content_type = self.headers.get('Content-Type', '')
+
+        start = time.perf_counter()
+        if content_type.startswith('application/json'):
+            try:
+                audio = json.loads(body.decode('utf-8'))['audio_path']
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {'error': 'Expected JSON body {"audio_path": "..."}'})
+                return
+            if not Path(audio).exists():
+                self._send_json(404, {'error': f'File not found: {audio}'})
+                return
+        else:
+            # 请求体即音频：在处理线程中解码，模型线程只做推理
+            try:
+                audio = load_pcm(body)
+            except Exception as e:
+                self._send_json(400, {'error': f'Cannot decode audio: {e}'})
+                return
+
+        try:
+            text = self.server.service.transcribe(audio)
+        except Exception as e:
+            self._send_json(500, {'error': f'Error during transcription: {e}'})
+            return
+        self._send_json(200, {'text': text, 'elapsed': time.perf_counter() - start})
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """基于 Unix socket 的多线程 HTTP 服务"""
+
+    daemon_threads = True
+
+
+def create_server(service: ASRService, address: str, verbose: bool = False):
+    """按地址创建 HTTP 服务（tcp 或 unix）"""
+    kind, host, port = parse_address(address)
+    if kind == 'unix':
+        Path(host).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(host):
+            os.unlink(host)
+        server = _UnixHTTPServer(host, ASRRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ASRRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FunASR 常驻识别服务')
+    parser.add_argument('--listen', help=f'监听地址（默认 FUNASR_SERVER 或 {DEFAULT_SERVER}）')
+    parser.add_argument('--no-warmup', action='store_true', help='跳过模型预热')
+    parser.add_argument('--verbose', action='store_true', help='输出请求日志')
+    parser.add_argument('--batch-wait-ms', type=float, help='批处理最长等待（毫秒），默认 50')
+    parser.add_argument('--batch-seconds', type=float, help='每批音频总时长上限（秒），默认 120')
+    parser.add_argument('--batch-size', type=int, help='每批最大请求数，默认 16')
+    parser.add_argument('--workers', type=int, help='多进程工作池进程数（大于 1 时启用，默认单进程批处理）')
+    parser.add_argument('--threads-per-worker', type=int, help='每个工作进程的 torch 线程数，默认 1')
+    parser.add_argument('--pin-cpus', action='store_true', help='把工作进程绑定到互不重叠的 CPU 核心')
+    args = parser.parse_args()
+
+    if not Path(funasr_local.MODEL_DIR).exists():
+        print(f"Error: Model directory not found: {funasr_local.MODEL_DIR}", file=sys.stderr)
+        sys.exit(1)
+
+    address = args.listen or os.getenv('FUNASR_SERVER', DEFAULT_SERVER)
+    workers = args.workers or int(os.getenv('FUNASR_POOL_WORKERS', 0))
+    if workers > 1:
+        pool = ASRWorkerPool(workers=workers,
+                             threads_per_worker=args.threads_per_worker,
+                             pin_cpus=args.pin_cpus or None,
+                             warmup=None if args.no_warmup else funasr_local.warmup)
+        service = ASRService(warmup=not args.no_warmup, pool=pool)
+    else:
+        batcher = ASRBatcher(funasr_local.transcribe_batch,
+                             transcribe_one=funasr_local.transcribe,
+                             audio_seconds=funasr_local.audio_seconds,
+                             max_wait_ms=args.batch_wait_ms,
+                             max_batch_seconds=args.batch_seconds,
+                             max_batch_size=args.batch_size)
+        service = ASRService(warmup=not args.no_warmup, batcher=batcher)
+    server = create_server(service, address, verbose=args.verbose)
+
+    # 先开始监听，模型在后台加载；加载期间的识别请求会等待模型就绪
+    threading.Thread(target=service.load, daemon=True).start()
+    print(f"ASR server listening on {address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        (service.pool or service.batcher).close()
+        kind, host, _ = parse_address(address)
+        if kind == 'unix' and os.path.exists(host):
+            os.unlink(host)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASR 音频输入
+把各种形式的音频统一转换为模型输入：16kHz 单声道 float32 PCM（numpy 数组），全程在内存中完成。
+
+支持的输入：
+1. bytes / bytearray / memoryview：任意容器格式（飞书语音为 Ogg Opus）
+2. 文件对象（带 read 方法）
+3. numpy 数组：已解码的 PCM（int16 或浮点，可多声道，需给出采样率）
+
+解码优先使用 PyAV（libavcodec，进程内解码并重采样）；未安装时使用 soundfile 解码，
+再做多相滤波（scipy）或线性插值重采样。
+"""
+
+import io
+import importlib.util
+from typing import Optional, Union
+
+# PyAV 在首次解码时才导入
+PYAV_AVAILABLE = importlib.util.find_spec('av') is not None
+
+SAMPLE_RATE = 16000
+
+AudioInput = Union[str, bytes, bytearray, memoryview, io.IOBase, "np.ndarray"]
+
+
+def is_path(audio) -> bool:
+    """是否为文件路径输入"""
+    import os
+    return isinstance(audio, (str, os.PathLike))
+
+
+def _to_mono_float(samples, sample_rate: int):
+    """多声道取均值、整数样本归一化，并重采样到 16kHz"""
+    import numpy as np
+
+    samples = np.asarray(samples)
+    if np.issubdtype(samples.dtype, np.integer):
+        samples = samples.astype(np.float32) / float(np.iinfo(samples.dtype).max + 1)
+    samples = samples.astype(np.float32, copy=False)
+    if samples.ndim == 2:
+        # (frames, channels)
+        samples = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    return resample(samples, sample_rate)
+
+
+def resample(samples, sample_rate: int):
+    """单声道 float32 PCM 重采样到 16kHz"""
+    import numpy as np
+
+    if sample_rate == SAMPLE_RATE or len(samples) == 0:
+        return samples
+    try:
+        from math import gcd
+        from scipy.signal import resample_poly
+        g = gcd(SAMPLE_RATE, sample_rate)
+        return resample_poly(samples, SAMPLE_RATE // g, sample_rate // g).astype(np.float32)
+    except ImportError:
+        count = int(round(len(samples) * SAMPLE_RATE / sample_rate))
+        positions = np.arange(count, dtype=np.float64) * (sample_rate / SAMPLE_RATE)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def _decode_pyav(source) -> "np.ndarray":
+    """用 PyAV 解码并重采样为 16kHz 单声道 float32"""
+    import av
+    import numpy as np
+
+    chunks = []
+    with av.open(source) as container:
+        resampler = av.AudioResampler(format='flt', layout='mono', rate=SAMPLE_RATE)
+        for frame in container.decode(audio=0):
+            frame.pts = None
+            for resampled in resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray().reshape(-1))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32, copy=False)
+
+
+def _decode_soundfile(source) -> "np.ndarray":
+    """用 soundfile 解码（libsndfile ≥ 1.0.29 支持 Ogg Opus）后重采样"""
+    import soundfile
+
+    samples, sample_rate = soundfile.read(source, dtype='float32', always_2d=True)
+    return _to_mono_float(samples, sample_rate)
+
+
+def decode_bytes(data) -> "np.ndarray":
+    """把内存中的编码音频解码为 16kHz 单声道 float32 PCM"""
+    source = io.BytesIO(data)
+    if PYAV_AVAILABLE:
+        return _decode_pyav(source)
+    return _decode_soundfile(source)
+
+
+def load_pcm(audio: AudioInput, sample_rate: Optional[int] = None) -> "np.ndarray":
+    """
+    把内存中的音频转换为模型输入
+
+    Args:
+        audio: bytes / 文件对象 / numpy 数组
+        sample_rate: numpy 数组输入的采样率，默认 16000
+
+    Returns:
+        16kHz 单声道 float32 PCM
+    """
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return decode_bytes(audio)
+    if hasattr(audio, 'read'):
+        if PYAV_AVAILABLE:
+            return _decode_pyav(audio)
+        return _decode_soundfile(audio)
+    if hasattr(audio, 'dtype') and hasattr(audio, 'ndim'):
+        return _to_mono_float(audio, sample_rate or SAMPLE_RATE)
+    raise TypeError(f"Unsupported audio input: {type(audio).__name__}")
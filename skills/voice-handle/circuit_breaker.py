@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker - 熔断器与延迟估计
+
+1. CircuitBreaker：连续失败达到阈值后熔断（open），冷却期内不再放行请求；
+   冷却结束后进入半开（half_open），同时只放行一个试探请求，成功则恢复（closed），失败则再次熔断
+2. LatencyEstimator：按字符数估计合成耗时（指数滑动平均），用于确定对冲请求的等待期限
+"""
+
+import time
+import threading
+from typing import Callable, Optional
+
+
+class CircuitBreaker:
+    """按连续失败次数熔断（线程安全）"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 on_change: Optional[Callable[[str, str], None]] = None):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断后多久（秒）进入半开状态放行试探请求
+            on_change: 状态变化回调 (旧状态, 新状态)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        # 半开状态下试探请求的占用期限（试探请求未报告结果时，超过期限可再次试探）
+        self._probe_until = 0.0
+
+    def _set_state(self, state: str):
+        old, self._state = self._state, state
+        if old != state and self.on_change is not None:
+            self.on_change(old, state)
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._set_state(self.HALF_OPEN)
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def available(self) -> bool:
+        """是否可以放行请求（只检查，不占用半开状态的试探名额）"""
+        with self._lock:
+            state = self._current_state()
+            return state == self.CLOSED or (state == self.HALF_OPEN and
+                                            time.monotonic() >= self._probe_until)
+
+    def allow(self) -> bool:
+        """放行请求；半开状态同时只放行一个试探请求，由其结果决定恢复还是再次熔断"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if state == self.HALF_OPEN and now >= self._probe_until:
+                self._probe_until = now + self.reset_timeout
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_until = 0.0
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._current_state() == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._probe_until = 0.0
+                self._set_state(self.OPEN)
+
+
+class LatencyEstimator:
+    """每字符耗时的指数滑动平均"""
+
+    ALPHA = 0.2
+
+    def __init__(self, base_seconds: float = 0.3, per_char_seconds: float = 0.02):
+        """
+        Args:
+            base_seconds: 固定开销（秒），不参与平均
+            per_char_seconds: 初始每字符耗时（秒）
+        """
+        self.base_seconds = base_seconds
+        self.per_char_seconds = per_char_seconds
+        self._lock = threading.Lock()
+
+    def record(self, chars: int, seconds: float):
+        if chars <= 0:
+            return
+        observed = max(0.0, seconds - self.base_seconds) / chars
+        with self._lock:
+            self.per_char_seconds += self.ALPHA * (observed - self.per_char_seconds)
+
+    def estimate(self, chars: int) -> float:
+        """预估耗时（秒）"""
+        return self.base_seconds + self.per_char_seconds * chars
@@ -7,9 +7,11 @@ FunASR 本地模型语音识别脚本
 
 import sys
 import os
+import time
 from pathlib import Path
 import logging
 from contextlib import contextmanager
+from typing import Iterator, List, Optional
 
 # 检查是否在正确的环境中运行
 if "any4any" not in sys.executable.lower():
@@ -20,6 +22,9 @@ if "any4any" not in sys.executable.lower():
         result = subprocess.run([any4any_python] + sys.argv)
         sys.exit(result.returncode)
 
+from audio_input import AudioInput, SAMPLE_RATE, is_path, load_pcm
+from metrics import get_metrics
+
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
     sys.stderr.reconfigure(encoding='utf-8')
@@ -30,62 +35,375 @@ logging.getLogger("modelscope").setLevel(logging.ERROR)
 MODEL_DIR = r"E:\A4A\A4A\FunASR-ctx"
 VAD_MODEL_DIR = r"E:\A4A\A4A\modelscope\hub\models\iic\speech_fsmn_vad_zh-cn-16k-common-pytorch"
 
+# 单个 VAD 段的最长时长（毫秒）
+MAX_SINGLE_SEGMENT_MS = 30000
+# 流式识别每次读取并送入 VAD 的音频时长（毫秒）
+STREAM_CHUNK_MS = 200
+# 流式识别在静音时保留的回看音频（毫秒），VAD 判定语音起点有延迟
+STREAM_LOOKBACK_MS = 2000
+
+# 参与识别结果缓存键计算的识别参数
+CACHE_PARAMS = ("language", "use_itn", "merge_length_s")
+
 _model = None
+_vad_model = None
+_cache = None
+_cache_pid = None
+
+# 模型加载与预热耗时（秒），供常驻服务的健康检查输出
+model_stats = {"load_seconds": None, "warmup_seconds": None, "device": None}
+
+# 阶段耗时埋点（按 OPENCLAW_METRICS 配置，未配置时只计时）
+metrics = get_metrics()
 
 def get_model():
     global _model
     if _model is None:
+        with metrics.span("asr.model_load") as span:
+            from funasr import AutoModel
+            import torch
+            
+            device = "cuda:0" if torch.cuda.is_available() else "cpu"
+            span.set(device=device)
+            
+            try:
+                _model = AutoModel(
+                    model=MODEL_DIR,
+                    vad_model=VAD_MODEL_DIR,
+                    vad_kwargs={"max_single_segment_time": MAX_SINGLE_SEGMENT_MS},
+                    device=device,
+                    hub="ms",
+                    disable_update=True,
+                    trust_remote_code=True,
+                )
+            except Exception as e:
+                print(f"Model loading error: {e}", file=sys.stderr)
+                raise
+        model_stats["load_seconds"] = span.duration
+        model_stats["device"] = device
+    return _model
+
+def get_vad_model():
+    """单独加载的 VAD 模型（流式识别逐块调用）"""
+    global _vad_model
+    if _vad_model is None:
         from funasr import AutoModel
         import torch
         
-        device = "cuda:0" if torch.cuda.is_available() else "cpu"
-        
-        try:
-            _model = AutoModel(
-                model=MODEL_DIR,
-                vad_model=VAD_MODEL_DIR,
-                vad_kwargs={"max_single_segment_time": 30000},
-                device=device,
-                hub="ms",
-                disable_update=True,
-                trust_remote_code=True,
-            )
-        except Exception as e:
-            print(f"Model loading error: {e}", file=sys.stderr)
-            raise
-    return _model
+        _vad_model = AutoModel(
+            model=VAD_MODEL_DIR,
+            max_single_segment_time=MAX_SINGLE_SEGMENT_MS,
+            device="cuda:0" if torch.cuda.is_available() else "cpu",
+            hub="ms",
+            disable_update=True,
+        )
+    return _vad_model
 
-def transcribe(audio_path: str) -> str:
-    from funasr.utils.postprocess_utils import rich_transcription_postprocess
-    import re
+def warmup(seconds: float = 1.0):
+    """用一段静音跑一次推理，提前完成首次推理的初始化开销"""
+    import numpy as np
     
     model = get_model()
-    
-    res = model.generate(
-        input=audio_path,
+    start = time.perf_counter()
+    model.generate(
+        input=np.zeros(int(16000 * seconds), dtype=np.float32),
         cache={},
         language="auto",
         use_itn=True,
-        batch_size_s=60,
-        merge_vad=True,
-        merge_length_s=15,
     )
+    model_stats["warmup_seconds"] = time.perf_counter() - start
+
+# 识别参数（单条与批量识别共用）
+GENERATE_KWARGS = {
+    "language": "auto",
+    "use_itn": True,
+    "batch_size_s": 60,
+    "merge_vad": True,
+    "merge_length_s": 15,
+}
+
+def _postprocess(item) -> str:
+    """把模型单条输出转换为最终文本"""
+    from funasr.utils.postprocess_utils import rich_transcription_postprocess
+    import re
     
-    if not res or not res[0]:
+    if not item:
         return ""
     
-    raw_text = res[0]["text"]
+    raw_text = item["text"]
     clean_text = re.sub(r"<\|.*?\|>", "", raw_text)
-    final_text = rich_transcription_postprocess(clean_text)
+    return rich_transcription_postprocess(clean_text)
+
+def _model_input(audio: AudioInput):
+    """文件路径直接交给模型读取；内存音频解码为 16kHz PCM 后直接送入模型，不落盘"""
+    if is_path(audio):
+        return str(audio)
+    if hasattr(audio, "ndim"):
+        return load_pcm(audio)
+    with metrics.span("asr.decode", bytes=len(audio)) as span:
+        pcm = load_pcm(audio)
+        span.set(audio_seconds=len(pcm) / SAMPLE_RATE)
+    return pcm
+
+def _input_seconds(model_input) -> Optional[float]:
+    """模型输入的音频时长（秒），仅在启用埋点时读取文件头"""
+    if not metrics.enabled:
+        return None
+    if isinstance(model_input, str):
+        return audio_seconds(model_input)
+    return len(model_input) / SAMPLE_RATE
+
+@contextmanager
+def _inference_span(audio_secs: Optional[float], **attrs):
+    """推理耗时埋点，已知音频时长时记录实时率 (RTF = 推理耗时 / 音频时长)"""
+    with metrics.span("asr.inference", audio_seconds=audio_secs, **attrs) as span:
+        yield span
+        if audio_secs:
+            span.set(rtf=(time.perf_counter() - span.start) / audio_secs)
+
+def get_cache():
+    """
+    进程内共享的识别结果缓存，设置 FUNASR_NO_CACHE=1 时禁用
+    
+    SQLite 连接不能跨 fork 使用，工作进程中首次调用时重新打开。
+    """
+    global _cache, _cache_pid
+    if os.getenv("FUNASR_NO_CACHE", "").lower() in ("1", "true", "yes"):
+        return None
+    if _cache is None or _cache_pid != os.getpid():
+        from asr_cache import ASRCache
+        _cache = ASRCache()
+        _cache_pid = os.getpid()
+    return _cache
+
+def _cache_key(audio: AudioInput) -> str:
+    """音频内容哈希 + 模型 + 识别参数"""
+    from asr_cache import ASRCache, audio_digest
+    
+    params = {name: GENERATE_KWARGS[name] for name in CACHE_PARAMS}
+    return ASRCache.make_key(audio_digest(audio), f"{MODEL_DIR}|{VAD_MODEL_DIR}", params)
+
+def transcribe(audio: AudioInput, use_cache: bool = True, sample_rate: int = SAMPLE_RATE) -> str:
+    """
+    识别单条音频
+    
+    Args:
+        audio: 文件路径、编码音频 bytes（如飞书 Ogg Opus）、文件对象或 PCM numpy 数组
+        use_cache: 是否使用识别结果缓存（命中时不加载模型）
+        sample_rate: numpy 数组输入的采样率，默认 16kHz（其他输入的采样率由解码得到）
+        
+    Returns:
+        识别文本
+    """
+    if hasattr(audio, "read"):
+        audio = audio.read()
+    elif hasattr(audio, "ndim") and sample_rate != SAMPLE_RATE:
+        # 先重采样为 16kHz，缓存键与模型输入都基于重采样后的音频
+        audio = load_pcm(audio, sample_rate)
+    
+    cache = get_cache() if use_cache else None
+    key = None
+    if cache:
+        with metrics.span("asr.cache") as span:
+            key = _cache_key(audio)
+            text = cache.get(key)
+            span.set(hit=text is not None)
+        if text is not None:
+            return text
+    
+    model = get_model()
     
-    return final_text
+    model_input = _model_input(audio)
+    with _inference_span(_input_seconds(model_input), batch_size=1):
+        res = model.generate(input=model_input, cache={}, **GENERATE_KWARGS)
+    
+    text = _postprocess(res[0]) if res and res[0] else ""
+    if key:
+        cache.put(key, text)
+    return text
+
+def transcribe_batch(audios: List[AudioInput], use_cache: bool = True) -> List[str]:
+    """一次 generate 调用识别多个音频（缓存命中的不参与推理），返回与输入顺序一致的文本列表"""
+    audios = [audio.read() if hasattr(audio, "read") else audio for audio in audios]
+    texts = [None] * len(audios)
+    
+    cache = get_cache() if use_cache else None
+    keys = [None] * len(audios)
+    if cache:
+        with metrics.span("asr.cache", batch_size=len(audios)) as span:
+            keys = [_cache_key(audio) for audio in audios]
+            for i, key in enumerate(keys):
+                texts[i] = cache.get(key)
+            span.set(hits=sum(text is not None for text in texts))
+    
+    # 同一批内重复的音频只识别一次
+    first = {}
+    misses = []
+    for i, text in enumerate(texts):
+        if text is None and (keys[i] is None or keys[i] not in first):
+            first[keys[i]] = i
+            misses.append(i)
+    if misses:
+        model = get_model()
+        inputs = [_model_input(audios[i]) for i in misses]
+        seconds = [_input_seconds(model_input) for model_input in inputs]
+        total_seconds = None if None in seconds else sum(seconds)
+        with _inference_span(total_seconds, batch_size=len(inputs)):
+            res = model.generate(input=inputs, cache={}, **GENERATE_KWARGS)
+        res = res or []
+        if len(res) != len(misses):
+            raise RuntimeError(f"Batch result count mismatch: {len(res)} != {len(misses)}")
+        for i, item in zip(misses, res):
+            texts[i] = _postprocess(item)
+            if keys[i]:
+                cache.put(keys[i], texts[i])
+    return [texts[first[keys[i]]] if text is None else text for i, text in enumerate(texts)]
+
+def _iter_pcm_chunks(audio: AudioInput, chunk_samples: int) -> Iterator["np.ndarray"]:
+    """
+    按块读取 16kHz 单声道 float32 PCM，内存占用与音频长度无关
+    
+    16kHz 的 WAV/FLAC 等由 soundfile 直接分块读取；其他格式与采样率由 ffmpeg 流式解码重采样。
+    内存中的音频（语音消息体积很小）先整体解码为 PCM 再分块。
+    """
+    import numpy as np
+    
+    if not is_path(audio):
+        pcm = load_pcm(audio)
+        for i in range(0, len(pcm), chunk_samples):
+            yield pcm[i:i + chunk_samples]
+        return
+    
+    audio_path = str(audio)
+    try:
+        import soundfile
+        native = soundfile.info(audio_path).samplerate == SAMPLE_RATE
+    except Exception:
+        native = False
+    
+    if native:
+        for block in soundfile.blocks(audio_path, blocksize=chunk_samples,
+                                      dtype="float32", always_2d=True):
+            yield block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+        return
+    
+    import subprocess
+    proc = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", audio_path,
+         "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    finished = False
+    try:
+        while True:
+            data = proc.stdout.read(chunk_samples * 4)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.float32)
+        finished = True
+    finally:
+        if not finished:
+            proc.kill()
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg decode failed: {stderr.decode(errors='replace').strip()}")
+
+def transcribe_stream(audio: AudioInput, chunk_ms: int = STREAM_CHUNK_MS) -> Iterator[str]:
+    """
+    流式识别：分块读取音频并做流式 VAD，每个语音段（不超过 MAX_SINGLE_SEGMENT_MS）
+    识别完成后立即产出其文本
+    
+    Args:
+        audio: 音频文件路径或内存音频（同 transcribe）
+        chunk_ms: 每次读取的音频时长（毫秒）
+        
+    Yields:
+        各语音段的识别文本（按时间顺序，空段跳过）
+    """
+    import numpy as np
+    
+    model = get_model()
+    vad = get_vad_model()
+    
+    ms = SAMPLE_RATE // 1000
+    cache = {}
+    # 缓冲区只保存当前未结束的语音段及回看音频
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = 0
+    position = 0
+    speech_start = None
+    
+    def _decode(begin: int, end: int) -> str:
+        begin = max(begin, buffer_start)
+        segment = buffer[(begin - buffer_start) * ms:(end - buffer_start) * ms]
+        if len(segment) == 0:
+            return ""
+        with _inference_span(len(segment) / SAMPLE_RATE, batch_size=1, mode="stream"):
+            res = model.inference(segment, language=GENERATE_KWARGS["language"],
+                                  use_itn=GENERATE_KWARGS["use_itn"])
+        return _postprocess(res[0]) if res else ""
+    
+    chunks = _iter_pcm_chunks(audio, SAMPLE_RATE * chunk_ms // 1000)
+    current = next(chunks, None)
+    while current is not None:
+        following = next(chunks, None)
+        buffer = np.concatenate([buffer, current])
+        position += len(current) // ms
+        
+        res = vad.generate(input=current, cache=cache, is_final=following is None,
+                           chunk_size=chunk_ms)
+        for begin, end in (res[0]["value"] if res and res[0] else []):
+            if begin != -1:
+                speech_start = begin
+            if end != -1:
+                text = _decode(buffer_start if speech_start is None else speech_start, end)
+                speech_start = None
+                if text:
+                    yield text
+        
+        # 丢弃不再需要的音频，内存只与单段时长有关
+        keep_from = speech_start if speech_start is not None else position - STREAM_LOOKBACK_MS
+        if keep_from > buffer_start:
+            buffer = buffer[(keep_from - buffer_start) * ms:]
+            buffer_start = keep_from
+        current = following
+    
+    # 音频结束时仍未闭合的语音段
+    if speech_start is not None:
+        text = _decode(speech_start, position)
+        if text:
+            yield text
+
+def audio_seconds(audio: AudioInput) -> Optional[float]:
+    """读取音频时长（秒），无法识别格式时返回 None"""
+    if hasattr(audio, 'ndim'):
+        return len(audio) / SAMPLE_RATE
+    if not is_path(audio):
+        return None
+    audio_path = str(audio)
+    try:
+        import soundfile
+        return soundfile.info(audio_path).duration
+    except Exception:
+        pass
+    try:
+        import wave
+        with wave.open(audio_path, "rb") as f:
+            return f.getnframes() / f.getframerate()
+    except Exception:
+        return None
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python funasr_local.py <audio_file>", file=sys.stderr)
+        print("Usage: python funasr_local.py <audio_file> [--stream] [--no-cache]", file=sys.stderr)
         sys.exit(1)
     
     audio_file = sys.argv[1]
+    stream = "--stream" in sys.argv[2:]
+    use_cache = "--no-cache" not in sys.argv[2:]
     
     if not Path(audio_file).exists():
         print(f"Error: File not found: {audio_file}", file=sys.stderr)
@@ -97,8 +415,13 @@ if __name__ == "__main__":
         sys.exit(1)
     
     try:
-        text = transcribe(audio_file)
-        print(text)
+        if stream:
+            # 每识别完一段立即输出一行
+            for text in transcribe_stream(audio_file):
+                print(text, flush=True)
+        else:
+            text = transcribe(audio_file, use_cache=use_cache)
+            print(text)
     except Exception as e:
         import traceback
         print(f"Error during transcription: {e}", file=sys.stderr)
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Metrics - 阶段耗时埋点与指标导出（voice-handle 与 feishu-voice 共用）
+
+1. Span：记录一个阶段的耗时与属性（字节数、音频时长、实时率等），异常时标记 status=error
+2. 可插拔的输出端：
+   - JSONLinesSink：每个 span / 事件一行 JSON
+   - PrometheusSink：聚合为 Prometheus 文本格式（耗时直方图 + 数值属性累计），可写入
+     node_exporter textfile 目录；多个进程写同一文件时在文件锁下合并累计值
+   - ConsoleSink：把进度事件打印到终端（命令行入口使用）
+3. 未配置输出端时只做两次计时，开销可忽略
+
+通过 OPENCLAW_METRICS 环境变量配置默认实例，多个输出端以逗号分隔：
+    OPENCLAW_METRICS=jsonl:~/.openclaw/metrics.jsonl,prom:/var/lib/node_exporter/openclaw.prom
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def _file_lock(lock_path: str):
+    """跨进程文件锁（POSIX 使用 flock，Windows 使用 msvcrt）"""
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class MetricsSink:
+    """输出端基类"""
+
+    def span(self, record: dict):
+        pass
+
+    def event(self, record: dict):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class JSONLinesSink(MetricsSink):
+    """每条记录写一行 JSON"""
+
+    def __init__(self, path: Optional[str] = None, stream=None):
+        """
+        Args:
+            path: 输出文件（追加写入）
+            stream: 输出流，未指定 path 时使用，默认 stderr
+        """
+        self._lock = threading.Lock()
+        if path:
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._stream = open(path, 'a', encoding='utf-8', buffering=1)
+            self._owned = True
+        else:
+            self._stream = stream or sys.stderr
+            self._owned = False
+
+    def _write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._stream.write(line + '\n')
+
+    span = _write
+    event = _write
+
+    def flush(self):
+        with self._lock:
+            self._stream.flush()
+
+    def close(self):
+        self.flush()
+        if self._owned:
+            self._stream.close()
+
+
+class PrometheusSink(MetricsSink):
+    """聚合为 Prometheus 文本格式
+
+    - {prefix}_span_duration_seconds：按 span 名与字符串属性分组的直方图
+    - {prefix}_span_{属性}_total：COUNTER_ATTRS 中的数值属性（字节数、音频时长等）累计
+    - {prefix}_span_{属性}：GAUGE_ATTRS 中的比值类属性（如实时率）取最近一次的值
+    - {prefix}_events_total：事件计数
+
+    其余数值属性（段落序号等）只出现在 JSON 记录中。
+
+    每次命令行调用都是独立进程，写文件时不能直接用本进程的累计值覆盖：累计值保存在
+    {path}.json，写入时持文件锁读出，加上本进程自上次写入以来的增量后再生成文本文件，
+    计数器不会因进程退出而归零，并发进程也不会互相覆盖。比值类 gauge 取最后写入者的值。
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    COUNTER_ATTRS = frozenset({'bytes', 'input_bytes', 'mp3_bytes', 'chars',
+                               'audio_ms', 'audio_seconds', 'batch_size', 'hits',
+                               'wait_seconds'})
+    GAUGE_ATTRS = frozenset({'rtf'})
+
+    def __init__(self, path: Optional[str] = None, prefix: str = 'openclaw',
+                 write_interval: float = 5.0):
+        """
+        Args:
+            path: 输出文件（原子替换写入，同目录下的 .json / .lock 为共享累计值与文件锁），
+                  None 时只能通过 render() 获取
+            prefix: 指标名前缀
+            write_interval: 两次写文件的最小间隔（秒），close 时总会写入
+        """
+        self.path = os.path.expanduser(path) if path else None
+        self.prefix = prefix
+        self.write_interval = write_interval
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple, List] = {}
+        self._counters: Dict[Tuple, float] = {}
+        self._gauges: Dict[Tuple, float] = {}
+        self._events: Dict[Tuple, int] = {}
+        # 已合并进共享文件的部分，下次写入只累加之后的增量
+        self._written = {'histograms': {}, 'counters': {}, 'events': {}}
+        self._last_write = 0.0
+
+    @staticmethod
+    def _split(record: dict, skip=('ts', 'type', 'name', 'duration_ms')):
+        """把属性分为标签（字符串/布尔）与数值"""
+        labels, values = [], {}
+        for key, value in record.items():
+            if key in skip or value is None:
+                continue
+            if isinstance(value, bool) or isinstance(value, str):
+                labels.append((key, str(value).lower() if isinstance(value, bool) else value))
+            elif isinstance(value, (int, float)):
+                values[key] = value
+        return tuple(sorted(labels)), values
+
+    def span(self, record: dict):
+        labels, values = self._split(record)
+        key = (record['name'],) + labels
+        seconds = record['duration_ms'] / 1000
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.BUCKETS), 0, 0.0]
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+            for attr, value in values.items():
+                if attr in self.GAUGE_ATTRS:
+                    self._gauges[(attr,) + key] = value
+                elif attr in self.COUNTER_ATTRS:
+                    self._counters[(attr,) + key] = self._counters.get((attr,) + key, 0) + value
+        self._maybe_write()
+
+    def event(self, record: dict):
+        labels, _ = self._split(record, skip=('ts', 'type', 'name', 'message'))
+        key = (record['name'],) + labels
+        with self._lock:
+            self._events[key] = self._events.get(key, 0) + 1
+        self._maybe_write()
+
+    @staticmethod
+    def _escape_label(value) -> str:
+        """按 Prometheus 文本格式转义标签值中的反斜杠、双引号与换行"""
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @classmethod
+    def _format_labels(cls, labels) -> str:
+        return '{' + ','.join(f'{k}="{cls._escape_label(v)}"' for k, v in labels) + '}'
+
+    def render(self) -> str:
+        """生成本进程累计值的 Prometheus 文本格式"""
+        with self._lock:
+            return self._render(self._histograms, self._counters, self._gauges, self._events)
+
+    def _render(self, histograms: dict, counters: dict, gauges: dict, events: dict) -> str:
+        p = self.prefix
+        lines = []
+        if histograms:
+            lines.append(f'# TYPE {p}_span_duration_seconds histogram')
+        for (name, *labels), (buckets, count, total) in sorted(histograms.items()):
+            base = [('span', name)] + labels
+            for bound, value in zip(self.BUCKETS, buckets):
+                lines.append(f'{p}_span_duration_seconds_bucket'
+                             f'{self._format_labels(base + [("le", repr(bound))])} {value}')
+            lines.append(f'{p}_span_duration_seconds_bucket'
+                         f'{self._format_labels(base + [("le", "+Inf")])} {count}')
+            lines.append(f'{p}_span_duration_seconds_count{self._format_labels(base)} {count}')
+            lines.append(f'{p}_span_duration_seconds_sum{self._format_labels(base)} {total}')
+
+        typed = set()
+        for (attr, name, *labels), value in sorted(counters.items()):
+            metric = f'{p}_span_{attr}_total'
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} counter')
+                typed.add(metric)
+            lines.append(f'{metric}{self._format_labels([("span", name)] + labels)} {value}')
+        for (attr, name, *labels), value in sorted(gauges.items()):
+            metric = f'{p}_span_{attr}'
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} gauge')
+                typed.add(metric)
+            lines.append(f'{metric}{self._format_labels([("span", name)] + labels)} {value}')
+
+        if events:
+            lines.append(f'# TYPE {p}_events_total counter')
+        for (name, *labels), value in sorted(events.items()):
+            lines.append(f'{p}_events_total{self._format_labels([("event", name)] + labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _maybe_write(self):
+        with self._lock:
+            if self.path and time.monotonic() - self._last_write >= self.write_interval:
+                self._write_locked()
+
+    def flush(self):
+        with self._lock:
+            if self.path:
+                self._write_locked()
+
+    def _load_state(self, state_path: str) -> dict:
+        """读取共享累计值，文件不存在或损坏时从零开始"""
+        state = {'histograms': {}, 'counters': {}, 'gauges': {}, 'events': {}}
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for kind in state:
+                state[kind] = {tuple(tuple(item) if isinstance(item, list) else item for item in key): value
+                               for key, value in data.get(kind, [])}
+        except (OSError, ValueError, TypeError):
+            return {'histograms': {}, 'counters': {}, 'gauges': {}, 'events': {}}
+        # 桶边界变化后旧直方图无法合并，丢弃
+        state['histograms'] = {key: value for key, value in state['histograms'].items()
+                               if len(value[0]) == len(self.BUCKETS)}
+        return state
+
+    @staticmethod
+    def _replace(path: str, content: str):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _write_locked(self):
+        """把自上次写入以来的增量合并进共享文件（调用方持有 self._lock）"""
+        self._last_write = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        written = self._written
+        state_path = f'{self.path}.json'
+        with _file_lock(f'{self.path}.lock'):
+            state = self._load_state(state_path)
+
+            histograms = state['histograms']
+            for key, (buckets, count, total) in self._histograms.items():
+                done = written['histograms'].get(key)
+                if done is not None:
+                    if count == done[1]:
+                        continue
+                    buckets = [value - old for value, old in zip(buckets, done[0])]
+                    count, total = count - done[1], total - done[2]
+                merged = histograms.setdefault(key, [[0] * len(self.BUCKETS), 0, 0.0])
+                merged[0] = [value + delta for value, delta in zip(merged[0], buckets)]
+                merged[1] += count
+                merged[2] += total
+            for kind, current in (('counters', self._counters), ('events', self._events)):
+                merged = state[kind]
+                for key, value in current.items():
+                    delta = value - written[kind].get(key, 0)
+                    if delta:
+                        merged[key] = merged.get(key, 0) + delta
+            state['gauges'].update(self._gauges)
+
+            self._replace(state_path, json.dumps(
+                {kind: [[list(key), value] for key, value in items.items()]
+                 for kind, items in state.items()}, ensure_ascii=False))
+            self._replace(self.path, self._render(state['histograms'], state['counters'],
+                                                  state['gauges'], state['events']))
+
+        self._written = {
+            'histograms': {key: [list(buckets), count, total]
+                           for key, (buckets, count, total) in self._histograms.items()},
+            'counters': dict(self._counters),
+            'events': dict(self._events),
+        }
+
+
+class ConsoleSink(MetricsSink):
+    """把带 message 的事件打印到终端"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def event(self, record: dict):
+        message = record.get('message')
+        if message is not None:
+            print(message, file=self.stream or sys.stdout)
+
+
+class Span:
+    """阶段计时（上下文管理器）"""
+
+    __slots__ = ('metrics', 'name', 'attrs', 'timings', 'start', 'duration')
+
+    def __init__(self, metrics: 'Metrics', name: str, timings: Optional[dict], attrs: dict):
+        self.metrics = metrics
+        self.name = name
+        self.attrs = attrs
+        self.timings = timings
+        self.start = 0.0
+        self.duration = 0.0
+
+    def set(self, **attrs):
+        """补充属性（如合成完成后的字节数）"""
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if self.timings is not None:
+            # 阶段名取 span 名最后一段，如 feishu_voice.tts → tts
+            self.timings[self.name.rsplit('.', 1)[-1]] = self.duration
+        if self.metrics.sinks:
+            record = {'ts': time.time(), 'type': 'span', 'name': self.name,
+                      'duration_ms': self.duration * 1000,
+                      'status': 'error' if exc_type else 'ok'}
+            if exc_type:
+                record['error'] = exc_type.__name__
+            record.update(self.attrs)
+            self.metrics._emit('span', record)
+        return False
+
+
+class Metrics:
+    """埋点入口，持有输出端列表"""
+
+    def __init__(self, sinks: Optional[List[MetricsSink]] = None):
+        self.sinks: List[MetricsSink] = list(sinks or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    def add_sink(self, sink: MetricsSink) -> MetricsSink:
+        self.sinks.append(sink)
+        return sink
+
+    def span(self, name: str, timings: Optional[dict] = None, **attrs) -> Span:
+        """
+        创建阶段计时
+
+        Args:
+            name: span 名，如 feishu_voice.upload
+            timings: 若提供，结束时把耗时（秒）写入 timings[阶段名]
+            attrs: 属性，字符串/布尔为标签，数值为度量
+        """
+        return Span(self, name, timings, attrs)
+
+    def event(self, name: str, message: Optional[str] = None, **fields):
+        """记录事件；message 为给人看的进度文字（ConsoleSink 会打印）"""
+        if not self.sinks:
+            return
+        record = {'ts': time.time(), 'type': 'event', 'name': name}
+        if message is not None:
+            record['message'] = message
+        record.update(fields)
+        self._emit('event', record)
+
+    def _emit(self, kind: str, record: dict):
+        for sink in self.sinks:
+            try:
+                getattr(sink, kind)(record)
+            except Exception as e:
+                print(f"Warning: Metrics sink {type(sink).__name__} failed: {e}", file=sys.stderr)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def sinks_from_spec(spec: str) -> List[MetricsSink]:
+    """
+    解析输出端配置
+
+    Args:
+        spec: 逗号分隔，如 "jsonl:/path/metrics.jsonl,prom:/path/openclaw.prom,console"
+              jsonl 不带路径时写到 stderr
+    """
+    sinks = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        kind, _, target = item.partition(':')
+        if kind == 'jsonl':
+            sinks.append(JSONLinesSink(target or None))
+        elif kind == 'prom':
+            sinks.append(PrometheusSink(target or None))
+        elif kind == 'console':
+            sinks.append(ConsoleSink())
+        else:
+            raise ValueError(f"Unknown metrics sink: {item}")
+    return sinks
+
+
+_default_metrics: Optional[Metrics] = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """进程内共享的默认实例（按 OPENCLAW_METRICS 配置，进程退出时写出）"""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            sinks = []
+            spec = os.getenv('OPENCLAW_METRICS')
+            if spec:
+                try:
+                    sinks = sinks_from_spec(spec)
+                except (ValueError, OSError) as e:
+                    print(f"Warning: Metrics disabled: {e}", file=sys.stderr)
+            _default_metrics = Metrics(sinks)
+            atexit.register(_default_metrics.close)
+        return _default_metrics
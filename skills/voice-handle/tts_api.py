@@ -6,27 +6,77 @@ TTS API - 语音合成接口
 
 import os
 import sys
+import queue
+import importlib.util
 import asyncio
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, as_completed, wait
 from pathlib import Path
 
+from circuit_breaker import CircuitBreaker, LatencyEstimator
+from metrics import ConsoleSink, Metrics, get_metrics
+
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
     sys.stderr.reconfigure(encoding='utf-8')
 
+# 引擎 SDK 按需导入：启动时只检查是否安装，首次使用对应引擎的音色时才导入
+
 # CosyVoice (DashScope)
-try:
-    import dashscope
-    from dashscope.audio.tts_v2 import SpeechSynthesizer
-    DASHSCOPE_AVAILABLE = True
-except ImportError:
-    DASHSCOPE_AVAILABLE = False
+DASHSCOPE_AVAILABLE = importlib.util.find_spec('dashscope') is not None
+dashscope = None
+SpeechSynthesizer = None
+ResultCallback = None
+SpeechSynthesizerObjectPool = None
 
 # Edge TTS
-try:
-    import edge_tts
-    EDGE_TTS_AVAILABLE = True
-except ImportError:
-    EDGE_TTS_AVAILABLE = False
+EDGE_TTS_AVAILABLE = importlib.util.find_spec('edge_tts') is not None
+edge_tts = None
+
+_import_lock = threading.Lock()
+
+
+def _load_dashscope() -> bool:
+    """导入 DashScope SDK，返回是否可用"""
+    global dashscope, SpeechSynthesizer, ResultCallback, SpeechSynthesizerObjectPool
+    global DASHSCOPE_AVAILABLE
+    if SpeechSynthesizer is not None:
+        return True
+    with _import_lock:
+        if SpeechSynthesizer is not None:
+            return True
+        try:
+            import dashscope as _dashscope
+            from dashscope.audio.tts_v2 import SpeechSynthesizer as _synthesizer, ResultCallback as _callback
+        except ImportError:
+            DASHSCOPE_AVAILABLE = False
+            return False
+        try:
+            # 新版 SDK 提供合成器对象池，可复用 WebSocket 连接
+            from dashscope.audio.tts_v2 import SpeechSynthesizerObjectPool as _pool
+        except ImportError:
+            _pool = None
+        dashscope, ResultCallback, SpeechSynthesizerObjectPool = _dashscope, _callback, _pool
+        SpeechSynthesizer = _synthesizer
+        return True
+
+
+def _load_edge_tts() -> bool:
+    """导入 edge_tts，返回是否可用"""
+    global edge_tts, EDGE_TTS_AVAILABLE
+    if edge_tts is not None:
+        return True
+    with _import_lock:
+        if edge_tts is not None:
+            return True
+        try:
+            import edge_tts as _edge_tts
+        except ImportError:
+            EDGE_TTS_AVAILABLE = False
+            return False
+        edge_tts = _edge_tts
+        return True
 
 
 class TTSAPI:
@@ -58,6 +108,27 @@ class TTSAPI:
     DEFAULT_VOICE = 'longwan'
     TTS_MODEL = 'cosyvoice-v1'
     
+    # CosyVoice 合成器对象池大小，0 表示不使用对象池（每次合成新建连接）
+    DEFAULT_POOL_SIZE = 0
+    
+    # 流式合成时等待下一个音频块的超时（秒）
+    STREAM_CHUNK_TIMEOUT = 30
+    
+    # 对冲请求：主引擎超过 预估耗时 × HEDGE_FACTOR（不少于 hedge_delay，默认 HEDGE_MIN_DELAY 秒）仍未返回时，
+    # 同时向备用引擎发起请求，取先成功的结果
+    HEDGE_FACTOR = 2.0
+    HEDGE_MIN_DELAY = 1.0
+    
+    # 熔断：连续失败次数阈值与冷却时间（秒）
+    BREAKER_FAILURES = 5
+    BREAKER_RESET_SECONDS = 30.0
+    
+    # 跨引擎备用音色（按性别）
+    FALLBACK_VOICES = {
+        'edge': {'女': 'zh-CN-XiaoxiaoNeural', '男': 'zh-CN-YunxiNeural'},
+        'cosyvoice': {'女': 'longwan', '男': 'longxiaocheng'},
+    }
+    
     # Edge TTS 音色列表
     EDGE_VOICES = {
         'zh-CN-XiaoxiaoNeural': {'name': '晓晓', 'gender': '女', 'style': '温柔自然', 'engine': 'edge'},
@@ -86,23 +157,47 @@ class TTSAPI:
         '专业': ['longxiaocheng', 'longshuo'],
     }
     
-    def __init__(self, api_key=None, prefer_engine=None):
+    def __init__(self, api_key=None, prefer_engine=None, metrics: Metrics = None,
+                 hedge: bool = None, hedge_delay: float = None, pool_size: int = None):
         """
         初始化 TTS
         
         Args:
             api_key: DashScope API Key（可选，Edge TTS 不需要）
             prefer_engine: 优先使用的引擎 'cosyvoice' 或 'edge'，None 表示自动选择
+            metrics: 合成耗时埋点，默认使用按 OPENCLAW_METRICS 配置的共享实例
+            hedge: 主引擎超时后是否向备用引擎发起对冲请求，默认开启（TTS_HEDGE=0 关闭）
+            hedge_delay: 对冲等待时间下限（秒），默认读取 TTS_HEDGE_DELAY，否则为 HEDGE_MIN_DELAY；
+                         实际等待时间按历史耗时估计，不低于该值
+            pool_size: CosyVoice 合成器对象池大小，默认读取 TTS_POOL_SIZE，否则为 DEFAULT_POOL_SIZE；
+                       大于 0 且 SDK 支持时各次合成复用池中已建立的连接
         """
         self.api_key = api_key or os.getenv('DASHSCOPE_API_KEY')
         self.prefer_engine = prefer_engine
+        self.metrics = metrics or get_metrics()
+        self.hedge = hedge if hedge is not None else os.getenv('TTS_HEDGE', '1') not in ('0', 'false', 'no')
+        self.hedge_delay = hedge_delay or float(os.getenv('TTS_HEDGE_DELAY', self.HEDGE_MIN_DELAY))
+        self.pool_size = pool_size if pool_size is not None else \
+            int(os.getenv('TTS_POOL_SIZE', self.DEFAULT_POOL_SIZE))
         
-        # 初始化 DashScope
-        if DASHSCOPE_AVAILABLE and self.api_key:
-            dashscope.api_key = self.api_key
+        # 各引擎熔断器与耗时估计
+        failures = int(os.getenv('TTS_BREAKER_FAILURES', self.BREAKER_FAILURES))
+        reset = float(os.getenv('TTS_BREAKER_RESET', self.BREAKER_RESET_SECONDS))
+        self.breakers = {
+            engine: CircuitBreaker(failures, reset, on_change=self._breaker_listener(engine))
+            for engine in ('cosyvoice', 'edge')
+        }
+        self.latency = {'cosyvoice': LatencyEstimator(0.3, 0.05), 'edge': LatencyEstimator(0.5, 0.03)}
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'hedged': 0, 'fallback': 0, 'failed': 0,
+                       'engines': {'cosyvoice': 0, 'edge': 0}}
         
         # 确定可用的引擎
         self._check_engines()
+        
+        # CosyVoice 合成器对象池（启用且 SDK 支持时懒加载）
+        self._cosyvoice_pool = None
+        self._cosyvoice_pool_lock = threading.Lock()
     
     def _check_engines(self):
         """检查可用的 TTS 引擎"""
@@ -116,25 +211,235 @@ class TTSAPI:
         """判断是否为 Edge TTS 音色"""
         return voice in self.EDGE_VOICES
     
-    def _tts_cosyvoice(self, text: str, voice: str, output_file: str) -> str:
-        """使用 CosyVoice 合成语音"""
+    def _require_cosyvoice(self):
+        """导入 DashScope SDK 并设置 API Key（首次使用 CosyVoice 时）"""
+        if not _load_dashscope():
+            raise RuntimeError("dashscope 导入失败，CosyVoice 不可用")
+        if dashscope is not None and dashscope.api_key != self.api_key:
+            dashscope.api_key = self.api_key
+    
+    def _require_edge_tts(self):
+        """导入 edge_tts（首次使用 Edge TTS 时）"""
+        if not _load_edge_tts():
+            raise RuntimeError("edge_tts 导入失败，Edge TTS 不可用")
+    
+    def _tts_cosyvoice_bytes(self, text: str, voice: str) -> bytes:
+        """使用 CosyVoice 合成语音，返回 MP3 字节（启用对象池时复用池中的连接）"""
+        self._require_cosyvoice()
+        pool = self._get_cosyvoice_pool()
+        if pool is not None:
+            return self._tts_cosyvoice_pooled(text, voice, pool)
         synthesizer = SpeechSynthesizer(model=self.TTS_MODEL, voice=voice)
-        audio_data = synthesizer.call(text)
+        return synthesizer.call(text)
+    
+    def _drain_chunks(self, chunks: queue.Queue):
+        """从队列中依次取出音频块，None 表示结束，异常对象表示失败"""
+        while True:
+            try:
+                item = chunks.get(timeout=self.STREAM_CHUNK_TIMEOUT)
+            except queue.Empty:
+                raise TimeoutError(f"{self.STREAM_CHUNK_TIMEOUT} 秒内未收到音频数据")
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    
+    def _tts_cosyvoice_stream(self, text: str, voice: str):
+        """使用 CosyVoice 回调接口流式合成，音频块到达即产出"""
+        self._require_cosyvoice()
+        chunks = queue.Queue()
+        
+        class _Callback(ResultCallback):
+            def on_data(self, data: bytes):
+                chunks.put(data)
+            
+            def on_complete(self):
+                chunks.put(None)
+            
+            def on_error(self, message):
+                chunks.put(RuntimeError(f"CosyVoice 合成失败: {message}"))
         
-        if audio_data:
-            with open(output_file, 'wb') as f:
-                f.write(audio_data)
-            return output_file
-        return None
+        def _call():
+            try:
+                synthesizer.call(text)
+            except Exception as e:
+                chunks.put(e)
+        
+        synthesizer = SpeechSynthesizer(model=self.TTS_MODEL, voice=voice, callback=_Callback())
+        threading.Thread(target=_call, daemon=True).start()
+        return self._drain_chunks(chunks)
     
-    def _tts_edge(self, text: str, voice: str, output_file: str) -> str:
-        """使用 Edge TTS 合成语音"""
-        async def _generate():
-            communicate = edge_tts.Communicate(text, voice)
-            await communicate.save(output_file)
+    def _tts_edge_stream(self, text: str, voice: str):
+        """使用 Edge TTS 流式合成，音频块到达即产出"""
+        self._require_edge_tts()
+        chunks = queue.Queue()
         
-        asyncio.run(_generate())
-        return output_file
+        async def _produce():
+            try:
+                communicate = edge_tts.Communicate(text, voice)
+                async for chunk in communicate.stream():
+                    if chunk['type'] == 'audio':
+                        chunks.put(chunk['data'])
+                chunks.put(None)
+            except Exception as e:
+                chunks.put(e)
+        
+        threading.Thread(target=asyncio.run, args=(_produce(),), daemon=True).start()
+        return self._drain_chunks(chunks)
+    
+    def _get_cosyvoice_pool(self):
+        """获取 CosyVoice 合成器对象池，未启用（pool_size 为 0）或 SDK 不支持时返回 None"""
+        if self.pool_size <= 0 or SpeechSynthesizerObjectPool is None:
+            return None
+        with self._cosyvoice_pool_lock:
+            if self._cosyvoice_pool is None:
+                self._cosyvoice_pool = SpeechSynthesizerObjectPool(max_size=self.pool_size)
+            return self._cosyvoice_pool
+    
+    def _tts_cosyvoice_pooled(self, text: str, voice: str, pool) -> bytes:
+        """从对象池借用合成器合成，用完归还以复用连接
+        
+        合成失败时连接状态未知（可能残留未结束的任务），先关闭连接再归还：
+        对象池不会借出未连接的合成器，后台线程会为其重建连接。
+        """
+        synthesizer = pool.borrow_synthesizer(model=self.TTS_MODEL, voice=voice)
+        audio_data = None
+        try:
+            audio_data = synthesizer.call(text)
+            return audio_data
+        finally:
+            if not audio_data:
+                try:
+                    synthesizer.close()
+                except Exception:
+                    pass
+            pool.return_synthesizer(synthesizer)
+    
+    async def _atts_edge_bytes(self, text: str, voice: str) -> bytes:
+        """使用 Edge TTS 异步合成语音，返回 MP3 字节"""
+        self._require_edge_tts()
+        chunks = []
+        communicate = edge_tts.Communicate(text, voice)
+        async for chunk in communicate.stream():
+            if chunk['type'] == 'audio':
+                chunks.append(chunk['data'])
+        return b''.join(chunks)
+    
+    def _tts_edge_bytes(self, text: str, voice: str) -> bytes:
+        """使用 Edge TTS 合成语音，返回 MP3 字节"""
+        return asyncio.run(self._atts_edge_bytes(text, voice))
+    
+    def _breaker_listener(self, engine: str):
+        def _on_change(old: str, new: str):
+            self.metrics.event('tts.breaker', f"TTS 引擎 {engine} 熔断器: {old} → {new}",
+                               engine=engine, state=new)
+        return _on_change
+    
+    def _fallback_voice(self, engine: str, voice: str):
+        """另一个引擎中同性别的备用音色，返回 (引擎, 音色)，不可用时返回 None"""
+        other = 'edge' if engine == 'cosyvoice' else 'cosyvoice'
+        if not (self.edge_tts_available if other == 'edge' else self.cosyvoice_available):
+            return None
+        info = self.VOICES.get(voice) or self.EDGE_VOICES.get(voice) or {}
+        return other, self.FALLBACK_VOICES[other].get(info.get('gender'), self.FALLBACK_VOICES[other]['女'])
+    
+    def _plan(self, voice):
+        """
+        确定候选 (引擎, 音色) 列表：主引擎在前，备用引擎在后，跳过熔断中的引擎
+        
+        Returns:
+            (候选列表, 主引擎)
+        """
+        engine, voice = self.resolve_voice(voice)
+        if engine is None:
+            raise RuntimeError("没有可用的 TTS 引擎")
+        candidates = [(engine, voice)]
+        fallback = self._fallback_voice(engine, voice)
+        if fallback:
+            candidates.append(fallback)
+        # 备用引擎只在实际发起对冲时占用半开状态的试探名额
+        allowed = [c for c in candidates if self.breakers[c[0]].available()]
+        if not allowed or not self.breakers[allowed[0][0]].allow():
+            raise RuntimeError(f"TTS 引擎熔断中: {', '.join(c[0] for c in candidates)}")
+        return allowed, engine
+    
+    def _hedge_after(self, engine: str, text: str) -> float:
+        """主引擎的对冲等待期限（秒）"""
+        return max(self.hedge_delay, self.latency[engine].estimate(len(text)) * self.HEDGE_FACTOR)
+    
+    def _record_outcome(self, engine: str, text: str, seconds: float, ok: bool):
+        """更新熔断器与耗时估计"""
+        if ok:
+            self.breakers[engine].record_success()
+            self.latency[engine].record(len(text), seconds)
+        else:
+            self.breakers[engine].record_failure()
+    
+    @staticmethod
+    def _submit(func, *args) -> Future:
+        """在守护线程中执行（对冲中落后的请求继续完成以更新熔断器，但不阻止进程退出）"""
+        future = Future()
+        
+        def _run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=_run, daemon=True).start()
+        return future
+    
+    def _synthesize(self, engine: str, voice: str, text: str) -> bytes:
+        """调用单个引擎合成，记录结果；结果为空视为失败"""
+        start = time.perf_counter()
+        try:
+            if engine == 'edge':
+                audio_data = self._tts_edge_bytes(text, voice)
+            else:
+                audio_data = self._tts_cosyvoice_bytes(text, voice)
+        except Exception:
+            self._record_outcome(engine, text, time.perf_counter() - start, False)
+            raise
+        self._record_outcome(engine, text, time.perf_counter() - start, bool(audio_data))
+        if not audio_data:
+            raise RuntimeError(f"{engine} 合成结果为空")
+        return audio_data
+    
+    async def _asynthesize(self, engine: str, voice: str, text: str) -> bytes:
+        """协程版 _synthesize（Edge TTS 在事件循环中合成，CosyVoice 在线程池中执行）"""
+        if engine == 'cosyvoice':
+            return await asyncio.wrap_future(self._submit(self._synthesize, engine, voice, text))
+        start = time.perf_counter()
+        try:
+            audio_data = await self._atts_edge_bytes(text, voice)
+        except Exception:
+            self._record_outcome(engine, text, time.perf_counter() - start, False)
+            raise
+        self._record_outcome(engine, text, time.perf_counter() - start, bool(audio_data))
+        if not audio_data:
+            raise RuntimeError(f"{engine} 合成结果为空")
+        return audio_data
+    
+    def _count(self, engine: str = None, hedged: bool = False, fallback: bool = False):
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['hedged'] += hedged
+            self._stats['fallback'] += fallback
+            if engine is None:
+                self._stats['failed'] += 1
+            else:
+                self._stats['engines'][engine] += 1
+    
+    def stats(self) -> dict:
+        """请求数、对冲次数、备用引擎命中率、各引擎选用次数与熔断状态"""
+        with self._stats_lock:
+            stats = dict(self._stats, engines=dict(self._stats['engines']))
+        stats['fallback_rate'] = stats['fallback'] / stats['requests'] if stats['requests'] else 0.0
+        stats['breakers'] = {engine: breaker.state for engine, breaker in self.breakers.items()}
+        return stats
     
     def match_voice(self, description: str) -> str:
         """根据语义描述匹配音色
@@ -208,12 +513,220 @@ class TTSAPI:
         
         return result
     
+    def resolve_voice(self, voice=None):
+        """确定实际使用的引擎和音色
+        
+        Args:
+            voice: 音色代码或语义描述
+            
+        Returns:
+            tuple: (引擎 'cosyvoice'/'edge'，音色代码)，无可用引擎时引擎为 None
+        """
+        if voice is None:
+            # 根据优先引擎选择默认音色
+            if self.prefer_engine == 'edge' and self.edge_tts_available:
+                voice = 'zh-CN-XiaoxiaoNeural'
+            else:
+                voice = self.DEFAULT_VOICE
+        elif voice not in self.VOICES and voice not in self.EDGE_VOICES:
+            # 尝试匹配 CosyVoice 音色
+            voice = self.match_voice(voice)
+        
+        if self._is_edge_voice(voice):
+            if not self.edge_tts_available:
+                self.metrics.event('tts.engine_unavailable', "Edge TTS 不可用，尝试使用 CosyVoice",
+                                   engine='edge', voice=voice)
+                return None, voice
+            return 'edge', voice
+        
+        if not self.cosyvoice_available:
+            self.metrics.event('tts.engine_unavailable', "CosyVoice 不可用，尝试使用 Edge TTS",
+                               engine='cosyvoice', voice=voice)
+            if self.edge_tts_available:
+                return 'edge', 'zh-CN-XiaoxiaoNeural'
+            return None, voice
+        return 'cosyvoice', voice
+    
+    def tts_bytes(self, text, voice=None):
+        """语音合成，直接返回内存中的 MP3 字节（不写文件）
+        
+        主引擎超过等待期限仍未返回、或直接失败时，向另一引擎的同性别音色发起对冲请求，
+        取先成功的结果；熔断中的引擎直接跳过。选用的引擎、是否对冲、是否使用备用引擎
+        记录在 tts.synthesize 埋点与 stats() 中。需要知道实际合成音色时使用 tts_result。
+        
+        Args:
+            text: 要合成的文字
+            voice: 音色代码或语义描述
+            
+        Returns:
+            bytes: MP3 音频数据，所有候选引擎都失败时返回 None
+        """
+        return self.tts_result(text, voice)['data']
+    
+    def tts_result(self, text, voice=None):
+        """语音合成，同 tts_bytes，另外返回实际使用的引擎与音色
+        
+        对冲时音频可能来自备用引擎的音色，按音色缓存或校准语速的调用方应以返回的 voice 为准。
+        
+        Args:
+            text: 要合成的文字
+            voice: 音色代码或语义描述
+            
+        Returns:
+            dict: {'engine', 'voice', 'data': MP3 字节或 None, 'hedged', 'fallback',
+                   'error': 错误信息或 None}
+        """
+        with self.metrics.span('tts.synthesize', chars=len(text)) as span:
+            try:
+                candidates, primary = self._plan(voice)
+                futures = {self._submit(self._synthesize, *candidates[0], text): candidates[0]}
+                if len(candidates) > 1:
+                    # 关闭对冲时仍在主引擎失败后改用备用引擎
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED,
+                                   timeout=self._hedge_after(candidates[0][0], text) if self.hedge else None)
+                    if (not done or next(iter(done)).exception() is not None) \
+                            and self.breakers[candidates[1][0]].allow():
+                        futures[self._submit(self._synthesize, *candidates[1], text)] = candidates[1]
+                
+                error = None
+                for future in as_completed(futures):
+                    try:
+                        audio_data = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    return self._finish(span, futures[future], primary, len(futures) > 1, audio_data)
+                raise error
+                
+            except Exception as e:
+                return self._failed(span, e)
+    
+    def _finish(self, span, chosen, primary: str, hedged: bool, audio_data: bytes) -> dict:
+        """记录选用的引擎、是否对冲、是否使用了备用引擎"""
+        engine, voice = chosen
+        fallback = engine != primary
+        self._count(engine, hedged, fallback)
+        span.set(engine=engine, voice=voice, hedged=hedged, fallback=fallback,
+                 bytes=len(audio_data))
+        return {'engine': engine, 'voice': voice, 'data': audio_data, 'hedged': hedged,
+                'fallback': fallback, 'error': None}
+    
+    def _failed(self, span, error: Exception) -> dict:
+        self.metrics.event('tts.error', f"合成出错: {error}", error=type(error).__name__)
+        self._count()
+        span.set(status='error', error=type(error).__name__)
+        return {'engine': None, 'voice': None, 'data': None, 'hedged': False,
+                'fallback': False, 'error': str(error)}
+    
+    def tts_stream(self, text, voice=None, info=None):
+        """流式语音合成，边合成边产出 MP3 音频块
+        
+        下游（如转码）可在合成完成前开始处理，降低首包与整体延迟。
+        与 tts 不同，失败时直接抛出异常。
+        
+        Args:
+            text: 要合成的文字
+            voice: 音色代码或语义描述
+            info: 若提供，写入实际使用的 {'engine', 'voice', 'fallback'}
+                  （主引擎熔断时改用备用引擎的音色）
+            
+        Returns:
+            Iterator[bytes]: MP3 音频块
+        """
+        # 流式合成不做对冲，但跳过熔断中的引擎
+        candidates, primary = self._plan(voice)
+        engine, voice = candidates[0]
+        if info is not None:
+            info.update(engine=engine, voice=voice, fallback=engine != primary)
+        try:
+            if engine == 'edge':
+                chunks = self._tts_edge_stream(text, voice)
+            else:
+                chunks = self._tts_cosyvoice_stream(text, voice)
+        except Exception:
+            self.breakers[engine].record_failure()
+            raise
+        return self._tracked_stream(engine, chunks)
+    
+    def _tracked_stream(self, engine: str, chunks):
+        """流式合成的结果计入熔断器（耗时包含下游消费时间，不计入耗时估计）"""
+        try:
+            yield from chunks
+        except Exception:
+            self.breakers[engine].record_failure()
+            raise
+        self.breakers[engine].record_success()
+    
+    async def atts_bytes(self, text, voice=None):
+        """异步语音合成，返回 MP3 字节
+        
+        Edge TTS 直接在当前事件循环中合成；CosyVoice SDK 为阻塞调用，放到线程池执行。
+        对冲与熔断同 tts_bytes。
+        
+        Args:
+            text: 要合成的文字
+            voice: 音色代码或语义描述
+            
+        Returns:
+            bytes: MP3 音频数据，所有候选引擎都失败时返回 None
+        """
+        return (await self.atts_result(text, voice))['data']
+    
+    async def atts_result(self, text, voice=None):
+        """异步语音合成，返回值同 tts_result"""
+        with self.metrics.span('tts.synthesize', chars=len(text)) as span:
+            try:
+                candidates, primary = self._plan(voice)
+                tasks = {asyncio.ensure_future(self._asynthesize(*candidates[0], text)): candidates[0]}
+                if len(candidates) > 1:
+                    done, _ = await asyncio.wait(
+                        tasks, timeout=self._hedge_after(candidates[0][0], text) if self.hedge else None)
+                    if (not done or next(iter(done)).exception() is not None) \
+                            and self.breakers[candidates[1][0]].allow():
+                        tasks[asyncio.ensure_future(self._asynthesize(*candidates[1], text))] = candidates[1]
+                
+                error = None
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is not None:
+                            error = task.exception()
+                            continue
+                        # 落后的请求继续完成（用于更新熔断器），忽略其结果
+                        for other in pending:
+                            other.add_done_callback(lambda t: t.cancelled() or t.exception())
+                        return self._finish(span, tasks[task], primary, len(tasks) > 1, task.result())
+                raise error
+                
+            except Exception as e:
+                return self._failed(span, e)
+    
+    async def atts(self, text, output_file="output.wav", voice=None):
+        """异步语音合成（文字转语音），用法同 tts
+        
+        Args:
+            text: 要合成的文字
+            output_file: 输出文件路径
+            voice: 音色代码或语义描述
+            
+        Returns:
+            str: 输出文件路径，失败返回 None
+        """
+        audio_data = await self.atts_bytes(text, voice)
+        if not audio_data:
+            return None
+        with open(output_file, 'wb') as f:
+            f.write(audio_data)
+        return output_file
+    
     def tts(self, text, output_file="output.wav", voice=None):
         """语音合成（文字转语音）
         
         自动根据音色选择引擎：
         - CosyVoice 音色：使用 DashScope API
         - Edge TTS 音色：使用 Edge TTS
+        主引擎慢或失败时对冲到备用引擎，见 tts_bytes。
         
         Args:
             text: 要合成的文字
@@ -221,40 +734,14 @@ class TTSAPI:
             voice: 音色代码或语义描述
             
         Returns:
-            str: 输出文件路径
+            str: 输出文件路径，合成失败时返回 None（不会写出空文件）
         """
-        try:
-            # 确定音色
-            if voice is None:
-                # 根据优先引擎选择默认音色
-                if self.prefer_engine == 'edge' and self.edge_tts_available:
-                    voice = 'zh-CN-XiaoxiaoNeural'
-                else:
-                    voice = self.DEFAULT_VOICE
-            elif voice not in self.VOICES and voice not in self.EDGE_VOICES:
-                # 尝试匹配 CosyVoice 音色
-                voice = self.match_voice(voice)
-            
-            # 判断使用哪个引擎
-            use_edge = self._is_edge_voice(voice)
-            
-            if use_edge:
-                if not self.edge_tts_available:
-                    print(f"Edge TTS 不可用，尝试使用 CosyVoice")
-                    return None
-                return self._tts_edge(text, voice, output_file)
-            else:
-                if not self.cosyvoice_available:
-                    print(f"CosyVoice 不可用，尝试使用 Edge TTS")
-                    if self.edge_tts_available:
-                        return self._tts_edge(text, 'zh-CN-XiaoxiaoNeural', output_file)
-                    return None
-                return self._tts_cosyvoice(text, voice, output_file)
-                
-        except Exception as e:
-            print(f"合成出错: {e}")
+        audio_data = self.tts_bytes(text, voice)
+        if not audio_data:
             return None
-
+        with open(output_file, 'wb') as f:
+            f.write(audio_data)
+        return output_file
 
 if __name__ == '__main__':
     import argparse
@@ -268,7 +755,10 @@ if __name__ == '__main__':
     
     args = parser.parse_args()
     
-    tts = TTSAPI()
+    # 命令行下诊断信息输出到终端
+    metrics = get_metrics()
+    metrics.add_sink(ConsoleSink())
+    tts = TTSAPI(metrics=metrics)
     
     if args.action == 'tts':
         if not args.input:
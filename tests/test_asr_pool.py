@@ -0,0 +1,86 @@
+"""ASRWorkerPool：请求分发、发送失败与调用方取消的处理"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+
+from asr_pool import ASRWorkerPool
+
+
+def _transcribe(audio):
+    if audio == '慢':
+        time.sleep(0.3)
+    return f'识别结果:{audio}'
+
+
+@pytest.fixture
+def pool():
+    pool = ASRWorkerPool(workers=2, threads_per_worker=1, pin_cpus=False,
+                         load_model=lambda: None, transcribe=_transcribe, warmup=None)
+    pool.start()
+    yield pool
+    pool.close()
+
+
+class _BrokenConn:
+    """模拟工作进程已退出、结果线程尚未察觉时的管道"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def send(self, message):
+        raise BrokenPipeError(32, 'Broken pipe')
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def _outstanding(pool):
+    return [w['outstanding'] for w in pool.stats()['per_worker']]
+
+
+def test_transcribe(pool):
+    futures = [pool.submit(f'音频{i}') for i in range(8)]
+    assert [f.result(timeout=10) for f in futures] == [f'识别结果:音频{i}' for i in range(8)]
+    assert _outstanding(pool) == [0, 0]
+
+
+def test_unpicklable_audio_fails_future(pool):
+    future = pool.submit(threading.Lock())
+    with pytest.raises(TypeError):
+        future.result(timeout=10)
+    assert _outstanding(pool) == [0, 0]
+    # 工作进程不受影响，后续请求正常处理
+    assert pool.transcribe('音频') == '识别结果:音频'
+
+
+def test_broken_pipe_fails_future_and_skips_worker(pool, monkeypatch):
+    broken = pool._workers[0]
+    monkeypatch.setattr(broken, 'conn', _BrokenConn(broken.conn))
+    future = pool.submit('音频')
+    with pytest.raises(BrokenPipeError):
+        future.result(timeout=10)
+    assert not broken.alive
+    assert _outstanding(pool) == [0, 0]
+
+    # 后续请求只分发给仍可用的工作进程
+    futures = [pool.submit(f'音频{i}') for i in range(4)]
+    assert [f.result(timeout=10) for f in futures] == [f'识别结果:音频{i}' for i in range(4)]
+    assert pool.stats()['per_worker'][1]['completed'] == 4
+
+
+def test_cancelled_future_does_not_stop_reader(pool):
+    slow = [pool.submit('慢') for _ in range(2)]
+    assert all(future.cancel() for future in slow)
+
+    # 已取消请求的结果被丢弃，结果线程继续处理后续请求
+    futures = [pool.submit(f'音频{i}') for i in range(4)]
+    assert [f.result(timeout=5) for f in futures] == [f'识别结果:音频{i}' for i in range(4)]
+    assert _outstanding(pool) == [0, 0]
+    assert sum(w['completed'] for w in pool.stats()['per_worker']) == 6
@@ -0,0 +1,129 @@
+"""AsyncFeishuVoice：经本地飞书替身与假 TTS 引擎的完整发送流程"""
+
+import sys
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+if importlib.util.find_spec('av') is None:
+    pytest.skip('需要 PyAV 转码', allow_module_level=True)
+
+import tts_api
+from fake_services import FakeFeishuServer, FakeTTSEngine, install_fake_tts
+from feishu_voice import FeishuVoice
+from async_feishu_voice import AsyncFeishuVoice
+from metrics import Metrics
+
+PATCHED = ('DASHSCOPE_AVAILABLE', 'SpeechSynthesizer', 'SpeechSynthesizerObjectPool',
+           'ResultCallback', 'dashscope', 'EDGE_TTS_AVAILABLE', 'edge_tts')
+
+TEXT = '今天下午三点开会，请准时参加。会议室在三楼。会后请把纪要发到群里。'
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = FakeFeishuServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def voice(server, tmp_path, monkeypatch):
+    for name in PATCHED:
+        monkeypatch.setattr(tts_api, name, getattr(tts_api, name))
+    install_fake_tts(FakeTTSEngine(10, 1), FakeTTSEngine(10, 1))
+    monkeypatch.setattr(FeishuVoice, 'FEISHU_API_BASE', server.api_base)
+    monkeypatch.setenv('FEISHU_TOKEN_CACHE', str(tmp_path / 'token.json'))
+    monkeypatch.setenv('FEISHU_VOICE_CACHE', str(tmp_path / 'cache.db'))
+    monkeypatch.setenv('FEISHU_VOICE_RATES', str(tmp_path / 'rates.json'))
+
+    created = []
+
+    def _create(**kwargs):
+        voice = AsyncFeishuVoice(app_id='cli_test', app_secret='secret', api_key='test-key',
+                                 metrics=Metrics(), transcode_workers=1, **kwargs)
+        created.append(voice)
+        return voice
+
+    yield _create
+    for voice in created:
+        voice.transcoder.close()
+
+
+def _run(voice, coro):
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await voice.ahttp.close()
+    return asyncio.run(_main())
+
+
+@pytest.mark.parametrize('stream_tts', [False, True])
+def test_send_voice_segments_and_cache(voice, server, stream_tts):
+    sender = voice(stream_tts=stream_tts)
+    uploads = server.requests['upload']
+    results = _run(sender, sender.send_voice(TEXT, voice='longwan', target_user='ou_test',
+                                             max_segment_chars=12))
+
+    segments = sender._split_text(TEXT, 12)
+    assert len(results) == len(segments) > 1
+    assert all(result['message_id'].startswith('om_bench_') for result in results)
+    assert server.requests['upload'] - uploads == len(segments)
+    stages = {'tts_first_byte', 'ready'} if stream_tts else {'tts', 'convert'}
+    assert all(stages | {'duration', 'upload', 'send'} <= set(t) for t in sender.last_timings)
+    for segment in segments:
+        key = sender._cache_key(segment, 'longwan')
+        assert sender.voice_cache.get_audio(key) is not None
+        assert sender.voice_cache.get_file_key(key, 'cli_test') is not None
+
+    # 再次发送全部命中 file_key 缓存，不再上传
+    uploads = server.requests['upload']
+    _run(sender, sender.send_voice(TEXT, voice='longwan', target_user='ou_test',
+                                   max_segment_chars=12))
+    assert server.requests['upload'] == uploads
+
+
+def test_failure_cancels_and_awaits_remaining_segments(voice, monkeypatch):
+    sender = voice(use_cache=False)
+    prepared = []
+
+    async def _prepare(segment, voice_name, index=1):
+        if index == 2:
+            raise RuntimeError('segment 2 failed')
+        await asyncio.sleep(0.05 if index == 1 else 10)
+        prepared.append(index)
+        return {'file_key': f'file_{index}', 'duration': 1000, 'timings': {}}
+
+    monkeypatch.setattr(sender, '_aprepare_segment', _prepare)
+
+    async def _main():
+        with pytest.raises(RuntimeError, match='segment 2 failed'):
+            await sender.send_voice(TEXT, voice='longwan', target_user='ou_test',
+                                    max_segment_chars=8, max_workers=5)
+        # 失败返回时其余段落的任务已结束，不会在后台继续运行
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert _run(sender, _main()) == []
+    assert prepared == [1]
+
+
+def test_broadcast_reuses_uploads(voice, server):
+    sender = voice(use_cache=False, stream_tts=True)
+    uploads, sends = server.requests['upload'], server.requests['send']
+    results = _run(sender, sender.broadcast_voice(TEXT, ['ou_a', 'ou_b', 'ou_a', 'oc_c'],
+                                                  voice='longwan', max_segment_chars=12))
+
+    segments = sender._split_text(TEXT, 12)
+    assert [result['receive_id'] for result in results] == ['ou_a', 'ou_b', 'oc_c']
+    assert all(result['error'] is None and len(result['messages']) == len(segments)
+               for result in results)
+    assert server.requests['upload'] - uploads == len(segments)
+    assert server.requests['send'] - sends == 3 * len(segments)
@@ -0,0 +1,75 @@
+"""FeishuVoice：群发被中断时的段落取消"""
+
+import sys
+import time
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+if importlib.util.find_spec('av') is None:
+    pytest.skip('需要 PyAV 转码', allow_module_level=True)
+
+import tts_api
+from fake_services import FakeFeishuServer, FakeTTSEngine, install_fake_tts
+from feishu_voice import FeishuVoice
+from metrics import Metrics
+
+PATCHED = ('DASHSCOPE_AVAILABLE', 'SpeechSynthesizer', 'SpeechSynthesizerObjectPool',
+           'ResultCallback', 'dashscope', 'EDGE_TTS_AVAILABLE', 'edge_tts')
+
+TEXT = '今天下午三点开会，请准时参加。会议室在三楼。会后请把纪要发到群里。'
+
+
+@pytest.fixture
+def sender(tmp_path, monkeypatch):
+    server = FakeFeishuServer().start()
+    for name in PATCHED:
+        monkeypatch.setattr(tts_api, name, getattr(tts_api, name))
+    install_fake_tts(FakeTTSEngine(10, 1), FakeTTSEngine(10, 1))
+    monkeypatch.setattr(FeishuVoice, 'FEISHU_API_BASE', server.api_base)
+    monkeypatch.setenv('FEISHU_TOKEN_CACHE', str(tmp_path / 'token.json'))
+    monkeypatch.setenv('FEISHU_VOICE_RATES', str(tmp_path / 'rates.json'))
+
+    sender = FeishuVoice(app_id='cli_test', app_secret='secret', api_key='test-key',
+                         metrics=Metrics(), use_cache=False, transcode_workers=1)
+    yield sender
+    sender.transcoder.close()
+    server.stop()
+
+
+def test_interrupted_broadcast_cancels_pending_segments(sender, monkeypatch):
+    started = []
+
+    def _prepare(segment, voice_name, index=1):
+        started.append(index)
+        time.sleep(0.2)
+        return {'file_key': f'file_{index}', 'duration': 1000, 'timings': {'tts': 0.1}}
+
+    monkeypatch.setattr(sender, '_prepare_segment', _prepare)
+
+    # 提交第二个接收者的发送任务时模拟 Ctrl-C
+    submit = ThreadPoolExecutor.submit
+    sends = []
+
+    def _submit(executor, fn, *args, **kwargs):
+        if getattr(fn, '__name__', '') == '_send_all':
+            sends.append(fn)
+            if len(sends) == 2:
+                raise KeyboardInterrupt
+        return submit(executor, fn, *args, **kwargs)
+
+    monkeypatch.setattr(ThreadPoolExecutor, 'submit', _submit)
+
+    assert len(sender._split_text(TEXT, 8)) > 2
+    # 清理时遇到已取消的段落不能用 CancelledError 掩盖原来的中断
+    with pytest.raises(KeyboardInterrupt):
+        sender.broadcast_voice(TEXT, ['ou_a', 'ou_b'], max_segment_chars=8, max_workers=1)
+    assert started == [1]
+    assert sender.last_timings == [{'tts': 0.1}]
@@ -0,0 +1,44 @@
+"""funasr_local.transcribe：非 16kHz PCM 输入的重采样"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+
+np = pytest.importorskip('numpy')
+
+import funasr_local
+
+
+class _Model:
+    """记录送入模型的输入"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def generate(self, input, cache, **kwargs):
+        self.inputs.append(input)
+        return [{'text': '你好'}]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = _Model()
+    monkeypatch.setattr(funasr_local, 'get_model', lambda: model)
+    monkeypatch.setattr(funasr_local, '_postprocess', lambda item: item['text'])
+    return model
+
+
+def test_pcm_resampled_to_model_rate(model):
+    samples = np.zeros(8000, dtype=np.float32)
+    assert funasr_local.transcribe(samples, use_cache=False, sample_rate=8000) == '你好'
+    assert len(model.inputs[0]) == funasr_local.SAMPLE_RATE
+
+
+def test_default_rate_passes_pcm_through(model):
+    samples = np.zeros(16000, dtype=np.float32)
+    funasr_local.transcribe(samples, use_cache=False)
+    assert len(model.inputs[0]) == 16000
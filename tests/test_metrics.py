@@ -0,0 +1,93 @@
+"""PrometheusSink：标签值转义与多进程共享文件的累计"""
+
+import re
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+
+from metrics import PrometheusSink
+
+# Prometheus 文本格式的标签：name="value"，value 内只允许 \\、\" 与 \n 三种转义
+LABEL = re.compile(r'(\w+)="((?:[^"\\\n]|\\[\\"n])*)"')
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r'\\([\\"n])', lambda m: '\n' if m.group(1) == 'n' else m.group(1), value)
+
+
+def _parse(line: str) -> dict:
+    body = line[line.index('{') + 1:line.rindex('}')]
+    labels = {}
+    pos = 0
+    while pos < len(body):
+        match = LABEL.match(body, pos)
+        assert match, (line, pos)
+        labels[match.group(1)] = _unescape(match.group(2))
+        pos = match.end() + 1
+    return labels
+
+
+def test_label_values_are_escaped():
+    error = 'C:\\voice\\out.mp3 "not found"\nretry'
+    sink = PrometheusSink()
+    sink.event({'name': 'tts.error', 'error': error, 'engine': 'edge'})
+    sink.span({'name': 'tts', 'duration_ms': 12, 'voice': 'a"b', 'chars': 3})
+
+    lines = [line for line in sink.render().splitlines() if line and not line.startswith('#')]
+    assert all('\n' not in line for line in lines)
+
+    event = next(line for line in lines if line.startswith('openclaw_events_total'))
+    assert _parse(event) == {'event': 'tts.error', 'engine': 'edge', 'error': error}
+    assert event.endswith(' 1')
+
+    counter = next(line for line in lines if line.startswith('openclaw_span_chars_total'))
+    assert _parse(counter) == {'span': 'tts', 'voice': 'a"b'}
+
+
+def _value(path, prefix: str) -> float:
+    line = next(line for line in path.read_text(encoding='utf-8').splitlines()
+                if line.startswith(prefix))
+    return float(line.rsplit(' ', 1)[1])
+
+
+def test_processes_accumulate_into_shared_file(tmp_path):
+    """每个进程（各自的 sink）只把增量合并进共享文件，计数不会归零或互相覆盖"""
+    path = tmp_path / 'openclaw.prom'
+    first = PrometheusSink(str(path), write_interval=3600)
+    first.span({'name': 'tts', 'duration_ms': 20, 'chars': 10})
+    first.flush()
+    first.flush()
+    assert _value(path, 'openclaw_span_chars_total') == 10
+
+    second = PrometheusSink(str(path), write_interval=3600)
+    second.span({'name': 'tts', 'duration_ms': 30, 'chars': 5})
+    second.event({'name': 'tts.fallback'})
+    second.flush()
+    first.span({'name': 'tts', 'duration_ms': 40, 'chars': 1})
+    first.flush()
+
+    assert _value(path, 'openclaw_span_chars_total') == 16
+    assert _value(path, 'openclaw_span_duration_seconds_count') == 3
+    assert _value(path, 'openclaw_span_duration_seconds_sum') == pytest.approx(0.09)
+    assert _value(path, 'openclaw_events_total') == 1
+
+
+def test_concurrent_writers_do_not_lose_updates(tmp_path):
+    path = tmp_path / 'openclaw.prom'
+    sinks = [PrometheusSink(str(path), write_interval=0) for _ in range(4)]
+
+    def _run(sink):
+        for _ in range(50):
+            sink.event({'name': 'send'})
+
+    threads = [threading.Thread(target=_run, args=(sink,)) for sink in sinks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _value(path, 'openclaw_events_total') == 200
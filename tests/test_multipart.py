@@ -0,0 +1,167 @@
+"""MultipartEncoder：经本地 http.server 往返，解析请求体并核对各类文件内容"""
+
+import io
+import os
+import re
+import sys
+import json
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+
+from feishu_http import FeishuHTTPClient
+from multipart import CHUNK_SIZE, ContentLengthError, MultipartEncoder
+
+PAYLOAD = os.urandom(3 * CHUNK_SIZE + 123)
+
+
+def parse_multipart(body: bytes, content_type: str) -> dict:
+    """按 boundary 切分请求体，返回 {字段名: {'filename', 'content_type', 'data'}}"""
+    boundary = re.search(r'boundary=(\S+)', content_type).group(1).encode()
+    delimiter = b'--' + boundary
+    assert body.endswith(delimiter + b'--\r\n')
+    parts = {}
+    for chunk in body.split(delimiter)[1:-1]:
+        assert chunk.startswith(b'\r\n') and chunk.endswith(b'\r\n')
+        head, _, data = chunk[2:-2].partition(b'\r\n\r\n')
+        head = head.decode('utf-8')
+        name = re.search(r'name="([^"]*)"', head).group(1)
+        filename = re.search(r'filename="([^"]*)"', head)
+        ctype = re.search(r'Content-Type: (\S+)', head)
+        parts[name] = {'filename': filename and filename.group(1),
+                       'content_type': ctype and ctype.group(1), 'data': data}
+    return parts
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    """读取整个请求体，解析 multipart 后返回各字段的长度与内容摘要"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        parts = parse_multipart(body, self.headers['Content-Type'])
+        self.server.received.append(parts)
+        data = json.dumps({name: {'filename': part['filename'], 'size': len(part['data'])}
+                           for name, part in parts.items()}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _EchoHandler)
+    httpd.received = []
+    # 截断上传的请求在服务端读到不完整的请求体，忽略其报错输出
+    httpd.handle_error = lambda request, client_address: None
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(scope='module')
+def client():
+    client = FeishuHTTPClient()
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def payload_path(tmp_path):
+    path = tmp_path / 'voice.opus'
+    path.write_bytes(PAYLOAD)
+    return path
+
+
+def _upload(server, client, encoder: MultipartEncoder) -> dict:
+    url = f'http://127.0.0.1:{server.server_address[1]}/open-apis/im/v1/files'
+    status, _ = client.request('POST', url, body=encoder, headers=encoder.headers())
+    assert status == 200
+    return server.received[-1]
+
+
+def _encoder(content, **kwargs) -> MultipartEncoder:
+    return MultipartEncoder([('file_type', 'opus'), ('file_name', 'voice.opus'), ('duration', '1234')],
+                            'file', 'voice.opus', content, **kwargs)
+
+
+CONTENT_KINDS = {
+    'bytes': lambda path: (PAYLOAD, {}),
+    'memoryview': lambda path: (memoryview(PAYLOAD), {}),
+    'bytesio': lambda path: (io.BytesIO(PAYLOAD), {}),
+    'file': lambda path: (open(path, 'rb'), {}),
+    'path': lambda path: (path, {}),
+    'iterator': lambda path: ((PAYLOAD[i:i + 1000] for i in range(0, len(PAYLOAD), 1000)),
+                              {'length': len(PAYLOAD)}),
+}
+
+
+@pytest.mark.parametrize('kind', sorted(CONTENT_KINDS))
+def test_round_trip(server, client, payload_path, kind):
+    content, kwargs = CONTENT_KINDS[kind](payload_path)
+    try:
+        encoder = _encoder(content, **kwargs)
+        if encoder.replayable:
+            assert len(encoder.to_bytes()) == encoder.content_length
+        parts = _upload(server, client, encoder)
+    finally:
+        if hasattr(content, 'close'):
+            content.close()
+
+    assert parts['file_type']['data'] == b'opus'
+    assert parts['duration']['data'] == b'1234'
+    assert parts['file']['filename'] == 'voice.opus'
+    assert parts['file']['content_type'] == 'application/octet-stream'
+    assert parts['file']['data'] == PAYLOAD
+
+
+def test_replay_from_start_position(server, client):
+    content = io.BytesIO(b'skip' + PAYLOAD)
+    content.read(4)
+    encoder = _encoder(content)
+    assert encoder.replayable
+    assert encoder.to_bytes() == encoder.to_bytes()
+    assert _upload(server, client, encoder)['file']['data'] == PAYLOAD
+
+
+def test_shrunk_file_raises(payload_path):
+    with open(payload_path, 'rb') as f:
+        encoder = _encoder(f)
+        with open(payload_path, 'r+b') as writer:
+            writer.truncate(CHUNK_SIZE)
+        with pytest.raises(ContentLengthError):
+            encoder.to_bytes()
+
+
+def test_shrunk_path_raises(payload_path):
+    encoder = _encoder(payload_path)
+    payload_path.write_bytes(PAYLOAD[:100])
+    with pytest.raises(ContentLengthError):
+        encoder.to_bytes()
+
+
+@pytest.mark.parametrize('length', [len(PAYLOAD) - 1, len(PAYLOAD) + 1])
+def test_iterator_length_mismatch_raises(length):
+    encoder = _encoder(iter([PAYLOAD]), length=length)
+    with pytest.raises(ContentLengthError):
+        encoder.to_bytes()
+
+
+def test_shrunk_file_upload_fails_fast(server, client, payload_path):
+    """截断的文件不会让连接等待永远不到的字节，请求直接失败"""
+    with open(payload_path, 'rb') as f:
+        encoder = _encoder(f)
+        payload_path.write_bytes(PAYLOAD[:100])
+        with pytest.raises(ContentLengthError):
+            _upload(server, client, encoder)
@@ -0,0 +1,44 @@
+"""DurationSegmenter：随机中英混排文本上的分段性质"""
+
+import sys
+import random
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+
+from segmenter import DurationSegmenter, char_units, speech_units
+
+ALPHABET = '测文中字语音合成一二三今天会议abcdeXYZ0123 ，。！？、：,.;!? '
+BUDGETS = (1, 2, 3, 5, 7.5, 10, 25)
+
+
+def random_texts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 120)))
+        yield text, rng.choice(BUDGETS)
+
+
+def test_segments_never_exceed_budget():
+    for unit in (speech_units, char_units):
+        segmenter = DurationSegmenter(unit)
+        for text, budget in random_texts(3000):
+            for segment in segmenter.split(text, budget):
+                cost = sum(unit(ch) for ch in segment)
+                # 单个字符本身超出预算时无法再切分
+                assert cost <= budget + 1e-9 or len(segment) == 1, (text, budget, segment, cost)
+
+
+def test_segments_keep_all_text():
+    segmenter = DurationSegmenter()
+    for text, budget in random_texts(3000, seed=1):
+        segments = segmenter.split(text, budget)
+        assert all(segment == segment.strip() and segment for segment in segments)
+        assert ''.join(segments).replace(' ', '') == text.replace(' ', '')
+
+
+def test_prefers_sentence_ends():
+    text = '今天下午三点开会。请提前准备好测试报告。会后一起吃饭。'
+    segments = DurationSegmenter(char_units).split(text, 12)
+    assert segments == ['今天下午三点开会。', '请提前准备好测试报告。', '会后一起吃饭。']
@@ -0,0 +1,47 @@
+"""OpusTranscoder：工作池创建与后端选择"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+
+import transcoder
+from transcoder import OpusTranscoder
+
+
+def test_concurrent_first_use_creates_one_pool():
+    opus = OpusTranscoder(workers=2, backend='ffmpeg')
+    barrier = threading.Barrier(16)
+    executors = []
+
+    def _get():
+        barrier.wait()
+        executors.append(opus._get_executor())
+
+    threads = [threading.Thread(target=_get) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert len(executors) == 16 and len({id(e) for e in executors}) == 1
+    finally:
+        opus.close()
+    assert opus._executor is None
+
+
+def test_pyav_required_by_default(monkeypatch):
+    monkeypatch.setattr(transcoder, 'PYAV_AVAILABLE', False)
+    with pytest.raises(ImportError, match='pip install av'):
+        OpusTranscoder(workers=1)
+    # 只有显式指定时才使用逐段启动 ffmpeg 的后端
+    assert OpusTranscoder(workers=1, backend='ffmpeg').backend == 'ffmpeg'
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        OpusTranscoder(workers=1, backend='sox')
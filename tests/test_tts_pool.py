@@ -0,0 +1,142 @@
+"""TTSAPI：CosyVoice 合成器对象池的借用与归还"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+
+import tts_api
+from metrics import Metrics, MetricsSink
+
+
+class _Synthesizer:
+    created = 0
+
+    def __init__(self):
+        _Synthesizer.created += 1
+        self.connected = True
+        self.voice = None
+
+    def call(self, text):
+        if not self.connected:
+            raise RuntimeError('connection closed')
+        if '失败' in text:
+            raise ConnectionError('synthesis failed')
+        return f'{self.voice}:{text}'.encode()
+
+    def close(self):
+        self.connected = False
+
+
+class _Pool:
+    """与 SDK 对象池一致：只借出已连接的合成器，否则新建"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.idle = []
+        self.borrowed = 0
+
+    def borrow_synthesizer(self, model, voice):
+        with self._lock:
+            self.borrowed += 1
+            connected = [s for s in self.idle if s.connected]
+            synthesizer = connected[0] if connected else _Synthesizer()
+            if connected:
+                self.idle.remove(synthesizer)
+        synthesizer.voice = voice
+        return synthesizer
+
+    def return_synthesizer(self, synthesizer):
+        with self._lock:
+            self.borrowed -= 1
+            self.idle.append(synthesizer)
+        return True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = _Pool()
+    monkeypatch.setattr(tts_api, 'DASHSCOPE_AVAILABLE', True)
+    monkeypatch.setattr(tts_api, 'SpeechSynthesizerObjectPool', lambda max_size: pool)
+    monkeypatch.setattr(tts_api.TTSAPI, '_require_cosyvoice', lambda self: None)
+    return pool
+
+
+@pytest.fixture
+def api(pool, monkeypatch):
+    # 一次失败即熔断，便于检查池化合成的失败是否计入熔断器
+    monkeypatch.setenv('TTS_BREAKER_FAILURES', '1')
+    return tts_api.TTSAPI(api_key='test-key', prefer_engine='cosyvoice', hedge=False,
+                          pool_size=2)
+
+
+def test_success_returns_connected_synthesizer(api, pool):
+    audio = api._tts_cosyvoice_pooled('你好', 'longwan', pool)
+    assert audio == 'longwan:你好'.encode()
+    assert pool.borrowed == 0
+    assert [s.connected for s in pool.idle] == [True]
+
+
+def test_failed_synthesizer_is_closed_before_return(api, pool):
+    with pytest.raises(ConnectionError):
+        api._tts_cosyvoice_pooled('合成失败', 'longwan', pool)
+    assert pool.borrowed == 0
+    assert [s.connected for s in pool.idle] == [False]
+
+    # 关闭的合成器不会再被借出
+    assert api._tts_cosyvoice_pooled('你好', 'longwan', pool) == 'longwan:你好'.encode()
+
+
+def test_tts_result_reuses_pooled_connection(api, pool):
+    created = _Synthesizer.created
+    for text in ('第一段', '第二段', '第三段'):
+        result = api.tts_result(text, 'longwan')
+        assert result['data'] == f'longwan:{text}'.encode() and result['error'] is None
+    assert _Synthesizer.created - created == 1
+    assert pool.borrowed == 0
+
+
+def test_pooled_failure_goes_through_breaker(api, pool):
+    result = api.tts_result('合成失败', 'longwan')
+    assert result['data'] is None and 'synthesis failed' in result['error']
+    assert api.breakers['cosyvoice'].state == 'open'
+    assert pool.borrowed == 0
+    assert [s.connected for s in pool.idle] == [False]
+
+
+def test_pool_disabled_by_default(pool, monkeypatch):
+    monkeypatch.delenv('TTS_POOL_SIZE', raising=False)
+    api = tts_api.TTSAPI(api_key='test-key', prefer_engine='cosyvoice')
+    assert api._get_cosyvoice_pool() is None
+    monkeypatch.setenv('TTS_POOL_SIZE', '4')
+    api = tts_api.TTSAPI(api_key='test-key', prefer_engine='cosyvoice')
+    assert api._get_cosyvoice_pool() is pool
+
+
+class _Events(MetricsSink):
+    def __init__(self):
+        self.records = []
+
+    def event(self, record: dict):
+        self.records.append(record)
+
+
+def test_failure_reported_as_event(monkeypatch, capsys):
+    def _fail(self, text, voice):
+        raise ConnectionError('synthesis failed')
+
+    monkeypatch.setattr(tts_api, 'DASHSCOPE_AVAILABLE', True)
+    monkeypatch.setattr(tts_api.TTSAPI, '_tts_cosyvoice_bytes', _fail)
+    events = _Events()
+    api = tts_api.TTSAPI(api_key='test-key', prefer_engine='cosyvoice', hedge=False,
+                         metrics=Metrics([events]))
+    assert api.tts_result('合成失败', 'longwan')['data'] is None
+
+    # 作为库调用时诊断信息走埋点，不打印到标准输出
+    assert capsys.readouterr().out == ''
+    assert [(r['name'], r['error']) for r in events.records] == [('tts.error', 'ConnectionError')]
+    assert 'synthesis failed' in events.records[0]['message']
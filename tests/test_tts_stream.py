@@ -0,0 +1,130 @@
+"""TTSAPI.tts_stream：经 FakeSpeechSynthesizer 回调接口的流式合成"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+import tts_api
+from fake_services import FakeTTSEngine, install_fake_tts
+
+# install_fake_tts 会替换的模块属性，测试结束后还原
+PATCHED = ('DASHSCOPE_AVAILABLE', 'SpeechSynthesizer', 'SpeechSynthesizerObjectPool',
+           'ResultCallback', 'dashscope', 'EDGE_TTS_AVAILABLE', 'edge_tts')
+
+
+class _Engine(FakeTTSEngine):
+    """每 4 字节是一个递增序号的假引擎，乱序、丢块或重复都能从拼接结果看出来"""
+
+    def __init__(self, chunks: int = 8):
+        self.base_ms = 0
+        self.per_char_ms = 2
+        self.chars_per_second = 4.5
+        self.chunks = chunks
+
+    def audio_for(self, text: str) -> bytes:
+        return b''.join(i.to_bytes(4, 'big') for i in range(64 * len(text)))
+
+    def split(self, audio: bytes):
+        size = 4 * max(1, len(audio) // 4 // self.chunks)
+        return [audio[i:i + size] for i in range(0, len(audio), size)]
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    for name in PATCHED:
+        monkeypatch.setattr(tts_api, name, getattr(tts_api, name))
+    cosyvoice = _Engine()
+    install_fake_tts(cosyvoice, _Engine())
+    return cosyvoice
+
+
+@pytest.fixture
+def api(engine, monkeypatch):
+    # 一次失败即熔断，便于检查失败是否计入熔断器
+    monkeypatch.setenv('TTS_BREAKER_FAILURES', '1')
+    return tts_api.TTSAPI(api_key='test-key', prefer_engine='cosyvoice', hedge=False)
+
+
+def _fail_after(chunks: int, message: str):
+    """先产出 chunks 个音频块再回调 on_error 的合成器"""
+    base = tts_api.SpeechSynthesizer
+
+    class _FailingSynthesizer(base):
+        def _emit(self, text):
+            audio = b''.join(i.to_bytes(4, 'big') for i in range(chunks))
+            for i in range(0, len(audio), 4):
+                self.callback.on_data(audio[i:i + 4])
+            self.callback.on_error(message)
+
+    return _FailingSynthesizer
+
+
+def test_chunks_arrive_in_order_and_complete(api, engine):
+    text = '今天下午三点开会，请准时参加。'
+    info = {}
+    chunks = list(api.tts_stream(text, 'longxiaochun', info=info))
+
+    assert info == {'engine': 'cosyvoice', 'voice': 'longxiaochun', 'fallback': False}
+    assert len(chunks) == len(engine.split(engine.audio_for(text)))
+    assert b''.join(chunks) == engine.audio_for(text)
+    assert api.breakers['cosyvoice'].state == 'closed'
+
+
+def test_first_chunk_before_synthesis_finishes(api, engine):
+    """音频块到达即产出，不等待整段合成结束"""
+    text = '流' * 200
+    start = time.perf_counter()
+    stream = api.tts_stream(text, 'longxiaochun')
+    next(stream)
+    first = time.perf_counter() - start
+    rest = list(stream)
+    total = time.perf_counter() - start
+
+    assert rest
+    assert first < total / 2
+
+
+def test_on_error_reaches_consumer(api, monkeypatch):
+    monkeypatch.setattr(tts_api, 'SpeechSynthesizer', _fail_after(3, 'quota exceeded'))
+    received = []
+    with pytest.raises(RuntimeError, match='quota exceeded'):
+        for chunk in api.tts_stream('合成到一半失败', 'longxiaochun'):
+            received.append(chunk)
+
+    # 出错前已到达的音频块照常产出
+    assert received == [i.to_bytes(4, 'big') for i in range(3)]
+    assert api.breakers['cosyvoice'].state == 'open'
+
+
+def test_call_exception_reaches_consumer(api, monkeypatch):
+    class _BrokenSynthesizer(tts_api.SpeechSynthesizer):
+        def call(self, text):
+            raise ConnectionError('websocket closed')
+
+    monkeypatch.setattr(tts_api, 'SpeechSynthesizer', _BrokenSynthesizer)
+    with pytest.raises(ConnectionError, match='websocket closed'):
+        list(api.tts_stream('连接失败', 'longxiaochun'))
+    assert api.breakers['cosyvoice'].state == 'open'
+
+
+def test_concurrent_streams_do_not_mix(api, engine):
+    texts = [f'第{i}条消息' * (i + 1) for i in range(6)]
+    results = [None] * len(texts)
+
+    def _consume(index):
+        results[index] = b''.join(api.tts_stream(texts[index], 'longxiaochun'))
+
+    threads = [threading.Thread(target=_consume, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [engine.audio_for(text) for text in texts]
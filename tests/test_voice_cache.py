@@ -0,0 +1,57 @@
+"""VoiceCache：file_key 有效期与过期清理"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'skills' / 'feishu-voice'))
+
+from voice_cache import VoiceCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = VoiceCache(tmp_path / 'cache.db', file_key_ttl=0.2)
+    cache.FILE_KEY_SWEEP_INTERVAL = 0
+    yield cache
+    cache.close()
+
+
+def test_file_key_expires(cache):
+    cache.put_file_key('k1', 'cli_a', 'file_1', 1200)
+    assert cache.get_file_key('k1', 'cli_a') == ('file_1', 1200)
+    assert cache.get_file_key('k1', 'cli_b') is None
+    time.sleep(0.3)
+    assert cache.get_file_key('k1', 'cli_a') is None
+
+
+def test_expired_file_keys_swept_without_audio(cache):
+    """没有对应音频的 file_key 不会经由音频淘汰删除，过期后由清理删除"""
+    for i in range(5):
+        cache.put_file_key(f'k{i}', 'cli_a', f'file_{i}', 1000)
+    assert cache.stats()['file_keys'] == 5
+    time.sleep(0.3)
+
+    cache.put_file_key('fresh', 'cli_a', 'file_fresh', 1000)
+    stats = cache.stats()
+    assert stats['file_keys'] == 1
+    assert stats['file_key_expirations'] == 5
+    assert cache.get_file_key('fresh', 'cli_a') == ('file_fresh', 1000)
+
+
+def test_sweep_interval_throttles_deletes(tmp_path):
+    cache = VoiceCache(tmp_path / 'cache.db', file_key_ttl=0.1)
+    try:
+        cache.put_file_key('old', 'cli_a', 'file_old', 1000)
+        time.sleep(0.2)
+        # 距上次清理不足 FILE_KEY_SWEEP_INTERVAL：过期记录暂不删除，但查询仍视为未命中
+        assert cache.get_file_key('old', 'cli_a') is None
+        assert cache.stats()['file_keys'] == 1
+        cache._next_sweep = 0.0
+        assert cache.get_file_key('old', 'cli_a') is None
+        assert cache.stats()['file_keys'] == 0
+    finally:
+        cache.close()
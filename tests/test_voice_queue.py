@@ -0,0 +1,93 @@
+"""VoiceJobQueue / VoiceJobWorker：租约续约、领取出错时的退避与接收者 ID 类型校验"""
+
+import os
+import sys
+import time
+import sqlite3
+import threading
+import subprocess
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+SKILL = ROOT / 'skills' / 'feishu-voice'
+sys.path.insert(0, str(ROOT / 'skills' / 'voice-handle'))
+sys.path.insert(0, str(SKILL))
+
+from voice_queue import RECEIVE_ID_TYPES, VoiceJobQueue, VoiceJobWorker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = VoiceJobQueue(tmp_path / 'queue.db')
+    yield queue
+    queue.close()
+
+
+def test_receive_id_types_match_sender():
+    from feishu_voice import FeishuVoice
+    assert RECEIVE_ID_TYPES == FeishuVoice.RECEIVE_ID_TYPES
+
+
+def test_enqueue_rejects_unknown_id_type(queue):
+    with pytest.raises(ValueError):
+        queue.enqueue('你好', 'ou_test', receive_id_type='openid')
+    assert queue.stats()['lanes'] == {}
+
+
+def test_cli_rejects_unknown_id_type(tmp_path):
+    env = dict(os.environ, FEISHU_VOICE_QUEUE=str(tmp_path / 'queue.db'))
+    proc = subprocess.run([sys.executable, str(SKILL / 'voice_queue.py'), 'enqueue', '你好',
+                           '--user', 'ou_test', '--id-type', 'openid'],
+                          env=env, capture_output=True, text=True)
+    assert proc.returncode == 2
+    assert 'invalid choice' in proc.stderr
+
+
+def test_lease_renewed_while_job_held(queue):
+    queue.enqueue('你好', 'ou_test')
+    worker = VoiceJobWorker(queue, sender=object(), lease_seconds=0.3)
+    job = queue.claim('a', lease_seconds=0.3)
+
+    with worker._keep_lease(job['id'], 'a'):
+        time.sleep(1.0)
+        # 超过租约时长仍在续约，其他工作者无法接管
+        assert queue.claim('b', lease_seconds=0.3) is None
+
+    time.sleep(0.4)
+    taken = queue.claim('b', lease_seconds=0.3)
+    assert taken is not None and taken['id'] == job['id']
+
+
+class _LockedQueue:
+    """前几次领取抛出 database is locked 的队列"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.claims = 0
+        self.claimed = threading.Event()
+
+    def claim(self, worker, lanes=None, lease_seconds=None):
+        self.claims += 1
+        if self.claims <= self.failures:
+            raise sqlite3.OperationalError('database is locked')
+        self.claimed.set()
+        return None
+
+
+def test_slot_survives_claim_errors(capsys):
+    queue = _LockedQueue(failures=3)
+    queue.DEFAULT_LEASE_SECONDS = 300
+    worker = VoiceJobWorker(queue, sender=object(), parallelism=1)
+    worker.POLL_INTERVAL = 0.01
+    thread = threading.Thread(target=worker._run_slot, args=(0,), daemon=True)
+    thread.start()
+    try:
+        assert queue.claimed.wait(5)
+        assert thread.is_alive()
+    finally:
+        worker.stop()
+        thread.join(5)
+    assert not thread.is_alive()
+    assert capsys.readouterr().out.count('database is locked') == 3